@@ -1,10 +1,10 @@
-import random
 from src.const import *
 import view.Board as Board
 import src.db as db
 import src.ChessEngine as ChessEngine
+import src.AIWorker as AIWorker
+import src.Move as Move
 import pygame as p
-import multiprocessing
 import json
 import threading
 
@@ -43,15 +43,8 @@ def main():
 
     game_start_sound.start()
 
-    return_queue = multiprocessing.Queue()
-    move_finder_process = multiprocessing.Process(
-        target=smart_finder.find_best_move,
-        args=(
-            game_state,
-            valid_moves,
-            return_queue,
-        )
-    )
+    # the AI searches in one process for the whole game, its tables stay warm between moves
+    ai_worker = AIWorker.AIWorker(BACKEND, AI_TIME_LIMIT, AI_WORKERS, AI_PARALLEL_SEARCH, AI_PONDER, AI_STATS_LOG, AI_OPENING_BOOK, AI_TABLEBASES)
 
     is_player_one_human: bool = True
     is_player_tow_human: bool = True
@@ -87,7 +80,7 @@ def main():
 
             # Key handler
             game_state, valid_moves, square_selected, player_clicks, flags = board.handle_key_events(
-                event, game_state, flags, square_selected, player_clicks, valid_moves, move_finder_process)
+                event, game_state, flags, square_selected, player_clicks, valid_moves, ai_worker)
 
         # Ai move finder logic
         if not flags["game_over"] and not flags["is_human_turn"] and not flags["move_undo"]:
@@ -95,28 +88,34 @@ def main():
                 flags["ai_thinking"] = True
                 print("Thinking...")
 
-                # To pass data between processes
-                return_queue = multiprocessing.Queue()
-                move_finder_process = multiprocessing.Process(
-                    target=smart_finder.find_best_move,
-                    args=(
-                        game_state,
-                        valid_moves,
-                        return_queue,
-                    )
-                )
-                # Call the process, the same as smart_finder.find_best_move(game_state, valid_moves)
-                move_finder_process.start()
-
-            if not move_finder_process.is_alive():
-                print("Done thinking...")
-                ai_move = return_queue.get()
-                if ai_move is None:
+                # only the moves played since the last search are sent to the AI process
+                ai_worker.start_search(game_state)
+
+            if ai_worker.poll():
+                search = ai_worker.search_record
+                # a mate score is shown as the moves to mate
+                mate = smart_finder.get_mate_moves(search["score"])
+                if mate is None:
+                    score = f"score {search['score']}"
+                elif mate > 0:
+                    score = f"mate in {mate}"
+                else:
+                    score = f"mated in {-mate}"
+                if search["statistics"].get("book"):
+                    print("Done thinking... book move")
+                elif search["statistics"].get("tablebase"):
+                    print(f"Done thinking... tablebase move, {score}")
+                else:
+                    print(f"Done thinking... depth {search['depth']}, {score}, "
+                          f"{search['nodes']} nodes, {search['nodes_per_second']:.0f} nodes/s")
+                if ai_worker.best_move is None:
                     ai_move = smart_finder.find_random_move(valid_moves)
+                else:
+                    ai_move = Move.Move.from_code(ai_worker.best_move, game_state.board)
 
+                # the search picks the promotion piece as part of the move
                 if ai_move.is_pawn_promotion:
-                    game_state.promotion_choice = random.choice(
-                        ["Q", "R", "B", "N"])
+                    game_state.promotion_choice = ai_move.promotion_piece
 
                 game_state.make_move(ai_move)
                 flags["animate"] = True
@@ -172,6 +171,8 @@ def main():
             clock.tick(MAX_FPS)
             p.display.flip()
 
+    ai_worker.close()
+
     serialized_list = json.dumps(
         game_state.moves_log,
         default=lambda obj: obj.__json__()
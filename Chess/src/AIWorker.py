@@ -0,0 +1,289 @@
+"""
+A long-lived process the AI searches in, for the whole game.
+
+The process is started once and keeps its own GameState and ChessAI, so the
+transposition table stays warm from one move to the next. The game sends it
+compact updates over a pipe: the codes of the moves played since the last update
+(the worker's own move and the reply to it), an undo, or a FEN string when the
+positions went apart (a new game). The best move comes back on the same pipe,
+and the game polls for it without blocking. A shared event stops the search
+early, it then answers with the best move found so far.
+
+With pondering on, the worker doesn't wait for the opponent after it answered:
+it plays its move and the reply it expects (the second move of its principal
+variation) and searches on, while a thread watches the pipe. If the opponent
+plays that reply (a ponder hit) the same search goes on with the time of a move,
+any other message stops it and the worker follows the game again.
+
+Messages to the worker are tuples:
+
+    ("position", fen)          set up the position
+    ("move", code)             play a move
+    ("undo", count)            take the last count moves back
+    ("search", search_id)      search the position, answered with (search_id, move code or None,
+                               expected reply or None, SearchResult.__json__ of the search)
+    ("ponderhit", search_id)   the expected reply was played, answered like a search
+    ("quit",)                  end the process
+"""
+import multiprocessing
+import threading
+import src.ChessEngine as ChessEngine
+import src.ChessAI as ChessAI
+import src.SearchResult as SearchResult
+import src.TranspositionTable as TranspositionTable
+
+
+class AIWorker:
+    """
+    The game side of the AI process.
+
+    Args:
+        backend (str): The GameState backend, "mailbox" or "bitboard".
+        time_limit (float): Seconds the AI may think about a move.
+        workers (int): Processes the AI searches with, None for one per CPU core.
+        parallel_search (str): How the processes share the search, "lazy_smp" or "root_split".
+        ponder (bool): Search on the opponent's time.
+        stats_log (str): File the worker appends a JSON line to after every search, None for none.
+        book (str): Opening book file, see OpeningBook, None for no book.
+        tablebases (str): Folder of endgame tables, see Tablebase, None for none.
+    """
+
+    def __init__(self, backend: str = "mailbox", time_limit: float = 2.0, workers: int = None, parallel_search: str = "lazy_smp", ponder: bool = False, stats_log: str = None, book: str = None, tablebases: str = None) -> None:
+        self.connection, worker_connection = multiprocessing.Pipe()
+        self.stop_event = multiprocessing.Event()
+        self.process = multiprocessing.Process(
+            target=run_ai_worker,
+            args=(worker_connection, self.stop_event, backend, time_limit, workers, parallel_search, ponder, stats_log, book, tablebases),
+        )
+        self.process.start()
+
+        # Zobrist keys of the positions the worker went through, it can't undo to the first
+        # `base` of them: those are only part of the FEN it was sent. Empty until the first sync
+        self.zobrist_history: list[int] = []
+        self.base: int = 0
+        # results of older searches than search_id are stale, see cancel
+        self.search_id: int = 0
+        self.searching: bool = False
+        self.best_move: int = None
+        # the result of the last search with its statistics, as SearchResult.__json__ made it
+        self.search_record: dict = {}
+        # the worker's move and the reply it ponders on, until the next message
+        self.pondering: bool = False
+        self.ponder_moves: tuple[int, int] = ()
+
+    def sync(self, game_state: ChessEngine.GameState) -> None:
+        """
+        Bring the worker's position up to date with the game, with as small a message as possible.
+
+        Args:
+            game_state (ChessEngine.GameState): The position of the game.
+        """
+        zobrist_history = game_state.zobrist_history[:]
+        known = self.zobrist_history
+        if zobrist_history == known:
+            return
+
+        new_moves = len(zobrist_history) - len(known)
+        if known and 0 < new_moves <= len(game_state.move_records) and zobrist_history[:len(known)] == known:
+            # usually two: the worker's move and the reply to it
+            for record in game_state.move_records[-new_moves:]:
+                self.connection.send(("move", record[0]))
+        elif self.base <= len(zobrist_history) < len(known) and zobrist_history == known[:len(zobrist_history)]:
+            self.connection.send(("undo", len(known) - len(zobrist_history)))
+        else:
+            self.base = len(zobrist_history)
+            self.connection.send(("position", game_state.get_fen()))
+        self.zobrist_history = zobrist_history
+        self.pondering = False
+
+    def is_ponder_hit(self, game_state: ChessEngine.GameState) -> bool:
+        """
+        Check if the game went on with the worker's move and the reply it ponders on.
+        """
+        return (self.pondering and game_state.zobrist_history[:-2] == self.zobrist_history
+                and tuple(record[0] for record in game_state.move_records[-2:]) == self.ponder_moves)
+
+    def start_search(self, game_state: ChessEngine.GameState) -> None:
+        """
+        Send the position and ask for the best move, poll tells when it arrived.
+
+        Args:
+            game_state (ChessEngine.GameState): The position to search.
+        """
+        self.search_id += 1
+        self.searching = True
+        self.best_move = None
+        if self.is_ponder_hit(game_state):
+            # the worker is already searching the position, it only has to be told
+            self.pondering = False
+            self.zobrist_history = game_state.zobrist_history[:]
+            self.connection.send(("ponderhit", self.search_id))
+            return
+
+        self.sync(game_state)
+        self.pondering = False
+        self.connection.send(("search", self.search_id))
+
+    def poll(self) -> bool:
+        """
+        Check, without waiting, if the result of the current search arrived.
+
+        Results of cancelled searches are read and dropped.
+
+        Returns:
+            bool: True once, when the result arrived, the move code is in best_move.
+        """
+        while self.searching and self.connection.poll():
+            search_id, best_move, ponder_move, search_record = self.connection.recv()
+            if search_id == self.search_id:
+                self.searching = False
+                self.best_move = best_move
+                self.search_record = search_record
+                # the worker goes on searching the reply it expects
+                self.pondering = ponder_move is not None
+                self.ponder_moves = (best_move, ponder_move)
+                return True
+        return False
+
+    def move_now(self) -> None:
+        """
+        Stop the current search, it answers with the best move found so far.
+        """
+        if self.searching:
+            self.stop_event.set()
+
+    def cancel(self) -> None:
+        """
+        Stop the current search and forget it, its result is dropped when it arrives.
+        """
+        if self.searching:
+            self.stop_event.set()
+            self.search_id += 1
+            self.searching = False
+
+    def close(self) -> None:
+        """
+        End the worker process.
+        """
+        self.cancel()
+        self.connection.send(("quit",))
+        self.process.join()
+
+
+def ponder(connection, stop_event: multiprocessing.Event, ai: ChessAI.ChessAI, game_state: ChessEngine.GameState,
+           ponder_moves: tuple[int, int], search) -> tuple[tuple, bool, SearchResult.SearchResult]:
+    """
+    Search the position after the worker's move and the expected reply, until the game sends a message.
+
+    A thread waits for the message: a ponder hit puts the search on the clock,
+    anything else stops it.
+
+    Args:
+        connection: The worker end of the pipe.
+        stop_event (multiprocessing.Event): The stop event of the search.
+        ai (ChessAI.ChessAI): The AI of the worker.
+        game_state (ChessEngine.GameState): The position the worker answered the search in.
+        ponder_moves (tuple[int, int]): The worker's move and the expected reply.
+        search: The search method of the AI the worker plays with, e.g. ai.root_split_search.
+
+    Returns:
+        tuple[tuple, bool, SearchResult.SearchResult]: The message that ended pondering, True if
+            it was a ponder hit and the search result is the answer, and the result, None on a miss.
+            game_state is left after the two moves on a hit, and unchanged otherwise.
+    """
+    stop_event.clear()
+    ponder_hit_event = threading.Event()
+    messages = []
+
+    def watch_connection() -> None:
+        messages.append(connection.recv())
+        if messages[0][0] == "ponderhit":
+            ponder_hit_event.set()
+        else:
+            stop_event.set()
+
+    watcher = threading.Thread(target=watch_connection, daemon=True)
+    watcher.start()
+
+    for move in ponder_moves:
+        game_state.make_move_code(move)
+    ai.pondering = True
+    ai.ponder_hit_event = ponder_hit_event
+    result = search(game_state)
+    ai.pondering = False
+
+    # the search may also end on its own, at MAX_DEPTH, then the game's answer is waited for
+    watcher.join()
+    message = messages[0]
+    if message[0] == "ponderhit":
+        return message, True, result
+    for _ in ponder_moves:
+        game_state.undo_move()
+    return message, False, None
+
+
+def run_ai_worker(connection, stop_event: multiprocessing.Event, backend: str, time_limit: float,
+                  workers: int, parallel_search: str, ponder_enabled: bool, stats_log: str, book: str, tablebases: str) -> None:
+    """
+    Serve the messages of an AIWorker until it quits, in the worker process.
+
+    Args:
+        connection: The worker end of the pipe.
+        stop_event (multiprocessing.Event): Set by the game to stop the current search.
+        backend (str): The GameState backend, "mailbox" or "bitboard".
+        time_limit (float): Seconds the AI may think about a move.
+        workers (int): Processes the AI searches with, None for one per CPU core.
+        parallel_search (str): How the processes share the search, "lazy_smp" or "root_split".
+        ponder_enabled (bool): Search on the opponent's time.
+        stats_log (str): File a JSON line is appended to after every search, None for none.
+        book (str): Opening book file, see OpeningBook, None for no book.
+        tablebases (str): Folder of endgame tables, see Tablebase, None for none.
+    """
+    game_state = ChessEngine.GameState(backend)
+    ai = ChessAI.ChessAI(time_limit, workers=workers, stats_log=stats_log, book=book, tablebases=tablebases)
+    ai.stop_event = stop_event
+    if parallel_search == "root_split":
+        search = ai.root_split_search
+    else:
+        search = ai.lazy_smp_search
+        if ai.WORKERS > 1:
+            # shared from the start, so the helpers of every move search with the same table
+            ai.transposition_table = TranspositionTable.SharedTranspositionTable()
+
+    message = None
+    while True:
+        if message is None:
+            message = connection.recv()
+        kind = message[0]
+        if kind == "quit":
+            break
+        elif kind == "position":
+            game_state.load_fen(message[1])
+        elif kind == "move":
+            game_state.make_move_code(message[1])
+        elif kind == "undo":
+            for _ in range(message[1]):
+                game_state.undo_move()
+        elif kind == "search":
+            # a stop sent after the last search ended is meant for that one
+            stop_event.clear()
+            result = search(game_state)
+
+            # answer, then ponder on the expected reply, as long as the opponent plays it
+            while True:
+                best_move = result.best_move
+                ponder_move = None
+                # the tablebases and the root split workers give the variation, not the table
+                if ponder_enabled and len(result.principal_variation) >= 2:
+                    ponder_move = result.principal_variation[1]
+                connection.send((message[1], best_move, ponder_move, result.__json__()))
+                if ponder_move is None:
+                    message = None
+                    break
+                message, ponder_hit, result = ponder(
+                    connection, stop_event, ai, game_state, (best_move, ponder_move), search)
+                if not ponder_hit:
+                    break
+            continue
+        message = None
+    ai.close()
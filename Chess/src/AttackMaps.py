@@ -0,0 +1,70 @@
+import src.SquareTables as SquareTables
+
+
+class AttackMaps:
+    # indexes into SquareTables.DIRECTIONS
+    slider_directions: dict[str, tuple[int]] = {
+        "R": SquareTables.ORTHOGONAL,
+        "B": SquareTables.DIAGONAL,
+        "Q": SquareTables.ORTHOGONAL + SquareTables.DIAGONAL,
+    }
+    jump_targets: dict[str, list[tuple[tuple[int, int, int]]]] = {
+        "N": SquareTables.KNIGHT_TARGETS,
+        "K": SquareTables.KING_TARGETS,
+    }
+
+    def get_attack_map(self, color: str) -> list[int]:
+        """
+        Count how many pieces of a color attack every square.
+
+        The map is computed once per position and color (it is cached by the Zobrist key),
+        so every king safety, castling and check question of a node shares it.
+        The enemy king is see-through for sliding pieces: a king can't escape a check by
+        stepping backwards along the checking line.
+
+        Args:
+            color (str): "w" or "b", the color of the attacking pieces.
+
+        Returns:
+            list[int]: Number of attackers per square, indexed by row * 8 + col.
+        """
+        key = self.zobrist_key
+        cached = self.attack_maps.get(color)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        attacks = [0] * 64
+        board = self.board
+        enemy_king = ("b" if color == "w" else "w") + "K"
+        pawn_row_step = -1 if color == "w" else 1
+
+        for row in range(8):
+            for col in range(8):
+                square = board[row][col]
+                if square[0] != color:
+                    continue
+
+                piece = square[1]
+                if piece == "p":
+                    end_row = row + pawn_row_step
+                    if 0 <= end_row < 8:
+                        if col > 0:
+                            attacks[end_row * 8 + col - 1] += 1
+                        if col < 7:
+                            attacks[end_row * 8 + col + 1] += 1
+
+                elif piece in self.jump_targets:
+                    for _, _, end in self.jump_targets[piece][row * 8 + col]:
+                        attacks[end] += 1
+
+                else:
+                    rays = SquareTables.RAY_TARGETS[row * 8 + col]
+                    for direction in self.slider_directions[piece]:
+                        for end_row, end_col, end in rays[direction]:
+                            attacks[end] += 1
+                            end_piece = board[end_row][end_col]
+                            if end_piece != "--" and end_piece != enemy_king:
+                                break
+
+        self.attack_maps[color] = (key, attacks)
+        return attacks
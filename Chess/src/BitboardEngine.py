@@ -0,0 +1,507 @@
+import src.ChessEngine as ChessEngine
+import src.Move as Move
+
+from src.SquareTables import (ORTHOGONAL, DIAGONAL, POSITIVE, RAYS, KNIGHT_ATTACKS, KING_ATTACKS,
+                              PAWN_ATTACKS, BETWEEN, LINE)
+
+
+def first_blocker(direction: int, square: int, occupied: int) -> int:
+    """
+    Find the first occupied square when walking from a square in a direction.
+
+    Args:
+        direction (int): Index into DIRECTIONS.
+        square (int): The square to start from.
+        occupied (int): Bitboard of all occupied squares.
+
+    Returns:
+        int: The square of the first blocker, or -1 if the ray is empty.
+    """
+    blockers = RAYS[direction][square] & occupied
+    if not blockers:
+        return -1
+    if POSITIVE[direction]:
+        return (blockers & -blockers).bit_length() - 1
+    return blockers.bit_length() - 1
+
+
+def slider_attacks(square: int, occupied: int, directions: tuple[int]) -> int:
+    """
+    Compute the squares attacked by a sliding piece, stopping at the first blocker of each ray.
+
+    Args:
+        square (int): The square of the sliding piece.
+        occupied (int): Bitboard of all occupied squares.
+        directions (tuple[int]): The direction indexes the piece slides along.
+
+    Returns:
+        int: The attack bitboard, blockers included.
+    """
+    attacks = 0
+    for direction in directions:
+        ray = RAYS[direction][square]
+        blocker = first_blocker(direction, square, occupied)
+        if blocker >= 0:
+            ray ^= RAYS[direction][blocker]
+        attacks |= ray
+    return attacks
+
+
+def iterate_squares(bitboard: int):
+    """
+    Yield the index of every set bit, lowest first.
+    """
+    while bitboard:
+        lowest = bitboard & -bitboard
+        yield lowest.bit_length() - 1
+        bitboard ^= lowest
+
+
+class BitboardGameState(ChessEngine.GameState):
+    """
+    GameState backend that generates moves from 64-bit integer bitboards.
+
+    The 8x8 board is still kept up to date (the UI and Move objects read it), but the
+    move generator, check and pin detection only use one bitboard per piece and per color.
+    Select it with `ChessEngine.GameState(backend="bitboard")`.
+    """
+
+    def __init__(self, backend: str = "bitboard") -> None:
+        super().__init__(backend)
+        self.load_bitboards()
+
+    def load_bitboards(self) -> None:
+        """
+        Rebuild every bitboard from the 8x8 board.
+        """
+        self.pieces: dict[str, int] = {
+            color + piece: 0 for color in "wb" for piece in "KQRBNp"
+        }
+        self.colors: dict[str, int] = {"w": 0, "b": 0}
+        for row in range(8):
+            for col in range(8):
+                square = self.board[row][col]
+                if square != "--":
+                    bit = 1 << (row * 8 + col)
+                    self.pieces[square] |= bit
+                    self.colors[square[0]] |= bit
+
+        # the bitboard changes of every move, so undo can replay them
+        self.bitboard_log: list[list[tuple[str, int]]] = []
+
+    def load_fen(self, fen: str) -> None:
+        """
+        Set up the position described by a FEN string and clear the move history.
+
+        Args:
+            fen (str): The position in Forsyth-Edwards Notation.
+        """
+        super().load_fen(fen)
+        self.load_bitboards()
+
+    def toggle_pieces(self, changes: list[tuple[str, int]]) -> None:
+        """
+        Flip the given (piece, square) bits, toggling twice restores the position.
+
+        Args:
+            changes (list[tuple[str, int]]): The pieces and squares to flip.
+        """
+        for piece, square in changes:
+            bit = 1 << square
+            self.pieces[piece] ^= bit
+            self.colors[piece[0]] ^= bit
+
+    def make_move_code(self, code: int) -> None:
+        """
+        Makes a move given as a move code and updates the bitboards.
+
+        Args:
+            code (int): The move to be made.
+
+        Returns:
+            None
+        """
+        super().make_move_code(code)
+
+        _, piece_moved, piece_captured = self.move_records[-1]
+        start, end, flag = code & 63, code >> 6 & 63, code >> 12 & 3
+        changes = [
+            (piece_moved, start),
+            # the board already holds the promoted piece, if any
+            (self.board[end >> 3][end & 7], end),
+        ]
+
+        if flag == Move.EN_PASSANT:
+            changes.append(
+                ("wp" if piece_moved == "bp" else "bp", (start & 56) | (end & 7)))
+        elif piece_captured != "--":
+            changes.append((piece_captured, end))
+
+        if flag == Move.CASTLE:
+            rook = piece_moved[0] + "R"
+            if end - start == 2:
+                changes.append((rook, end + 1))
+                changes.append((rook, end - 1))
+            else:
+                changes.append((rook, end - 2))
+                changes.append((rook, end + 1))
+
+        self.toggle_pieces(changes)
+        self.bitboard_log.append(changes)
+
+    def undo_move(self) -> None:
+        """
+        Undoes the last move made in the game, including its bitboard changes.
+
+        Returns:
+            None
+        """
+        if len(self.move_records) == 0:
+            return
+
+        self.toggle_pieces(self.bitboard_log.pop())
+        super().undo_move()
+
+    def has_non_pawn_material(self) -> bool:
+        """
+        Check if the side to move has a piece other than its king and pawns.
+        """
+        ally_color = "w" if self.white_to_move else "b"
+        pieces = self.pieces
+        return bool(pieces[ally_color + "N"] | pieces[ally_color + "B"] |
+                    pieces[ally_color + "R"] | pieces[ally_color + "Q"])
+
+    def is_square_attacked(self, square: int, enemy_color: str, occupied: int) -> bool:
+        """
+        Check if any piece of enemy_color attacks the square.
+
+        Args:
+            square (int): The square to test.
+            enemy_color (str): "w" or "b".
+            occupied (int): The occupancy to use for sliding pieces.
+
+        Returns:
+            bool: True if the square is attacked.
+        """
+        pieces = self.pieces
+        ally_color = "b" if enemy_color == "w" else "w"
+        if KNIGHT_ATTACKS[square] & pieces[enemy_color + "N"]:
+            return True
+        # an enemy pawn attacks us from where our own pawn would capture
+        if PAWN_ATTACKS[ally_color][square] & pieces[enemy_color + "p"]:
+            return True
+        if KING_ATTACKS[square] & pieces[enemy_color + "K"]:
+            return True
+        queens = pieces[enemy_color + "Q"]
+        if slider_attacks(square, occupied, DIAGONAL) & (pieces[enemy_color + "B"] | queens):
+            return True
+        if slider_attacks(square, occupied, ORTHOGONAL) & (pieces[enemy_color + "R"] | queens):
+            return True
+        return False
+
+    def square_under_attack(self, row: int, col: int) -> bool:
+        """
+        Determine if enemy can attack the square row col
+        """
+        enemy_color = "b" if self.white_to_move else "w"
+        return self.is_square_attacked(row * 8 + col, enemy_color, self.colors["w"] | self.colors["b"])
+
+    def get_valid_move_codes(self) -> list[int]:
+        """
+        Returns the codes of all valid moves for the current state of the game.
+
+        Moves are generated fully legal: checks and pins are found once from the king
+        outwards, so no move has to be made and taken back to test it.
+
+        Returns:
+            list[int]: A list of all valid move codes.
+        """
+        ally_color, enemy_color, king_square, checkers_count, targets, pins, occupied = \
+            self.get_move_generation_info()
+        moves: list[int] = []
+
+        # one pass over every piece, the search uses the noisy and quiet halves instead
+        self.get_king_bitboard_moves(
+            enemy_color, king_square, ~self.colors[ally_color], occupied, moves)
+        # double check, king has to move
+        if checkers_count < 2:
+            self.get_piece_moves(ally_color, targets, pins, occupied, moves)
+            for noisy in (True, False):
+                self.get_pawn_bitboard_moves(
+                    ally_color, enemy_color, targets, pins, occupied, moves, noisy)
+            if checkers_count == 0:
+                self.get_castle_bitboard_moves(
+                    ally_color, enemy_color, king_square, occupied, moves)
+
+        if len(moves) == 0:
+            if self.in_check:
+                self.check_mate = True
+            else:
+                self.stale_mate = True
+        else:
+            self.check_mate = False
+
+            # same rule as the 8x8 backend: a lone enemy king (and one piece) is a draw
+            if self.colors["b" if self.white_to_move else "w"].bit_count() <= 2:
+                self.stale_mate = True
+
+        return moves
+
+    def get_move_generation_info(self) -> tuple:
+        """
+        Find the checks and pins of the side to move, and set self.in_check.
+
+        Returns:
+            tuple: What get_noisy_move_codes and get_quiet_move_codes need to generate legal moves.
+        """
+        ally_color, enemy_color = ("w", "b") if self.white_to_move else ("b", "w")
+        pieces = self.pieces
+        own = self.colors[ally_color]
+        occupied = own | self.colors[enemy_color]
+        king_square = pieces[ally_color + "K"].bit_length() - 1
+
+        # find checks and pins by walking the rays outwards from the king
+        enemy_queens = pieces[enemy_color + "Q"]
+        orthogonal_sliders = pieces[enemy_color + "R"] | enemy_queens
+        diagonal_sliders = pieces[enemy_color + "B"] | enemy_queens
+        checkers = KNIGHT_ATTACKS[king_square] & pieces[enemy_color + "N"]
+        checkers |= PAWN_ATTACKS[ally_color][king_square] & pieces[enemy_color + "p"]
+        check_mask = checkers
+        pins: dict[int, int] = {}
+        for direction in range(8):
+            sliders = orthogonal_sliders if direction < 4 else diagonal_sliders
+            if not RAYS[direction][king_square] & sliders:
+                continue
+
+            blocker = first_blocker(direction, king_square, occupied)
+            blocker_bit = 1 << blocker
+            if blocker_bit & sliders:
+                checkers |= blocker_bit
+                # the squares between the king and the checker, checker included
+                check_mask = BETWEEN[king_square][blocker] | blocker_bit
+            elif blocker_bit & own:
+                pinner = first_blocker(direction, blocker, occupied)
+                if pinner >= 0 and (1 << pinner) & sliders:
+                    # the king and the pinner block the line, so it is all the pinned piece needs
+                    pins[blocker] = LINE[king_square][blocker]
+
+        checkers_count = checkers.bit_count()
+        self.in_check = checkers_count > 0
+        targets = ~own & (check_mask if self.in_check else -1)
+        return ally_color, enemy_color, king_square, checkers_count, targets, pins, occupied
+
+    def get_noisy_move_codes(self, info: tuple) -> list[int]:
+        """
+        Generate the legal captures, en passant captures and promotions.
+
+        Args:
+            info (tuple): The result of get_move_generation_info for this position.
+
+        Returns:
+            list[int]: The move codes.
+        """
+        ally_color, enemy_color, king_square, checkers_count, targets, pins, occupied = info
+        enemy = self.colors[enemy_color]
+        moves: list[int] = []
+
+        self.get_king_bitboard_moves(enemy_color, king_square, enemy, occupied, moves)
+        # double check, king has to move
+        if checkers_count < 2:
+            self.get_piece_moves(ally_color, targets & enemy, pins, occupied, moves)
+            self.get_pawn_bitboard_moves(
+                ally_color, enemy_color, targets, pins, occupied, moves, noisy=True)
+        return moves
+
+    def get_quiet_move_codes(self, info: tuple) -> list[int]:
+        """
+        Generate the legal moves that neither capture nor promote, castling included.
+
+        Args:
+            info (tuple): The result of get_move_generation_info for this position.
+
+        Returns:
+            list[int]: The move codes.
+        """
+        ally_color, enemy_color, king_square, checkers_count, targets, pins, occupied = info
+        moves: list[int] = []
+
+        self.get_king_bitboard_moves(enemy_color, king_square, ~occupied, occupied, moves)
+        # double check, king has to move
+        if checkers_count < 2:
+            self.get_piece_moves(ally_color, targets & ~occupied, pins, occupied, moves)
+            self.get_pawn_bitboard_moves(
+                ally_color, enemy_color, targets, pins, occupied, moves, noisy=False)
+            if checkers_count == 0:
+                self.get_castle_bitboard_moves(
+                    ally_color, enemy_color, king_square, occupied, moves)
+        return moves
+
+    def is_legal_code(self, code: int, info: tuple) -> bool:
+        """
+        Check if a move code, e.g. a hash move, is legal in the current position without
+        generating the other moves.
+
+        Args:
+            code (int): The move code.
+            info (tuple): The result of get_move_generation_info for this position.
+
+        Returns:
+            bool: True if the move is legal.
+        """
+        ally_color, enemy_color, king_square, checkers_count, targets, pins, occupied = info
+        start, end, flag = code & 63, code >> 6 & 63, code >> 12 & 3
+        own = self.colors[ally_color]
+        if not (1 << start) & own or (1 << end) & own:
+            return False
+
+        piece = self.board[start >> 3][start & 7][1]
+        moves: list[int] = []
+        if piece == "K":
+            if flag == Move.CASTLE:
+                if checkers_count == 0:
+                    self.get_castle_bitboard_moves(ally_color, enemy_color, king_square, occupied, moves)
+                return code in moves
+            without_king = occupied ^ (1 << king_square)
+            return (code >> 12 == Move.NORMAL and bool(KING_ATTACKS[start] & (1 << end))
+                    and not self.is_square_attacked(end, enemy_color, without_king))
+        # double check, king has to move
+        if checkers_count > 1:
+            return False
+        if piece == "p":
+            # the pawn rules are many, the pawn moves of the same stage are few
+            self.get_pawn_bitboard_moves(
+                ally_color, enemy_color, targets, pins, occupied, moves, noisy=self.is_noisy_code(code))
+            return code in moves
+
+        if code >> 12 != Move.NORMAL:
+            return False
+        if piece == "N":
+            attacks = 0 if start in pins else KNIGHT_ATTACKS[start]
+        else:
+            directions = {"B": DIAGONAL, "R": ORTHOGONAL, "Q": DIAGONAL + ORTHOGONAL}[piece]
+            attacks = slider_attacks(start, occupied, directions) & pins.get(start, -1)
+        return bool(attacks & targets & (1 << end))
+
+    def get_king_bitboard_moves(self, enemy_color: str, king_square: int, targets: int, occupied: int, moves: list[int]) -> None:
+        """
+        Generate the king steps onto targets that no enemy piece attacks.
+        """
+        # the king may not step onto an attacked square, it cannot hide behind itself either
+        without_king = occupied ^ (1 << king_square)
+        for end in iterate_squares(KING_ATTACKS[king_square] & targets):
+            if not self.is_square_attacked(end, enemy_color, without_king):
+                moves.append(Move.encode(king_square, end))
+
+    def get_piece_moves(self, ally_color: str, targets: int, pins: dict[int, int], occupied: int, moves: list[int]) -> None:
+        """
+        Generate knight, bishop, rook and queen moves.
+
+        Args:
+            ally_color (str): The color to move.
+            targets (int): Squares the pieces may land on (not own pieces, and blocking a check if any).
+            pins (dict[int, int]): Pinned squares mapped to the line they may move along.
+            occupied (int): Bitboard of all occupied squares.
+            moves (list[int]): The list of move codes to be updated.
+        """
+        pieces = self.pieces
+
+        # quiet moves and captures are plain start | end << 6 codes, see Move.encode
+        # a pinned knight can never move
+        for start in iterate_squares(pieces[ally_color + "N"]):
+            if start not in pins:
+                for end in iterate_squares(KNIGHT_ATTACKS[start] & targets):
+                    moves.append(start | end << 6)
+
+        queens = pieces[ally_color + "Q"]
+        for slider_bitboard, directions in (
+            (pieces[ally_color + "B"] | queens, DIAGONAL),
+            (pieces[ally_color + "R"] | queens, ORTHOGONAL),
+        ):
+            for start in iterate_squares(slider_bitboard):
+                attacks = slider_attacks(start, occupied, directions) & targets
+                if start in pins:
+                    attacks &= pins[start]
+                for end in iterate_squares(attacks):
+                    moves.append(start | end << 6)
+
+    def get_pawn_bitboard_moves(self, ally_color: str, enemy_color: str, targets: int, pins: dict[int, int], occupied: int, moves: list[int], noisy: bool) -> None:
+        """
+        Generate pawn captures, promotions and en passant captures, or the other pawn pushes.
+
+        Args:
+            ally_color (str): The color to move.
+            enemy_color (str): The color of the opponent.
+            targets (int): Squares the pawns may land on.
+            pins (dict[int, int]): Pinned squares mapped to the line they may move along.
+            occupied (int): Bitboard of all occupied squares.
+            moves (list[int]): The list of move codes to be updated.
+            noisy (bool): True for captures and promotions, False for the other pushes.
+        """
+        enemy = self.colors[enemy_color]
+        if ally_color == "w":
+            step, start_row, back_row = -8, 6, 0
+        else:
+            step, start_row, back_row = 8, 1, 7
+
+        for start in iterate_squares(self.pieces[ally_color + "p"]):
+            allowed = targets & pins.get(start, -1)
+
+            one_step = start + step
+            promotes = one_step >> 3 == back_row
+            if noisy:
+                if promotes and not (1 << one_step) & occupied and (1 << one_step) & allowed:
+                    self.add_pawn_move(start, one_step, True, moves)
+                for end in iterate_squares(PAWN_ATTACKS[ally_color][start] & enemy & allowed):
+                    self.add_pawn_move(start, end, promotes, moves)
+
+            elif not promotes and not (1 << one_step) & occupied:
+                if (1 << one_step) & allowed:
+                    moves.append(start | one_step << 6)
+                two_step = one_step + step
+                if start >> 3 == start_row and not (1 << two_step) & occupied and (1 << two_step) & allowed:
+                    moves.append(start | two_step << 6)
+
+        if noisy and self.en_passant_possible:
+            self.get_en_passant_bitboard_moves(
+                ally_color, enemy_color, step, occupied, moves)
+
+    def get_en_passant_bitboard_moves(self, ally_color: str, enemy_color: str, step: int, occupied: int, moves: list[int]) -> None:
+        """
+        Generate en passant captures. Two pawns leave the same rank at once, so instead of
+        pin rules the capture is played on the bitboards and the king is tested directly.
+        """
+        ep_row, ep_col = self.en_passant_possible
+        ep_square = ep_row * 8 + ep_col
+        captured_square = ep_square - step
+        enemy_pawn = enemy_color + "p"
+        king_square = self.pieces[ally_color + "K"].bit_length() - 1
+
+        # our pawns that attack the en passant square are the ones an enemy pawn there would attack
+        for start in iterate_squares(PAWN_ATTACKS[enemy_color][ep_square] & self.pieces[ally_color + "p"]):
+            after = occupied ^ (1 << start) ^ (1 << captured_square) | (1 << ep_square)
+            self.pieces[enemy_pawn] ^= 1 << captured_square
+            exposed = self.is_square_attacked(king_square, enemy_color, after)
+            self.pieces[enemy_pawn] ^= 1 << captured_square
+            if not exposed:
+                moves.append(Move.encode(start, ep_square, Move.EN_PASSANT))
+
+    def get_castle_bitboard_moves(self, ally_color: str, enemy_color: str, king_square: int, occupied: int, moves: list[int]) -> None:
+        """
+        Generate castle moves, the king is known not to be in check.
+        """
+        if ally_color == "w":
+            king_side = self.current_castle_rights.white_king_side
+            queen_side = self.current_castle_rights.white_queen_side
+        else:
+            king_side = self.current_castle_rights.black_king_side
+            queen_side = self.current_castle_rights.black_queen_side
+
+        if king_side and not (0b11 << (king_square + 1)) & occupied:
+            if not (self.is_square_attacked(king_square + 1, enemy_color, occupied)
+                    or self.is_square_attacked(king_square + 2, enemy_color, occupied)):
+                moves.append(Move.encode(king_square, king_square + 2, Move.CASTLE))
+
+        if queen_side and not (0b111 << (king_square - 3)) & occupied:
+            if not (self.is_square_attacked(king_square - 1, enemy_color, occupied)
+                    or self.is_square_attacked(king_square - 2, enemy_color, occupied)):
+                moves.append(Move.encode(king_square, king_square - 2, Move.CASTLE))
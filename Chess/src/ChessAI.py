@@ -1,155 +1,125 @@
 # import random
+import concurrent.futures
+import json
 import multiprocessing
+import os
 import random
+import time
 import src.Move as Move
 import src.ChessEngine as ChessEngine
+import src.TranspositionTable as TranspositionTable
+import src.MovePicker as MovePicker
+import src.Evaluation as Evaluation
+import src.SearchResult as SearchResult
+import src.OpeningBook as OpeningBook
+import src.Tablebase as Tablebase
 # from functools import lru_cache, cache
 
 
 class ChessAI:
-    def __init__(self) -> None:
-        self.CHECKMATE: int = 1000
+    def __init__(self, time_limit: float = 2.0, node_limit: int = None, workers: int = None, stats_log: str = None,
+                 book: str = None, tablebases: str = None) -> None:
+        """
+        Args:
+            time_limit (float): Seconds find_best_move may think, None for no limit.
+            node_limit (int): Nodes find_best_move may search, None for no limit.
+            workers (int): Processes find_best_move_parallel searches with, None for one per CPU core.
+            stats_log (str): File a JSON line is appended to after every search, None for none.
+            book (str): Opening book file, see OpeningBook, None or a missing file for no book.
+            tablebases (str): Folder of endgame tables, see Tablebase, None or a missing folder for none.
+        """
+        # above any material score, which is in centipawns. Being mated scores -CHECKMATE plus
+        # the plies from the root, so a faster mate scores higher; scores beyond MATE_BOUND are mates
+        self.CHECKMATE: int = 100000
+        self.MATE_BOUND: int = self.CHECKMATE - 1000
         self.STALEMATE: int = 0
+        # fixed depth of the min max and nega max searches
         self.DEPTH: int = 3
-        self.piece_score: dict[str, int] = {
-            "K": 0,
-            "Q": 9,
-            "R": 5,
-            "B": 3,
-            "N": 3,
-            "p": 1,
-
-        }
-        self.knight_scores: list[list[int]] = [
-            [1, 1, 1, 1, 1, 1, 1, 1],
-            [1, 2, 2, 2, 2, 2, 2, 1],
-            [1, 2, 3, 3, 3, 3, 2, 1],
-            [1, 2, 3, 4, 4, 3, 2, 1],
-            [1, 2, 3, 4, 4, 3, 2, 1],
-            [1, 2, 3, 3, 3, 3, 2, 1],
-            [1, 2, 2, 2, 2, 2, 2, 1],
-            [1, 1, 1, 1, 1, 1, 1, 1],
-        ]
-
-        self.bishop_scores: list[list[int]] = [
-            [4, 3, 2, 1, 1, 2, 3, 4],
-            [3, 4, 3, 2, 2, 3, 4, 3],
-            [2, 4, 4, 3, 3, 4, 4, 2],
-            [1, 2, 4, 4, 4, 4, 2, 1],
-            [1, 2, 3, 4, 4, 3, 2, 1],
-            [2, 3, 4, 3, 3, 3, 3, 2],
-            [3, 4, 4, 4, 4, 4, 4, 3],
-            [4, 3, 3, 4, 4, 3, 3, 4],
-        ]
-
-        self.queen_scores: list[list[int]] = [
-            [1, 1, 1, 3, 1, 1, 1, 1],
-            [1, 2, 3, 3, 3, 1, 1, 1],
-            [1, 4, 3, 3, 3, 3, 2, 1],
-            [1, 2, 3, 3, 4, 3, 2, 1],
-            [1, 2, 3, 3, 3, 3, 2, 1],
-            [1, 4, 3, 3, 3, 3, 2, 1],
-            [1, 1, 2, 3, 3, 1, 1, 1],
-            [1, 1, 1, 3, 1, 1, 1, 1],
-        ]
-
-        self.rook_scores: list[list[int]] = [
-            [4, 3, 4, 4, 4, 4, 3, 4],
-            [4, 4, 4, 4, 4, 4, 4, 4],
-            [1, 1, 2, 3, 3, 2, 1, 1],
-            [1, 2, 3, 4, 4, 3, 2, 1],
-            [1, 2, 3, 4, 4, 3, 2, 1],
-            [1, 1, 2, 2, 2, 2, 1, 1],
-            [4, 4, 4, 4, 4, 4, 4, 4],
-            [4, 3, 4, 4, 4, 4, 3, 4],
-        ]
-
-        self.white_pawn_scores: list[list[int]] = [
-            [8, 8, 8, 8, 8, 8, 8, 8],
-            [8, 8, 8, 8, 8, 8, 8, 8],
-            [5, 6, 6, 7, 7, 6, 6, 5],
-            [2, 3, 3, 5, 5, 3, 3, 2],
-            [1, 2, 3, 4, 4, 3, 2, 1],
-            [1, 1, 2, 3, 3, 2, 1, 1],
-            [1, 1, 1, 0, 0, 1, 1, 1],
-            [0, 0, 0, 0, 0, 0, 0, 0],
-        ]
-
-        self.black_pawn_scores: list[list[int]] = [
-            [0, 0, 0, 0, 0, 0, 0, 0],
-            [1, 1, 1, 0, 0, 1, 1, 1],
-            [1, 1, 2, 3, 3, 2, 1, 1],
-            [1, 2, 3, 4, 4, 3, 2, 1],
-            [2, 3, 3, 5, 5, 3, 3, 2],
-            [5, 6, 6, 7, 7, 6, 6, 5],
-            [8, 8, 8, 8, 8, 8, 8, 8],
-            [8, 8, 8, 8, 8, 8, 8, 8],
-        ]
-
-        # self.knight_scores: list[list[int]] = [
-        #     [0.0, 0.1, 0.2, 0.2, 0.2, 0.2, 0.1, 0.0],
-        #     [0.1, 0.3, 0.5, 0.5, 0.5, 0.5, 0.3, 0.1],
-        #     [0.2, 0.5, 0.6, 0.65, 0.65, 0.6, 0.5, 0.2],
-        #     [0.2, 0.55, 0.65, 0.7, 0.7, 0.65, 0.55, 0.2],
-        #     [0.2, 0.5, 0.65, 0.7, 0.7, 0.65, 0.5, 0.2],
-        #     [0.2, 0.55, 0.6, 0.65, 0.65, 0.6, 0.55, 0.2],
-        #     [0.1, 0.3, 0.5, 0.55, 0.55, 0.5, 0.3, 0.1],
-        #     [0.0, 0.1, 0.2, 0.2, 0.2, 0.2, 0.1, 0.0]
-        # ]
-
-        # self.bishop_scores: list[list[int]] = [
-        #     [0.0, 0.2, 0.2, 0.2, 0.2, 0.2, 0.2, 0.0],
-        #     [0.2, 0.4, 0.4, 0.4, 0.4, 0.4, 0.4, 0.2],
-        #     [0.2, 0.4, 0.5, 0.6, 0.6, 0.5, 0.4, 0.2],
-        #     [0.2, 0.5, 0.5, 0.6, 0.6, 0.5, 0.5, 0.2],
-        #     [0.2, 0.4, 0.6, 0.6, 0.6, 0.6, 0.4, 0.2],
-        #     [0.2, 0.6, 0.6, 0.6, 0.6, 0.6, 0.6, 0.2],
-        #     [0.2, 0.5, 0.4, 0.4, 0.4, 0.4, 0.5, 0.2],
-        #     [0.0, 0.2, 0.2, 0.2, 0.2, 0.2, 0.2, 0.0]
-        # ]
-
-        # self.rook_scores: list[list[int]] = [
-        #     [0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25],
-        #     [0.5, 0.75, 0.75, 0.75, 0.75, 0.75, 0.75, 0.5],
-        #     [0.0, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.0],
-        #     [0.0, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.0],
-        #     [0.0, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.0],
-        #     [0.0, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.0],
-        #     [0.0, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.0],
-        #     [0.25, 0.25, 0.25, 0.5, 0.5, 0.25, 0.25, 0.25]
-        # ]
-
-        # self.queen_scores: list[list[int]] = [
-        #     [0.0, 0.2, 0.2, 0.3, 0.3, 0.2, 0.2, 0.0],
-        #     [0.2, 0.4, 0.4, 0.4, 0.4, 0.4, 0.4, 0.2],
-        #     [0.2, 0.4, 0.5, 0.5, 0.5, 0.5, 0.4, 0.2],
-        #     [0.3, 0.4, 0.5, 0.5, 0.5, 0.5, 0.4, 0.3],
-        #     [0.4, 0.4, 0.5, 0.5, 0.5, 0.5, 0.4, 0.3],
-        #     [0.2, 0.5, 0.5, 0.5, 0.5, 0.5, 0.4, 0.2],
-        #     [0.2, 0.4, 0.5, 0.4, 0.4, 0.4, 0.4, 0.2],
-        #     [0.0, 0.2, 0.2, 0.3, 0.3, 0.2, 0.2, 0.0]
-        # ]
-
-        # self.pawn_scores: list[list[int]] = [
-        #     [0.8, 0.8, 0.8, 0.8, 0.8, 0.8, 0.8, 0.8],
-        #     [0.7, 0.7, 0.7, 0.7, 0.7, 0.7, 0.7, 0.7],
-        #     [0.3, 0.3, 0.4, 0.5, 0.5, 0.4, 0.3, 0.3],
-        #     [0.25, 0.25, 0.3, 0.45, 0.45, 0.3, 0.25, 0.25],
-        #     [0.2, 0.2, 0.2, 0.4, 0.4, 0.2, 0.2, 0.2],
-        #     [0.25, 0.15, 0.1, 0.2, 0.2, 0.1, 0.15, 0.25],
-        #     [0.25, 0.3, 0.3, 0.0, 0.0, 0.3, 0.3, 0.25],
-        #     [0.2, 0.2, 0.2, 0.2, 0.2, 0.2, 0.2, 0.2]
-        # ]
-
-        self.piece_position_scores: dict[str, callable] = {
-            "N": self.knight_scores,
-            "B": self.bishop_scores,
-            "R": self.rook_scores,
-            "Q": self.queen_scores,
-            # "p": self.pawn_scores,
-            "wp": self.white_pawn_scores,
-            "bp": self.black_pawn_scores,
-        }
+        # find_best_move deepens one ply at a time up to MAX_DEPTH, until the time or nodes run out
+        self.MAX_DEPTH: int = 64
+        self.TIME_LIMIT: float = time_limit
+        self.NODE_LIMIT: int = node_limit
+        # quiescence search: most nodes one leaf may visit, and the margin of delta pruning
+        self.QUIESCENCE_NODE_LIMIT: int = 2000
+        self.DELTA_MARGIN: int = 200
+        self.quiescence_nodes: int = 0
+        # nodes of the current search, when it started, and whether its budget ran out
+        self.nodes: int = 0
+        self.start_time: float = 0.0
+        self.deadline: float = None
+        self.search_stopped: bool = False
+        self.root_depth: int = 0
+        # the best root move of the current iteration
+        self.next_move: int = None
+        # parallel search: number of processes
+        self.WORKERS: int = workers or os.cpu_count() or 1
+        # set by another process to stop the search, it then plays the best move found so far.
+        # It is checked with the time budget, every 1024 nodes or every STOP_POLL_INTERVAL seconds
+        self.stop_event: multiprocessing.Event = None
+        self.STOP_POLL_INTERVAL: float = 0.05
+        # the best root move of the unfinished iteration, if one beat alpha with a complete search
+        self.partial_best_move: int = None
+        # set while multi_pv_search searches the root without its best moves, the score of the
+        # root is then not the position's and isn't stored
+        self.root_moves_excluded: bool = False
+        # pondering: searching the expected reply on the opponent's time, without a time limit
+        # until ponder_hit_event tells the opponent played it
+        self.pondering: bool = False
+        self.ponder_hit_event: multiprocessing.Event = None
+        # move ordering: two killer moves per ply, and a history score per side and start/end pair
+        self.root_ply: int = 0
+        # pieces on the board and moves played at the root, to tell when the tablebases may have a position
+        self.root_pieces: int = 0
+        self.root_moves: int = 0
+        self.killer_moves: list[list[int]] = []
+        self.history: dict[bool, list[int]] = {}
+        # aspiration windows: half width in centipawns around the previous iteration's score
+        self.ASPIRATION_WINDOW: int = 50
+        # re-searches of the current find_best_move: aspiration windows that failed high or
+        # low, and null window searches that had to be repeated with the full window
+        self.aspiration_fail_highs: int = 0
+        self.aspiration_fail_lows: int = 0
+        self.pvs_researches: int = 0
+        # selective search: the depth reduction of a null move, and how many moves of a node
+        # are searched to full depth before late quiet moves are reduced by a ply
+        self.NULL_MOVE_REDUCTION: int = 2
+        self.LMR_FULL_DEPTH_MOVES: int = 3
+        # set while the search answers a null move, there is no second null move in a row
+        self.null_move_made: bool = False
+        self.null_move_cutoffs: int = 0
+        self.lmr_researches: int = 0
+        # instrumentation of the current search, see get_statistics: quiescence nodes of all
+        # leaves, beta cutoffs and how many of them came from the first move searched, the
+        # table hits and misses when it started, and a record of every completed iteration
+        self.total_quiescence_nodes: int = 0
+        self.beta_cutoffs: int = 0
+        self.first_move_cutoffs: int = 0
+        self.table_hits_start: int = 0
+        self.table_misses_start: int = 0
+        self.iterations: list[dict] = []
+        # root_split_search adds up the counters of its workers
+        self.worker_counters: dict[str, int] = {}
+        # the pool of root_split_search, with its stop event, shared alpha and backend. It is started
+        # by the first search and kept until close, so the workers' tables stay warm between moves
+        self.root_split_pool: concurrent.futures.ProcessPoolExecutor = None
+        self.root_split_stop_event: multiprocessing.Event = None
+        self.root_split_alpha: multiprocessing.Value = None
+        self.root_split_pool_backend: str = None
+        self.STATS_LOG: str = stats_log
+        self.transposition_table = TranspositionTable.TranspositionTable()
+        # book moves are played without a search
+        self.opening_book: OpeningBook.OpeningBook = None
+        if book is not None and os.path.exists(book):
+            self.opening_book = OpeningBook.OpeningBook(book)
+        # positions with few pieces are looked up instead of searched
+        self.tablebases: Tablebase.Tablebase = None
+        if tablebases is not None and os.path.isdir(tablebases):
+            self.tablebases = Tablebase.Tablebase(tablebases)
+            if not self.tablebases.tables:
+                self.tablebases = None
+        # material and piece-square tables, see Evaluation
+        self.piece_score: dict[str, int] = Evaluation.PIECE_SCORE
+        self.piece_position_scores: dict[str, list[list[int]]] = Evaluation.PIECE_POSITION_SCORES
 
     def find_random_move(self, valid_moves: list[Move.Move]) -> Move.Move:
         """
@@ -169,24 +139,862 @@ class ChessAI:
 
         Args:
             game_state: The current game state.
-            valid_moves: A list of valid moves.
+            valid_moves: A list of valid moves, the search generates its own move codes.
 
         Returns:
             None.
         """
-        # Set next_move as a global variable
-        global next_move
+        return_queue.put(self.search(game_state).get_move(game_state.board))
 
-        # Shuffle the list of valid moves because to make sure the computer doesn't always pick the same move
-        random.shuffle(valid_moves)
+    def find_best_move_parallel(self, game_state: ChessEngine.GameState, valid_moves: list[Move.Move], return_queue: multiprocessing.Queue) -> Move.Move:
+        """
+        Finds the best move with WORKERS processes searching the same position, see lazy_smp_search.
 
-        # Find the best move using the negamax algorithm
-        self.find_move_nega_max_alpha_beta(
-            game_state, valid_moves,
-            self.DEPTH, -self.CHECKMATE, self.CHECKMATE, 1 if game_state.white_to_move else -1
-        )
+        Args:
+            game_state: The current game state.
+            valid_moves: A list of valid moves, the search generates its own move codes.
+
+        Returns:
+            None.
+        """
+        return_queue.put(self.lazy_smp_search(game_state).get_move(game_state.board))
+
+    def find_best_move_root_split(self, game_state: ChessEngine.GameState, valid_moves: list[Move.Move], return_queue: multiprocessing.Queue) -> Move.Move:
+        """
+        Finds the best move with the root moves split over WORKERS processes, see root_split_search.
+
+        Args:
+            game_state: The current game state.
+            valid_moves: A list of valid moves, the search generates its own move codes.
+
+        Returns:
+            None.
+        """
+        return_queue.put(self.root_split_search(game_state).get_move(game_state.board))
+
+    def search(self, game_state: ChessEngine.GameState) -> SearchResult.SearchResult:
+        """
+        Search the position in this process, until MAX_DEPTH or the time or nodes run out.
+
+        Everything a search changes is kept on the ChessAI, not in globals: two ChessAI
+        objects can search at the same time in threads, each owns a search of its own.
+
+        Args:
+            game_state (ChessEngine.GameState): The position to search, it is left unchanged.
+
+        Returns:
+            SearchResult.SearchResult: The best move, its score, depth and principal variation.
+        """
+        result = self.find_known_move(game_state)
+        if result is None:
+            result = self.iterative_deepening(game_state)
+        self.log_search(game_state, result)
+        return result
+
+    def multi_pv_search(self, game_state: ChessEngine.GameState, count: int) -> list[SearchResult.SearchResult]:
+        """
+        Search the position for its count best moves, each with its score and principal variation.
+
+        Every iteration of the iterative deepening searches the root once per line: the first
+        search finds the best move, the next one searches the root again without it and finds
+        the second best, and so on. The searches of an iteration share the transposition table,
+        the killers and the history, so the later ones mostly cut through what the first ones
+        have searched. The moves of the previous iteration's lines are searched first.
+
+        Args:
+            game_state (ChessEngine.GameState): The position to search, it is left unchanged.
+            count (int): The number of lines, fewer if there are fewer legal moves.
+
+        Returns:
+            list[SearchResult.SearchResult]: The lines of the last completed iteration, best first.
+                They all have the nodes, time and statistics of the whole search.
+        """
+        self.start_search(game_state)
+        move_codes = game_state.get_valid_move_codes()
+        results = []
+        try:
+            for depth in range(1, self.MAX_DEPTH + 1):
+                self.root_depth = depth
+                ordered_moves = MovePicker.order_moves(
+                    game_state, move_codes, None, self.killer_moves[0], self.history[game_state.white_to_move])
+                previous_moves = [result.best_move for result in results]
+                ordered_moves = previous_moves + [move for move in ordered_moves if move not in previous_moves]
+
+                lines = []
+                found_moves = set()
+                for line in range(min(count, len(move_codes))):
+                    self.root_moves_excluded = line > 0
+                    previous_score = results[line].score if line < len(results) else (lines[-1].score if lines else 0)
+                    score = self.search_aspiration_window(
+                        game_state, [move for move in ordered_moves if move not in found_moves], depth, previous_score)
+                    if self.search_stopped:
+                        break
+                    found_moves.add(self.next_move)
+                    lines.append(SearchResult.SearchResult(
+                        self.next_move, score, depth, self.get_principal_variation(game_state, self.next_move)))
+                if self.search_stopped:
+                    # only a completed iteration changes the lines
+                    break
+                # a later search can find a better score than an earlier one, its window was different
+                lines.sort(key=lambda result: result.score, reverse=True)
+                results = lines
+                self.record_iteration(depth, results[0].score, results[0].best_move)
+        finally:
+            self.root_moves_excluded = False
+
+        statistics = self.get_statistics()
+        for result in results:
+            result.nodes = self.nodes
+            result.elapsed = time.perf_counter() - self.start_time
+            result.statistics = statistics
+        if results:
+            self.log_search(game_state, results[0])
+        return results
+
+    def lazy_smp_search(self, game_state: ChessEngine.GameState) -> SearchResult.SearchResult:
+        """
+        Search the position with WORKERS processes (Lazy SMP).
+
+        The helper processes run their own iterative deepening, starting at different depths
+        and with differently ordered root moves, and share a SharedTranspositionTable with
+        this process. What one process has searched cuts the trees of the others, so this
+        process gets deeper in the same time. Once its time or nodes run out the helpers are
+        stopped, and the result of the deepest completed iteration of all processes is used.
+
+        Args:
+            game_state (ChessEngine.GameState): The position to search, it is left unchanged.
+
+        Returns:
+            SearchResult.SearchResult: The deepest result, with the nodes of this process.
+        """
+        if self.WORKERS <= 1:
+            return self.search(game_state)
+        result = self.find_known_move(game_state)
+        if result is not None:
+            self.log_search(game_state, result)
+            return result
+
+        # the table is made shared once and kept, so it stays warm from one move to the next
+        table = self.transposition_table
+        if not isinstance(table, TranspositionTable.SharedTranspositionTable):
+            table = TranspositionTable.SharedTranspositionTable(table.buckets)
+            self.transposition_table = table
+        stop_event = multiprocessing.Event()
+        result_queue = multiprocessing.Queue()
+        fen = game_state.get_fen()
+        helpers = [
+            multiprocessing.Process(
+                target=search_lazy_smp_helper,
+                args=(fen, game_state.backend, table, stop_event, result_queue, helper_index),
+                daemon=True,
+            )
+            for helper_index in range(1, self.WORKERS)
+        ]
+        for helper in helpers:
+            helper.start()
+
+        try:
+            result = self.iterative_deepening(game_state)
+        finally:
+            stop_event.set()
+
+        # every helper sends its completed iterations and then None, ties go to this process
+        finished_helpers = 0
+        while finished_helpers < len(helpers):
+            helper_result = result_queue.get()
+            if helper_result is None:
+                finished_helpers += 1
+            elif helper_result.depth > result.depth:
+                helper_result.nodes, helper_result.elapsed = result.nodes, result.elapsed
+                helper_result.statistics = result.statistics
+                result = helper_result
+        for helper in helpers:
+            helper.join()
+        self.log_search(game_state, result)
+        return result
+
+    def root_split_search(self, game_state: ChessEngine.GameState) -> SearchResult.SearchResult:
+        """
+        Search the position with the root moves split over a pool of WORKERS processes.
+
+        Every iteration of the iterative deepening searches the best move of the previous
+        iteration first, its score is the alpha of the other root moves. Those are searched
+        in parallel with a null window, and every move that beats alpha raises it for the
+        moves that start after it. The workers only get the position as a FEN string, the
+        move code and the depth. The pool is kept until close, so every worker keeps its own
+        transposition table between moves.
+
+        Args:
+            game_state (ChessEngine.GameState): The position to search, it is left unchanged.
+
+        Returns:
+            SearchResult.SearchResult: The best move, its score and depth, the nodes of all
+                processes. The tables are in the workers, the variation is the one of the worker
+                that searched the best move.
+        """
+        result = self.find_known_move(game_state)
+        if result is not None:
+            self.log_search(game_state, result)
+            return result
+
+        self.start_search(game_state)
+        result = SearchResult.SearchResult()
+        move_codes = MovePicker.order_moves(game_state, game_state.get_valid_move_codes())
+        if len(move_codes) == 0:
+            self.log_search(game_state, result)
+            return result
+
+        # the counters of the workers, this process only waits for them
+        self.worker_counters = dict.fromkeys(self.get_counters(), 0)
+
+        fen = game_state.get_fen()
+        executor = self.get_root_split_pool(game_state.backend)
+        self.root_split_stop_event.clear()
+        for depth in range(1, self.MAX_DEPTH + 1):
+            self.root_depth = depth
+            variations = {}
+            scores, completed = self.search_root_split(
+                executor, fen, move_codes, depth, self.root_split_alpha, variations)
+            if not completed:
+                # an exact score of the unfinished iteration is deeper than the last one
+                exact_moves = [move for move in scores if scores[move][1]]
+                if exact_moves:
+                    result.best_move = max(exact_moves, key=lambda code: scores[code][0])
+                    result.score, result.depth = scores[result.best_move][0], depth
+                    result.principal_variation = [result.best_move] + variations[result.best_move]
+                break
+            # an exact score goes before an upper bound of the same value, the sort is stable
+            move_codes.sort(key=lambda code: scores[code], reverse=True)
+            result.best_move, result.score, result.depth = move_codes[0], scores[move_codes[0]][0], depth
+            result.principal_variation = [result.best_move] + variations[result.best_move]
+            self.record_iteration(depth, result.score, result.best_move)
+
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - self.start_time
+        result.statistics = self.get_statistics(self.worker_counters)
+        self.log_search(game_state, result)
+        return result
+
+    def search_root_split(self, executor: concurrent.futures.ProcessPoolExecutor, fen: str, move_codes: list[int], depth: int, shared_alpha: multiprocessing.Value, variations: dict[int, list[int]]) -> tuple[dict[int, tuple[int, bool]], bool]:
+        """
+        Search every root move to the depth with the executor of root_split_search.
 
-        return_queue.put(next_move)
+        Args:
+            executor (concurrent.futures.ProcessPoolExecutor): The pool, started by start_root_split_worker.
+            fen (str): The root position.
+            move_codes (list[int]): The root moves, the expected best move first.
+            depth (int): The depth of the iteration.
+            shared_alpha (multiprocessing.Value): The alpha the workers search the root moves with.
+            variations (dict[int, list[int]]): Updated with the expected line of play after every
+                searched move, from the worker's table.
+
+        Returns:
+            tuple[dict[int, tuple[int, bool]], bool]: The score of every searched move, and whether
+                it is exact or only an upper bound because the move didn't beat alpha. Then False
+                if the time or nodes ran out, or stop_event was set, before every move was searched.
+        """
+        scores = {}
+        shared_alpha.value = -self.CHECKMATE
+        # the first move alone, so the others start with its score as alpha
+        for batch in (move_codes[:1], move_codes[1:]):
+            pending = {executor.submit(search_root_move, fen, move, depth): move for move in batch}
+            while pending:
+                # the first iteration always completes, so there is a move to play
+                timeout = None
+                if depth > 1:
+                    if self.deadline is not None:
+                        timeout = max(self.deadline - time.perf_counter(), 0)
+                    if self.stop_event is not None or self.pondering:
+                        timeout = self.STOP_POLL_INTERVAL if timeout is None else min(timeout, self.STOP_POLL_INTERVAL)
+                done, _ = concurrent.futures.wait(
+                    pending, timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+                if depth > 1 and self.is_root_split_stopped():
+                    # the running searches stop at their next budget check, the pool is
+                    # idle again before the next search uses it
+                    self.root_split_stop_event.set()
+                    for future in pending:
+                        future.cancel()
+                    concurrent.futures.wait(pending)
+                    return scores, False
+
+                for future in done:
+                    move = pending.pop(future)
+                    score, exact, counters, variations[move] = future.result()
+                    self.nodes += counters["nodes"]
+                    for name, count in counters.items():
+                        self.worker_counters[name] += count
+                    scores[move] = (score, exact)
+                    with shared_alpha.get_lock():
+                        if exact and score > shared_alpha.value:
+                            shared_alpha.value = score
+        return scores, True
+
+    def get_root_split_pool(self, backend: str) -> concurrent.futures.ProcessPoolExecutor:
+        """
+        Get the pool of root_split_search, started with WORKERS processes the first time.
+
+        Args:
+            backend (str): The GameState backend of the workers, "mailbox" or "bitboard".
+
+        Returns:
+            concurrent.futures.ProcessPoolExecutor: The pool, its workers set up by start_root_split_worker.
+        """
+        if self.root_split_pool is not None and self.root_split_pool_backend != backend:
+            self.close()
+        if self.root_split_pool is None:
+            self.root_split_stop_event = multiprocessing.Event()
+            self.root_split_alpha = multiprocessing.Value("i", -self.CHECKMATE)
+            self.root_split_pool = concurrent.futures.ProcessPoolExecutor(
+                self.WORKERS, initializer=start_root_split_worker,
+                initargs=(backend, self.root_split_stop_event, self.root_split_alpha))
+            self.root_split_pool_backend = backend
+        return self.root_split_pool
+
+    def close(self) -> None:
+        """
+        End the worker processes of root_split_search, a later search starts a new pool.
+        """
+        if self.root_split_pool is not None:
+            self.root_split_stop_event.set()
+            self.root_split_pool.shutdown(wait=True, cancel_futures=True)
+            self.root_split_pool = None
+
+    def is_root_split_stopped(self) -> bool:
+        """
+        Tell if the time or node budget of root_split_search ran out, or stop_event was set.
+
+        Returns:
+            bool: True once the search has to stop.
+        """
+        if self.pondering and self.ponder_hit_event.is_set():
+            # the expected move was played, the search goes on with the time of a move
+            self.pondering = False
+            if self.TIME_LIMIT is not None:
+                self.deadline = time.perf_counter() + self.TIME_LIMIT
+
+        if self.NODE_LIMIT is not None and self.nodes >= self.NODE_LIMIT:
+            self.search_stopped = True
+        elif self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.search_stopped = True
+        elif self.stop_event is not None and self.stop_event.is_set():
+            self.search_stopped = True
+        return self.search_stopped
+
+    def find_mate(self, game_state: ChessEngine.GameState, max_moves: int) -> SearchResult.SearchResult:
+        """
+        Look for a forced mate of the side to move, in at most max_moves moves.
+
+        Only checks are searched for the side to move, and every reply for the other side,
+        so the tree is much smaller than a full search of the same depth. One more move is
+        tried at a time, so the mate found is the fastest, unless the time or nodes run out.
+
+        Args:
+            game_state (ChessEngine.GameState): The position, it is left unchanged.
+            max_moves (int): Most moves of the side to move until mate.
+
+        Returns:
+            SearchResult.SearchResult: The first move of the mate, its score, the plies to mate as depth
+                and the mating line, best defense included. best_move is None if no mate was found.
+        """
+        self.start_search(game_state)
+        result = SearchResult.SearchResult()
+        for moves in range(1, max_moves + 1):
+            depth = 2 * moves - 1
+            self.root_depth = depth
+            line = []
+            score = self.search_mate(game_state, depth, -self.CHECKMATE, self.CHECKMATE, line)
+            if self.search_stopped:
+                break
+            if score >= self.MATE_BOUND:
+                result.best_move, result.score, result.depth = line[0], score, depth
+                result.principal_variation = line
+                break
+
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - self.start_time
+        result.statistics = self.get_statistics()
+        return result
+
+    def search_mate(self, game_state: ChessEngine.GameState, depth: int, alpha: int, beta: int, line: list[int]) -> int:
+        """
+        Negamax search of the checks of the side to move at the root, and of every reply to them.
+
+        Args:
+            game_state (ChessEngine.GameState): The position to search.
+            depth (int): The remaining depth.
+            alpha (int): The score the side to move is already sure of.
+            beta (int): The score the opponent is already sure of.
+            line (list[int]): Filled with the best line from the position.
+
+        Returns:
+            int: A mate score from the side to move's point of view, 0 if there is no forced mate.
+        """
+        if self.is_out_of_budget():
+            return 0
+        ply = len(game_state.zobrist_history) - self.root_ply
+        moves = game_state.get_valid_move_codes()
+        if len(moves) == 0:
+            return -self.CHECKMATE + ply if game_state.in_check else self.STALEMATE
+        if depth == 0:
+            return 0
+        alpha = max(alpha, -self.CHECKMATE + ply)
+        beta = min(beta, self.CHECKMATE - ply - 1)
+        if alpha >= beta:
+            return alpha
+
+        # the side to mate plays on its even plies, checks only
+        attacking = ply % 2 == 0
+        # no check left to play, the attack fails
+        best_score = 0 if attacking else -self.CHECKMATE
+        for move in moves:
+            game_state.make_move_code(move)
+            if attacking and not game_state.square_under_attack(*game_state.get_king_location()):
+                game_state.undo_move()
+                continue
+            child_line = []
+            score = -self.search_mate(game_state, depth - 1, -beta, -alpha, child_line)
+            game_state.undo_move()
+            if self.search_stopped:
+                return 0
+
+            if score > best_score:
+                best_score = score
+                line[:] = [move] + child_line
+            if best_score > alpha:
+                alpha = best_score
+            if alpha >= beta:
+                break
+        return best_score
+
+    def find_known_move(self, game_state: ChessEngine.GameState) -> SearchResult.SearchResult:
+        """
+        Look the position up in the opening book and the tablebases, they answer it without a search.
+
+        Args:
+            game_state (ChessEngine.GameState): The position.
+
+        Returns:
+            SearchResult.SearchResult: The move to play, or None if the position has to be searched.
+        """
+        result = self.probe_opening_book(game_state)
+        if result is None:
+            result = self.probe_tablebases(game_state)
+        return result
+
+    def probe_tablebases(self, game_state: ChessEngine.GameState) -> SearchResult.SearchResult:
+        """
+        Play the root position from the tablebases: the fastest mate, the longest defense, or a move that keeps the draw.
+
+        Args:
+            game_state (ChessEngine.GameState): The position, it is left unchanged.
+
+        Returns:
+            SearchResult.SearchResult: The move, its exact score, and the line to mate as principal
+                variation. None if the tables don't have the position or every position after it.
+        """
+        if self.tablebases is None or self.tablebases.probe(game_state) is None:
+            return None
+        start_time = time.perf_counter()
+        principal_variation = []
+        result = None
+        while len(principal_variation) < self.MAX_DEPTH:
+            best_move = best_score = None
+            for move in game_state.get_valid_move_codes():
+                game_state.make_move_code(move)
+                entry = self.tablebases.probe(game_state)
+                game_state.undo_move()
+                if entry is None:
+                    best_move = None
+                    break
+                score = -self.get_tablebase_score(entry, 1)
+                if best_move is None or score > best_score:
+                    best_move, best_score = move, score
+            if best_move is None:
+                # mate, or a move out of the tables
+                break
+            if result is None:
+                result = SearchResult.SearchResult(best_move, best_score, statistics={"tablebase": True})
+            principal_variation.append(best_move)
+            game_state.make_move_code(best_move)
+            if best_score == self.STALEMATE:
+                # a draw has no line to show
+                break
+
+        for _ in principal_variation:
+            game_state.undo_move()
+        if result is not None:
+            result.principal_variation = principal_variation
+            result.elapsed = time.perf_counter() - start_time
+        return result
+
+    def get_tablebase_score(self, entry: tuple[int, int], ply: int) -> int:
+        """
+        Turn a tablebase result into a score, a mate found sooner scores higher.
+
+        Args:
+            entry (tuple[int, int]): The result of Tablebase.probe.
+            ply (int): The plies from the root to the position.
+
+        Returns:
+            int: The score from the side to move's point of view.
+        """
+        result, plies = entry
+        if result > 0:
+            return self.CHECKMATE - ply - plies
+        if result < 0:
+            return -self.CHECKMATE + ply + plies
+        return self.STALEMATE
+
+    def probe_tablebases_in_search(self, game_state: ChessEngine.GameState) -> int:
+        """
+        Look a position of the search up in the tablebases, once captures left few enough pieces.
+
+        Args:
+            game_state (ChessEngine.GameState): The position.
+
+        Returns:
+            int: The exact score from the side to move's point of view, None if the tables don't have it.
+        """
+        if self.root_pieces > self.tablebases.max_pieces:
+            captures = sum(1 for record in game_state.move_records[self.root_moves:] if record[2] != "--")
+            if self.root_pieces - captures > self.tablebases.max_pieces:
+                return None
+        entry = self.tablebases.probe(game_state)
+        if entry is None:
+            return None
+        return self.get_tablebase_score(entry, len(game_state.zobrist_history) - self.root_ply)
+
+    def probe_opening_book(self, game_state: ChessEngine.GameState) -> SearchResult.SearchResult:
+        """
+        Look for a move of the position in the opening book, instead of searching it.
+
+        Args:
+            game_state (ChessEngine.GameState): The position.
+
+        Returns:
+            SearchResult.SearchResult: The book move, with no score and depth, or None if
+                there is no book or it has no move for the position.
+        """
+        if self.opening_book is None:
+            return None
+        start_time = time.perf_counter()
+        book_move = self.opening_book.choose_move(game_state)
+        if book_move is None:
+            return None
+        return SearchResult.SearchResult(
+            book_move, principal_variation=[book_move], elapsed=time.perf_counter() - start_time,
+            statistics={"book": True})
+
+    def iterative_deepening(self, game_state: ChessEngine.GameState, first_depth: int = 1, shuffle_seed: int = None, result_queue: multiprocessing.Queue = None) -> SearchResult.SearchResult:
+        """
+        Search one ply deeper at a time, until MAX_DEPTH or the time or nodes run out.
+
+        Every iteration searches the previous best move first, and only a completed
+        iteration may change the move that is played.
+
+        Args:
+            game_state (ChessEngine.GameState): The position to search, it is left unchanged.
+            first_depth (int): The depth of the first iteration.
+            shuffle_seed (int): Shuffle the root moves with this seed before they are ordered,
+                so moves that order the same are searched in a different order. None keeps them.
+            result_queue (multiprocessing.Queue): Receives a SearchResult after every completed
+                iteration, or None.
+
+        Returns:
+            SearchResult.SearchResult: The best move, None if there is no legal move or no
+                iteration completed, with the score and depth of its iteration. A move of the
+                unfinished iteration that beat the best move keeps the score and depth of the last one.
+        """
+        self.start_search(game_state)
+        result = SearchResult.SearchResult()
+
+        # The search works on move codes, every promotion piece is a move of its own
+        move_codes = game_state.get_valid_move_codes()
+        if shuffle_seed is not None:
+            random.Random(shuffle_seed).shuffle(move_codes)
+        if len(move_codes) == 0:
+            return result
+
+        for depth in range(first_depth, self.MAX_DEPTH + 1):
+            self.root_depth = depth
+            self.partial_best_move = None
+            # the killers and history of the previous iteration order the rest
+            move_codes = MovePicker.order_moves(
+                game_state, move_codes, result.best_move, self.killer_moves[0], self.history[game_state.white_to_move])
+            score = self.search_aspiration_window(game_state, move_codes, depth, result.score)
+            if self.search_stopped:
+                # anytime result: a move that beat the previous best in the unfinished iteration is played
+                if self.partial_best_move is not None:
+                    result.best_move = self.partial_best_move
+                break
+            result.best_move, result.score, result.depth = self.next_move, score, depth
+            self.record_iteration(depth, score, result.best_move)
+            if result_queue is not None:
+                result_queue.put(SearchResult.SearchResult(
+                    result.best_move, score, depth, self.get_principal_variation(game_state, result.best_move),
+                    self.nodes, time.perf_counter() - self.start_time))
+
+        result.principal_variation = self.get_principal_variation(game_state, result.best_move)
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - self.start_time
+        result.statistics = self.get_statistics()
+        return result
+
+    def start_search(self, game_state: ChessEngine.GameState) -> None:
+        """
+        Reset the budget, the counters and the move ordering tables for a new search of the position.
+
+        Args:
+            game_state (ChessEngine.GameState): The root position of the search.
+        """
+        self.nodes = 0
+        self.search_stopped = False
+        self.start_time = time.perf_counter()
+        self.deadline = None
+        if self.TIME_LIMIT is not None and not self.pondering:
+            self.deadline = time.perf_counter() + self.TIME_LIMIT
+
+        # zobrist_history grows with null moves too, unlike move_records
+        self.root_ply = len(game_state.zobrist_history)
+        self.root_moves = len(game_state.move_records)
+        self.root_pieces = sum(piece != "--" for row in game_state.board for piece in row)
+        self.aspiration_fail_highs = self.aspiration_fail_lows = self.pvs_researches = 0
+        self.null_move_cutoffs = self.lmr_researches = 0
+        self.total_quiescence_nodes = self.beta_cutoffs = self.first_move_cutoffs = 0
+        self.table_hits_start = self.transposition_table.hits
+        self.table_misses_start = self.transposition_table.misses
+        self.iterations = []
+        self.null_move_made = False
+        self.killer_moves = [[None, None] for _ in range(self.MAX_DEPTH + 1)]
+        self.history = {True: [0] * 4096, False: [0] * 4096}
+
+    def record_iteration(self, depth: int, score: int, best_move: int) -> None:
+        """
+        Add a completed iteration to the records of get_statistics.
+
+        Args:
+            depth (int): The depth of the iteration.
+            score (int): Its score, from the side to move's point of view.
+            best_move (int): The code of its best move.
+        """
+        elapsed = time.perf_counter() - self.start_time
+        previous = self.iterations[-1] if self.iterations else {"nodes": 0, "elapsed": 0.0}
+        self.iterations.append({
+            "depth": depth,
+            "score": score,
+            "best_move": Move.code_notation(best_move),
+            "nodes": self.nodes,
+            "elapsed": elapsed,
+            # what the iteration alone took, the nodes and elapsed time count from the start
+            "iteration_nodes": self.nodes - previous["nodes"],
+            "iteration_time": elapsed - previous["elapsed"],
+        })
+
+    def get_counters(self) -> dict[str, int]:
+        """
+        Count what the current search did so far, the counts of several searches can be added up.
+
+        Returns:
+            dict[str, int]: The counts by name, see get_statistics.
+        """
+        return {
+            "nodes": self.nodes,
+            "quiescence_nodes": self.total_quiescence_nodes,
+            "beta_cutoffs": self.beta_cutoffs,
+            "first_move_cutoffs": self.first_move_cutoffs,
+            "table_hits": self.transposition_table.hits - self.table_hits_start,
+            "table_misses": self.transposition_table.misses - self.table_misses_start,
+            "null_move_cutoffs": self.null_move_cutoffs,
+            "lmr_researches": self.lmr_researches,
+            "pvs_researches": self.pvs_researches,
+            "aspiration_fail_highs": self.aspiration_fail_highs,
+            "aspiration_fail_lows": self.aspiration_fail_lows,
+        }
+
+    def get_statistics(self, counters: dict[str, int] = None) -> dict:
+        """
+        Sum up the current search: its counters, the rates that tell how well it prunes, and its iterations.
+
+        The beta cutoff rate is the share of the alpha-beta nodes that cut off, and the first
+        move cutoff rate the share of the cutoffs that came from the first move searched:
+        the closer it is to 1, the better the moves are ordered.
+
+        Args:
+            counters (dict[str, int]): The counters to sum up, None for get_counters.
+
+        Returns:
+            dict: The counters, the rates, the table hit rate and the list of iterations.
+        """
+        statistics = dict(counters or self.get_counters())
+        alpha_beta_nodes = statistics["nodes"] - statistics["quiescence_nodes"]
+        probes = statistics["table_hits"] + statistics["table_misses"]
+        statistics["beta_cutoff_rate"] = statistics["beta_cutoffs"] / alpha_beta_nodes if alpha_beta_nodes else 0.0
+        statistics["first_move_cutoff_rate"] = (
+            statistics["first_move_cutoffs"] / statistics["beta_cutoffs"] if statistics["beta_cutoffs"] else 0.0)
+        statistics["table_hit_rate"] = statistics["table_hits"] / probes if probes else 0.0
+        statistics["iterations"] = self.iterations[:]
+        return statistics
+
+    def log_search(self, game_state: ChessEngine.GameState, result: SearchResult.SearchResult) -> None:
+        """
+        Append the position and the result of a search to STATS_LOG as a JSON line, if it is set.
+
+        Args:
+            game_state (ChessEngine.GameState): The searched position.
+            result (SearchResult.SearchResult): The result of the search, with its statistics.
+        """
+        if self.STATS_LOG is None:
+            return
+        record = {"fen": game_state.get_fen(), **result.__json__()}
+        with open(self.STATS_LOG, "a") as file:
+            file.write(json.dumps(record) + "\n")
+
+    def search_aspiration_window(self, game_state: ChessEngine.GameState, move_codes: list[int], depth: int, previous_score: int) -> int:
+        """
+        Search the root in a narrow window around the previous iteration's score.
+
+        A narrow window cuts more, but if the score falls outside it the search is repeated
+        with the window widened on that side, twice as much every time.
+
+        Args:
+            game_state (ChessEngine.GameState): The position to search.
+            move_codes (list[int]): The ordered root moves.
+            depth (int): The depth of the iteration.
+            previous_score (int): The score of the previous iteration.
+
+        Returns:
+            int: The score from the side to move's point of view.
+        """
+        turn_multiplier = 1 if game_state.white_to_move else -1
+        if depth == 1:
+            return self.find_move_nega_max_alpha_beta(
+                game_state, move_codes, depth, -self.CHECKMATE, self.CHECKMATE, turn_multiplier)
+
+        delta = self.ASPIRATION_WINDOW
+        alpha = max(previous_score - delta, -self.CHECKMATE)
+        beta = min(previous_score + delta, self.CHECKMATE)
+        while True:
+            score = self.find_move_nega_max_alpha_beta(
+                game_state, move_codes, depth, alpha, beta, turn_multiplier)
+            if self.search_stopped:
+                return score
+
+            delta *= 2
+            if score <= alpha and alpha > -self.CHECKMATE:
+                self.aspiration_fail_lows += 1
+                alpha = max(score - delta, -self.CHECKMATE)
+            elif score >= beta and beta < self.CHECKMATE:
+                self.aspiration_fail_highs += 1
+                beta = min(score + delta, self.CHECKMATE)
+            else:
+                return score
+
+    def is_out_of_budget(self) -> bool:
+        """
+        Count a searched node and tell if the time or node budget of the move ran out.
+
+        The first iteration always completes, so there is a move to play.
+
+        Returns:
+            bool: True once the search has to stop, it stays True until the next find_best_move.
+        """
+        self.nodes += 1
+        if self.root_depth > 1 and not self.search_stopped and self.nodes & 1023 == 0:
+            if self.pondering and self.ponder_hit_event.is_set():
+                # the expected move was played, the search goes on with the time of a move
+                self.pondering = False
+                if self.TIME_LIMIT is not None:
+                    self.deadline = time.perf_counter() + self.TIME_LIMIT
+
+            if self.NODE_LIMIT is not None and self.nodes >= self.NODE_LIMIT:
+                self.search_stopped = True
+            elif self.deadline is not None and time.perf_counter() >= self.deadline:
+                self.search_stopped = True
+            elif self.stop_event is not None and self.stop_event.is_set():
+                self.search_stopped = True
+        return self.search_stopped
+
+    def score_to_table(self, score: int, ply: int) -> int:
+        """
+        Make a mate score count from the position instead of from the root, to store it in the table.
+
+        The position can be found again at another ply from the root, or in another search.
+
+        Args:
+            score (int): The score, mates count the plies from the root.
+            ply (int): The plies from the root to the position.
+
+        Returns:
+            int: The score, mates count the plies from the position.
+        """
+        if score >= self.MATE_BOUND:
+            return score + ply
+        if score <= -self.MATE_BOUND:
+            return score - ply
+        return score
+
+    def score_from_table(self, score: int, ply: int) -> int:
+        """
+        Undo score_to_table, for the position at ply from the root.
+        """
+        if score >= self.MATE_BOUND:
+            return score - ply
+        if score <= -self.MATE_BOUND:
+            return score + ply
+        return score
+
+    def get_mate_moves(self, score: int) -> int:
+        """
+        Get the moves to mate of a score.
+
+        Args:
+            score (int): A score from the side to move's point of view.
+
+        Returns:
+            int: The moves until the side to move mates, negative until it is mated, None if it isn't a mate score.
+        """
+        if score >= self.MATE_BOUND:
+            return (self.CHECKMATE - score + 1) // 2
+        if score <= -self.MATE_BOUND:
+            return -((self.CHECKMATE + score) // 2)
+        return None
+
+    def get_principal_variation(self, game_state: ChessEngine.GameState, best_move: int, max_length: int = None) -> list[int]:
+        """
+        Follow the best moves stored in the transposition table from the best move of a search.
+
+        Args:
+            game_state (ChessEngine.GameState): The root position of the search, it is left unchanged.
+            best_move (int): The code of the best root move, or None.
+            max_length (int): Most moves to return, None for MAX_DEPTH.
+
+        Returns:
+            list[int]: The move codes of the expected line of play, the best move first.
+        """
+        max_length = self.MAX_DEPTH if max_length is None else max_length
+        # the search didn't make these lookups, they are left out of its table statistics
+        table = self.transposition_table
+        counters = table.hits, table.misses, table.collisions
+        principal_variation = []
+        seen = set()
+        move = best_move
+        while move is not None and len(principal_variation) < max_length:
+            # an entry can belong to another position with the same index, only legal moves are followed
+            if move not in game_state.get_valid_move_codes():
+                break
+            game_state.make_move_code(move)
+            principal_variation.append(move)
+            key = game_state.zobrist_key
+            if key in seen:
+                break
+            seen.add(key)
+            entry = self.transposition_table.probe(key)
+            move = None if entry is None else entry[4]
+
+        for _ in principal_variation:
+            game_state.undo_move()
+        table.hits, table.misses, table.collisions = counters
+        return principal_variation
 
     def find_best_move_greedy(self, game_state: ChessEngine.GameState, valid_moves) -> Move.Move:
         """
@@ -255,14 +1063,13 @@ class ChessAI:
         Returns:
             The best move to play.
         """
-        # Global variable to store the best move
-        global next_move
-
         random.shuffle(valid_moves)
-        # Find the best move using Min-Max algorithm
+        # Find the best move using Min-Max algorithm, the root is where depth == root_depth
+        self.next_move = None
+        self.root_depth = self.DEPTH
         self.find_move_min_max(game_state, valid_moves,
                                self.DEPTH, game_state.white_to_move)
-        return next_move
+        return self.next_move
 
     def find_move_min_max(self, game_state: ChessEngine.GameState,
                           valid_moves: list[Move.Move], depth: int, is_white_move: bool) -> int:
@@ -279,8 +1086,6 @@ class ChessAI:
             int: The best score for the current player.
         """
 
-        global next_move  # keep track of the best move found so far
-
         # Base case: if depth is 0, return the material score
         if depth == 0:
             return self.score_material(game_state.board)
@@ -298,9 +1103,9 @@ class ChessAI:
                 if score > max_score:
                     max_score = score
 
-                    # Update the best move if at the specified depth
-                    if depth == self.DEPTH:
-                        next_move = move
+                    # Update the best move if at the root
+                    if depth == self.root_depth:
+                        self.next_move = move
 
                 # undo the move for backtracking
                 game_state.undo_move()
@@ -316,14 +1121,34 @@ class ChessAI:
                     game_state, next_moves, depth - 1, True)
                 if score < min_score:
                     min_score = score
-                    if depth == self.DEPTH:
-                        next_move = move
+                    if depth == self.root_depth:
+                        self.next_move = move
                 game_state.undo_move()
             return min_score
 
+    def find_best_move_nega_max(self, game_state, valid_moves) -> Move.Move:
+        """
+        Finds the best move to play using the NegaMax algorithm given the current game state and a list of valid moves.
+
+        Args:
+            game_state: The current game state.
+            valid_moves: A list of valid moves.
+
+        Returns:
+            The best move to play.
+        """
+        random.shuffle(valid_moves)
+        # Find the best move using NegaMax algorithm, the root is where depth == root_depth
+        self.next_move = None
+        self.root_depth = self.DEPTH
+        self.find_move_nega_max(game_state, valid_moves,
+                                self.DEPTH, 1 if game_state.white_to_move else -1)
+        return self.next_move
+
     def find_move_nega_max(self, game_state: ChessEngine.GameState, valid_moves: list[Move.Move], depth: int, turn_multiplier: int) -> int:
         """
         Finds the best move using the NegaMax algorithm given the current game state, a list of valid moves, depth, and turn multiplier.
+        The best move is stored in next_move at depth == root_depth, see find_best_move_nega_max.
 
         Args:
             game_state: The current game state.
@@ -334,7 +1159,6 @@ class ChessAI:
         Returns:
             The maximum score.
         """
-        global next_move
 
         # Base case: if depth is 0, return the score of the current board state
         if depth == 0:
@@ -358,8 +1182,8 @@ class ChessAI:
             # Update max_score if the new score is higher
             if score > max_score:
                 max_score = score
-                if depth == self.DEPTH:
-                    next_move = move
+                if depth == self.root_depth:
+                    self.next_move = move
 
             # Undo the move for backtracking
             game_state.undo_move()
@@ -367,33 +1191,227 @@ class ChessAI:
         # Return the maximum score found
         return max_score
 
-    def find_move_nega_max_alpha_beta(self, game_state: ChessEngine.GameState, valid_moves: list[Move.Move], depth: int, alpha: int, beta: int, turn_multiplier: int) -> int:
-        global next_move
+    def find_move_nega_max_alpha_beta(self, game_state: ChessEngine.GameState, valid_moves: list[int], depth: int, alpha: int, beta: int, turn_multiplier: int) -> int:
+        """
+        Negamax search with alpha-beta pruning and a transposition table.
+
+        Args:
+            game_state (ChessEngine.GameState): The position to search.
+            valid_moves (list[int]): The move codes to search at the root, None below it:
+                there the moves are generated lazily by MovePicker.staged_moves.
+            depth (int): The remaining depth.
+            alpha (int): The score the side to move is already sure of.
+            beta (int): The score the opponent is already sure of.
+            turn_multiplier (int): 1 if white is to move, -1 if black.
+
+        Returns:
+            int: The score from the side to move's point of view.
+        """
+        after_null_move = self.null_move_made
+        self.null_move_made = False
 
         if depth == 0:
-            return turn_multiplier * self.score_board(game_state)
+            # play the captures out, a score in the middle of an exchange isn't worth much
+            self.quiescence_nodes = 0
+            return self.quiescence(game_state, alpha, beta, turn_multiplier)
+
+        # the score of an unfinished search is thrown away, so any value will do
+        if self.is_out_of_budget():
+            return 0
+        is_root = valid_moves is not None
+        ply = len(game_state.zobrist_history) - self.root_ply
+
+        # Mate distance pruning: no line from here mates sooner than a mate in ply, or than
+        # being mated now, so a window beyond those scores can't be reached
+        if not is_root:
+            alpha = max(alpha, -self.CHECKMATE + ply)
+            beta = min(beta, self.CHECKMATE - ply - 1)
+            if alpha >= beta:
+                return alpha
+
+        # Look the position up, a deep enough result can narrow the window or answer it directly
+        original_alpha = alpha
+        key = game_state.zobrist_key
+        hash_move = None
+        entry = self.transposition_table.probe(key)
+        if entry is not None:
+            _, entry_depth, entry_score, entry_flag, hash_move = entry
+            entry_score = self.score_from_table(entry_score, ply)
+
+            # the root must still search to pick self.next_move
+            if entry_depth >= depth and not is_root:
+                if entry_flag == TranspositionTable.EXACT:
+                    return entry_score
+                elif entry_flag == TranspositionTable.LOWER_BOUND:
+                    alpha = max(alpha, entry_score)
+                elif entry_flag == TranspositionTable.UPPER_BOUND:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score
+
+        if self.tablebases is not None and not is_root:
+            tablebase_score = self.probe_tablebases_in_search(game_state)
+            if tablebase_score is not None:
+                return tablebase_score
+
+        in_check = game_state.square_under_attack(*game_state.get_king_location())
+
+        # Null move pruning: if passing the turn still fails high, a real move would too.
+        # Not in check, where passing is illegal, nor with only king and pawns, where zugzwang is common
+        if (not is_root and not after_null_move and not in_check and depth > self.NULL_MOVE_REDUCTION
+                and beta < self.MATE_BOUND and game_state.has_non_pawn_material()):
+            game_state.make_null_move()
+            self.null_move_made = True
+            score = -self.find_move_nega_max_alpha_beta(
+                game_state, None, depth - 1 - self.NULL_MOVE_REDUCTION, -beta, -beta + 1, -turn_multiplier)
+            self.null_move_made = False
+            game_state.undo_null_move()
+            if self.search_stopped:
+                return 0
+            if score >= beta:
+                self.null_move_cutoffs += 1
+                return beta
+
+        killers = self.killer_moves[ply]
+        history = self.history[game_state.white_to_move]
+        if valid_moves is None:
+            # the hash move first, then the captures, quiet moves only if nothing cut off
+            valid_moves = MovePicker.staged_moves(game_state, hash_move, killers, history)
 
-        # TODO: Move ordering
         max_score = -self.CHECKMATE
+        best_move = None
+        moves_searched = 0
         for move in valid_moves:
-            game_state.make_move(move)
-            next_moves = game_state.get_valid_moves()
-            score = -self.find_move_nega_max_alpha_beta(
-                game_state, next_moves, depth - 1, -beta, -alpha, -turn_multiplier)
+            is_quiet = not game_state.is_noisy_code(move)
+            game_state.make_move_code(move)
+            moves_searched += 1
+            if best_move is None:
+                score = -self.find_move_nega_max_alpha_beta(
+                    game_state, None, depth - 1, -beta, -alpha, -turn_multiplier)
+            else:
+                # Late move reductions: with good ordering, late quiet moves rarely are the best,
+                # search them a ply shallower unless they give check or escape one
+                reduction = 0
+                if (depth >= 3 and moves_searched > self.LMR_FULL_DEPTH_MOVES and is_quiet
+                        and not in_check and move not in killers
+                        and not game_state.square_under_attack(*game_state.get_king_location())):
+                    reduction = 1
+
+                # principal variation search: the first move is expected to be the best,
+                # a null window around alpha is enough to prove the others aren't better
+                score = -self.find_move_nega_max_alpha_beta(
+                    game_state, None, depth - 1 - reduction, -alpha - 1, -alpha, -turn_multiplier)
+                if reduction and score > alpha and not self.search_stopped:
+                    self.lmr_researches += 1
+                    score = -self.find_move_nega_max_alpha_beta(
+                        game_state, None, depth - 1, -alpha - 1, -alpha, -turn_multiplier)
+                if alpha < score < beta and not self.search_stopped:
+                    self.pvs_researches += 1
+                    score = -self.find_move_nega_max_alpha_beta(
+                        game_state, None, depth - 1, -beta, -alpha, -turn_multiplier)
+            game_state.undo_move()
+            if self.search_stopped:
+                return 0
+
             if score > max_score:
                 max_score = score
-                if depth == self.DEPTH:
-                    next_move = move
-
-            game_state.undo_move()
+                best_move = move
+                if is_root:
+                    self.next_move = move
+                    if score > alpha:
+                        self.partial_best_move = move
 
             if max_score > alpha:
                 alpha = max_score
             if alpha >= beta:
+                self.beta_cutoffs += 1
+                if moves_searched == 1:
+                    self.first_move_cutoffs += 1
+                # a quiet move that refutes this node is likely to refute its siblings too
+                if not game_state.is_noisy_code(move):
+                    if killers[0] != move:
+                        killers[1] = killers[0]
+                        killers[0] = move
+                    history[move & 0xFFF] += depth * depth
                 break
 
+        if best_move is None:
+            # no legal move, staged_moves has set in_check
+            max_score = -self.CHECKMATE + ply if game_state.in_check else self.STALEMATE
+
+        if max_score <= original_alpha:
+            flag = TranspositionTable.UPPER_BOUND
+        elif max_score >= beta:
+            flag = TranspositionTable.LOWER_BOUND
+        else:
+            flag = TranspositionTable.EXACT
+        if not (is_root and self.root_moves_excluded):
+            self.transposition_table.store(
+                key, depth, self.score_to_table(max_score, ply), flag, best_move)
+
         return max_score
 
+    def quiescence(self, game_state: ChessEngine.GameState, alpha: int, beta: int, turn_multiplier: int) -> int:
+        """
+        Search captures and promotions only, until the position is quiet.
+
+        The side to move may always "stand pat" on the static evaluation instead of capturing.
+        Captures that can't lift the score back to alpha even with a margin are skipped
+        (delta pruning), and once QUIESCENCE_NODE_LIMIT nodes were visited from the same
+        leaf every node stands pat. In check every evasion is searched, so mates are seen.
+
+        Args:
+            game_state (ChessEngine.GameState): The position to search.
+            alpha (int): The score the side to move is already sure of.
+            beta (int): The score the opponent is already sure of.
+            turn_multiplier (int): 1 if white is to move, -1 if black.
+
+        Returns:
+            int: The score from the side to move's point of view.
+        """
+        self.quiescence_nodes += 1
+        self.total_quiescence_nodes += 1
+        if self.is_out_of_budget():
+            return 0
+        info = game_state.get_move_generation_info()
+        in_check = game_state.in_check
+
+        if in_check:
+            moves = game_state.get_noisy_move_codes(info) + game_state.get_quiet_move_codes(info)
+            if len(moves) == 0:
+                return -self.CHECKMATE + len(game_state.zobrist_history) - self.root_ply
+            best_score = -self.CHECKMATE
+        else:
+            best_score = turn_multiplier * game_state.evaluation
+            if best_score >= beta or self.quiescence_nodes >= self.QUIESCENCE_NODE_LIMIT:
+                return best_score
+            alpha = max(alpha, best_score)
+            moves = game_state.get_noisy_move_codes(info)
+
+        board = game_state.board
+        moves.sort(key=lambda code: MovePicker.capture_order(board, code), reverse=True)
+        stand_pat = best_score
+        for move in moves:
+            if not in_check and move >> 12 & 3 != Move.PROMOTION:
+                end = move >> 6 & 63
+                captured = "p" if move >> 12 & 3 == Move.EN_PASSANT else board[end >> 3][end & 7][1]
+                if stand_pat + self.piece_score[captured] * 100 + self.DELTA_MARGIN <= alpha:
+                    continue
+
+            game_state.make_move_code(move)
+            score = -self.quiescence(game_state, -beta, -alpha, -turn_multiplier)
+            game_state.undo_move()
+            if self.search_stopped:
+                return 0
+
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
     def score_board(self, game_state: ChessEngine.GameState) -> int:
         """
         Calculate the score of the chess board based on the pieces and game state.
@@ -402,7 +1420,7 @@ class ChessAI:
             game_state (ChessEngine.GameState): The current state of the chess game.
 
         Returns:
-            int: The score of the chess board.
+            int: The score of the chess board in centipawns.
         """
         # a positive score is good for white, a negative score is good for black
         if game_state.check_mate:
@@ -415,27 +1433,8 @@ class ChessAI:
         elif game_state.stale_mate:
             return self.STALEMATE
 
-        score: int = 0
-        for row in range(len(game_state.board)):
-            for col in range(len(game_state.board[row])):
-                square = game_state.board[row][col]
-                if square != "--":
-                    piece_position_score = 0
-                    if square[1] != "K":
-                        if square[1] == "p":
-                            piece_position_score = self.piece_position_scores[square][row][col]
-                        else:
-                            piece_position_score = self.piece_position_scores[square[1]][row][col]
-
-                    if square[0] == "w":
-                        # add the piece score to the total score
-                        score += self.piece_score[square[1]
-                                                  ] + piece_position_score * 0.1
-                    elif square[0] == "b":
-                        # subtract the piece score from the total score
-                        score -= self.piece_score[square[1]
-                                                  ] + piece_position_score * 0.1
-        return score
+        # material and piece-square scores, kept up to date by make_move/undo_move
+        return game_state.evaluation
 
     def score_material(self, board: list[str]) -> int:
         """
@@ -456,3 +1455,95 @@ class ChessAI:
                 elif square[0] == "b":
                     score -= self.piece_score[square[1]]
         return score
+
+
+def search_lazy_smp_helper(fen: str, backend: str, table: TranspositionTable.SharedTranspositionTable,
+                           stop_event: multiprocessing.Event, result_queue: multiprocessing.Queue, helper_index: int) -> None:
+    """
+    Run a helper process of ChessAI.find_best_move_parallel.
+
+    The helper searches the position until stop_event is set, through the shared table.
+    Odd helpers start one ply deeper, and every helper orders its root moves differently,
+    so the processes don't all search the same nodes at the same time.
+
+    Args:
+        fen (str): The position to search, see GameState.get_fen.
+        backend (str): The GameState backend, "mailbox" or "bitboard".
+        table (TranspositionTable.SharedTranspositionTable): The table shared by all processes.
+        stop_event (multiprocessing.Event): Set when the search is over.
+        result_queue (multiprocessing.Queue): Receives `(best_move, score, depth)` after every
+            completed iteration, and None when the helper is done.
+        helper_index (int): 1 for the first helper, 2 for the second and so on.
+    """
+    game_state = ChessEngine.GameState(backend)
+    game_state.load_fen(fen)
+    ai = ChessAI(time_limit=None)
+    ai.transposition_table = table
+    ai.stop_event = stop_event
+    try:
+        ai.iterative_deepening(game_state, 1 + helper_index % 2, helper_index, result_queue)
+    finally:
+        result_queue.put(None)
+
+
+# (ChessAI, GameState, stop event, shared alpha) of a find_best_move_root_split worker process
+root_split_worker: tuple = None
+
+
+def start_root_split_worker(backend: str, stop_event: multiprocessing.Event, shared_alpha: multiprocessing.Value) -> None:
+    """
+    Set up a worker process of ChessAI.find_best_move_root_split, once per process of the pool.
+
+    Args:
+        backend (str): The GameState backend, "mailbox" or "bitboard".
+        stop_event (multiprocessing.Event): Set when the time or nodes of the search ran out.
+        shared_alpha (multiprocessing.Value): The best root score found so far.
+    """
+    global root_split_worker
+
+    ai = ChessAI(time_limit=None)
+    ai.stop_event = stop_event
+    root_split_worker = (ai, ChessEngine.GameState(backend), stop_event, shared_alpha)
+
+
+def search_root_move(fen: str, move: int, depth: int) -> tuple[int, bool, dict[str, int], list[int]]:
+    """
+    Search one root move in a worker process of ChessAI.find_best_move_root_split.
+
+    The move is searched with a null window at the current shared alpha, and only searched
+    again with the full window if it beats it.
+
+    Args:
+        fen (str): The root position.
+        move (int): The code of the root move.
+        depth (int): The depth of the iteration, the root move included.
+
+    Returns:
+        tuple[int, bool, dict[str, int], list[int]]: The score of the move from the root's side to move,
+            whether it is exact or only an upper bound, the counters of the search, see ChessAI.get_counters,
+            and the expected line of play after the move, empty for an upper bound.
+    """
+    ai, game_state, _, shared_alpha = root_split_worker
+    game_state.load_fen(fen)
+    ai.start_search(game_state)
+    ai.root_depth = depth
+    turn_multiplier = 1 if game_state.white_to_move else -1
+    alpha = shared_alpha.value
+
+    game_state.make_move_code(move)
+    if alpha == -ai.CHECKMATE:
+        score = -ai.find_move_nega_max_alpha_beta(
+            game_state, None, depth - 1, -ai.CHECKMATE, ai.CHECKMATE, -turn_multiplier)
+        exact = True
+    else:
+        score = -ai.find_move_nega_max_alpha_beta(
+            game_state, None, depth - 1, -alpha - 1, -alpha, -turn_multiplier)
+        if score > alpha and not ai.search_stopped:
+            score = -ai.find_move_nega_max_alpha_beta(
+                game_state, None, depth - 1, -ai.CHECKMATE, -alpha, -turn_multiplier)
+        exact = score > alpha
+    game_state.undo_move()
+
+    # the line after the move, from this worker's table
+    variation = ai.get_principal_variation(game_state, move, depth)[1:] if exact else []
+    return score, exact, ai.get_counters(), variation
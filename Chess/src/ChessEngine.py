@@ -1,5 +1,6 @@
-import hashlib
 import src.Castle as Castle
+import src.Zobrist as Zobrist
+import src.Evaluation as Evaluation
 import src.Move as Move
 import src.PawnMoves as PawnMoves
 import src.RookMoves as RookMoves
@@ -7,16 +8,41 @@ import src.KnightMoves as KnightMoves
 import src.BishopMoves as BishopMoves
 import src.KingMoves as KingMoves
 import src.ChessHelper as ChessHelper
+import src.AttackMaps as AttackMaps
+import src.SquareTables as SquareTables
 
 
 class GameState(ChessHelper.Helper,
+                AttackMaps.AttackMaps,
                 PawnMoves.Pawn,
                 RookMoves.Rook,
                 KnightMoves.Knight,
                 BishopMoves.Bishop,
                 KingMoves.King,
                 ):
-    def __init__(self) -> None:
+    BACKENDS: tuple[str] = ("mailbox", "bitboard")
+
+    def __new__(cls, backend: str = "mailbox"):
+        """
+        Pick the board representation when the game state is constructed.
+
+        Args:
+            backend (str): "mailbox" for the 8x8 list board, "bitboard" for the 64-bit integer one.
+
+        Returns:
+            GameState: A new, not yet initialized, game state.
+        """
+        if backend not in cls.BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {cls.BACKENDS}")
+
+        if cls is GameState and backend == "bitboard":
+            import src.BitboardEngine as BitboardEngine
+            cls = BitboardEngine.BitboardGameState
+        return super().__new__(cls)
+
+    def __init__(self, backend: str = "mailbox") -> None:
+        self.backend: str = backend
+
         # board is 8x8 2d list, each element of list has 2 characters
         self.board = [
             ["bR", "bN", "bB", "bQ", "bK", "bB", "bN", "bR"],
@@ -40,7 +66,10 @@ class GameState(ChessHelper.Helper,
         }
 
         self.white_to_move: bool = True
-        self.moves_log: list[Move.Move] = []
+        # (move code, piece moved, piece captured) of every move played, see moves_log
+        self.move_records: list[tuple[int, str, str]] = []
+        # plies played before the first move record, from the fullmove number of a FEN
+        self.start_ply: int = 0
 
         # Tracking the king location
         self.white_king_location: tuple[int] = (7, 4)
@@ -54,6 +83,9 @@ class GameState(ChessHelper.Helper,
         self.checks: list = []
         self.promotion_choice = "Q"
 
+        # per color: (zobrist key, number of attackers per square), see get_attack_map
+        self.attack_maps: dict[str, tuple[int, list[int]]] = {}
+
         # coordinates for the square where en passant capture is possible
         self.en_passant_possible: tuple = ()
         self.en_passant_possible_log: list[tuple] = [self.en_passant_possible]
@@ -68,11 +100,131 @@ class GameState(ChessHelper.Helper,
             self.current_castle_rights.black_queen_side,
         )]
 
+        # Zobrist hash of every position reached, the last one is the current position
+        self.zobrist_history: list[int] = [Zobrist.hash_position(self)]
+        # material and piece-square evaluation of every position reached, in centipawns
+        self.evaluation_history: list[int] = [Evaluation.evaluate_board(self.board)]
+
+    @property
+    def zobrist_key(self) -> int:
+        """
+        The 64-bit Zobrist hash of the current position.
+
+        It covers the pieces, the side to move, the castle rights and the en passant file,
+        and is updated on every make_move/undo_move instead of being recomputed.
+        """
+        return self.zobrist_history[-1]
+
+    @property
+    def evaluation(self) -> int:
+        """
+        The material and piece-square score of the current position in centipawns, positive is good for white.
+
+        It is updated on every make_move/undo_move instead of being recomputed, see Evaluation.
+        """
+        return self.evaluation_history[-1]
+
+    def load_fen(self, fen: str) -> None:
+        """
+        Set up the position described by a FEN string and clear the move history.
+
+        The halfmove counter is optional and ignored, the fullmove number is optional and 1 by default.
+
+        Args:
+            fen (str): The position, e.g. "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1".
+
+        Returns:
+            None
+        """
+        fields = fen.split()
+        placement, turn, castling, en_passant = fields[:4]
+        fullmove = int(fields[5]) if len(fields) > 5 else 1
+
+        self.board = []
+        for row, rank in enumerate(placement.split("/")):
+            squares = []
+            for letter in rank:
+                if letter.isdigit():
+                    squares.extend(["--"] * int(letter))
+                    continue
+
+                color = "w" if letter.isupper() else "b"
+                piece = "p" if letter in "Pp" else letter.upper()
+                self.update_king_location(color + piece, row, len(squares))
+                squares.append(color + piece)
+            self.board.append(squares)
+
+        self.white_to_move = turn == "w"
+        self.move_records = []
+        self.start_ply = (max(fullmove, 1) - 1) * 2 + (0 if self.white_to_move else 1)
+        self.check_mate = self.stale_mate = self.in_check = False
+        self.pins, self.checks = [], []
+
+        if en_passant == "-":
+            self.en_passant_possible = ()
+        else:
+            self.en_passant_possible = (
+                Move.Move.ranks_to_rows[en_passant[1]], Move.Move.files_to_cols[en_passant[0]])
+        self.en_passant_possible_log = [self.en_passant_possible]
+
+        self.current_castle_rights = Castle.CastleRights(
+            "K" in castling, "k" in castling, "Q" in castling, "q" in castling)
+        self.castle_rights_log = [Castle.CastleRights(
+            "K" in castling, "k" in castling, "Q" in castling, "q" in castling)]
+
+        self.zobrist_history = [Zobrist.hash_position(self)]
+        self.evaluation_history = [Evaluation.evaluate_board(self.board)]
+
+    def get_fen(self) -> str:
+        """
+        Describe the current position as a FEN string, the inverse of load_fen.
+
+        It is the compact form a position is sent to another process in, the move history
+        is not part of it. The halfmove counter is not tracked and always 0.
+
+        Returns:
+            str: The position, e.g. "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1".
+        """
+        ranks = []
+        for row in self.board:
+            rank = ""
+            empty = 0
+            for square in row:
+                if square == "--":
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                letter = "P" if square[1] == "p" else square[1]
+                rank += letter if square[0] == "w" else letter.lower()
+            ranks.append(rank + (str(empty) if empty else ""))
+
+        rights = self.current_castle_rights
+        castling = ("K" if rights.white_king_side else "") + ("Q" if rights.white_queen_side else "") + \
+            ("k" if rights.black_king_side else "") + ("q" if rights.black_queen_side else "")
+
+        if self.en_passant_possible:
+            row, col = self.en_passant_possible
+            en_passant = Move.Move.cols_to_files[col] + Move.Move.row_to_ranks[row]
+        else:
+            en_passant = "-"
+
+        return f"{'/'.join(ranks)} {'w' if self.white_to_move else 'b'} {castling or '-'} {en_passant} " \
+            f"0 {(self.start_ply + len(self.move_records)) // 2 + 1}"
+
+    @property
+    def moves_log(self) -> list[Move.Move]:
+        """
+        The moves played so far, oldest first, as Move objects built from the move records.
+        """
+        return [Move.Move.from_record(*record) for record in self.move_records]
+
     def make_move(self, move: Move.Move) -> None:
         """
         Makes a move on the chess board.
 
-        This method updates the chess board, the current player's turn, and the move history based on the given move.
+        A pawn promotion is played with the piece in self.promotion_choice.
 
         Args:
             move (Move): The move to be made.
@@ -80,46 +232,70 @@ class GameState(ChessHelper.Helper,
         Returns:
             None
         """
-        self.board[move.start_row][move.start_col] = "--"
-        self.board[move.end_row][move.end_col] = move.piece_moved
-        self.moves_log.append(move)
+        code = move.code
+        if move.is_pawn_promotion:
+            code = code & 0x3FFF | Move.PROMOTION_PIECES.index(
+                self.promotion_choice) << 14
+        self.make_move_code(code)
+
+    def make_move_code(self, code: int) -> None:
+        """
+        Makes a move given as a move code (see Move.encode).
+
+        This method updates the chess board, the current player's turn, and the move history based on the given move.
+
+        Args:
+            code (int): The move to be made.
+
+        Returns:
+            None
+        """
+        castle_index_before = Zobrist.castle_rights_index(
+            self.current_castle_rights)
+        en_passant_before = self.en_passant_possible
+
+        start, end, flag = code & 63, code >> 6 & 63, code >> 12 & 3
+        start_row, start_col = start >> 3, start & 7
+        end_row, end_col = end >> 3, end & 7
+        piece_moved = self.board[start_row][start_col]
+        piece_captured = self.board[end_row][end_col]
+
+        self.board[start_row][start_col] = "--"
+        self.board[end_row][end_col] = piece_moved
+        self.move_records.append((code, piece_moved, piece_captured))
         self.white_to_move = not self.white_to_move
 
-        # Update the king location, if the move.piece_moved is king
-        self.update_king_location(
-            move.piece_moved, move.end_row, move.end_col)
+        # Update the king location, if the piece_moved is king
+        self.update_king_location(piece_moved, end_row, end_col)
 
         # if pawn moves twice, next move can capture en passant
-        if move.piece_moved[1] == "p" and abs(move.start_row - move.end_row) == 2:
-            self.en_passant_possible = (
-                (move.start_row + move.end_row) // 2, move.start_col)
+        if piece_moved[1] == "p" and abs(start_row - end_row) == 2:
+            self.en_passant_possible = ((start_row + end_row) // 2, start_col)
         else:
             self.en_passant_possible = ()
 
-        # if en passant move, must update the board to capture the pawn
-        if move.is_en_passant_move:
-            self.board[move.start_row][move.end_col] = "--"
-
-        # if pawn promotion, change piece
-        if move.is_pawn_promotion:
-            self.board[move.end_row][move.end_col] = move.piece_moved[0] + \
-                self.promotion_choice
+        if flag == Move.EN_PASSANT:
+            # if en passant move, must update the board to capture the pawn
+            piece_captured = self.board[start_row][end_col]
+            self.board[start_row][end_col] = "--"
 
-        if move.is_castle_move:
-            if move.end_col - move.start_col == 2:
-                self.board[move.end_row][move.end_col -
-                                         1] = self.board[move.end_row][move.end_col + 1]
-                self.board[move.end_row][move.end_col + 1] = "--"
+        elif flag == Move.PROMOTION:
+            # if pawn promotion, change piece
+            self.board[end_row][end_col] = piece_moved[0] + \
+                Move.PROMOTION_PIECES[code >> 14]
 
+        elif flag == Move.CASTLE:
+            if end_col - start_col == 2:
+                self.board[end_row][end_col - 1] = self.board[end_row][end_col + 1]
+                self.board[end_row][end_col + 1] = "--"
             else:
-                self.board[move.end_row][move.end_col +
-                                         1] = self.board[move.end_row][move.end_col - 2]
-                self.board[move.end_row][move.end_col - 2] = "--"
+                self.board[end_row][end_col + 1] = self.board[end_row][end_col - 2]
+                self.board[end_row][end_col - 2] = "--"
 
         self.en_passant_possible_log.append(self.en_passant_possible)
 
         # Updating the castling rights
-        self.update_castle_rights(move)
+        self.update_castle_rights(piece_moved, piece_captured, start, end)
         self.castle_rights_log.append(
             Castle.CastleRights(
                 self.current_castle_rights.white_king_side,
@@ -128,6 +304,92 @@ class GameState(ChessHelper.Helper,
                 self.current_castle_rights.black_queen_side,
             ))
 
+        self.zobrist_history.append(self.hash_move(
+            code, piece_moved, piece_captured, castle_index_before, en_passant_before))
+        self.evaluation_history.append(self.evaluate_move(
+            code, piece_moved, piece_captured))
+
+    def evaluate_move(self, code: int, piece_moved: str, piece_captured: str) -> int:
+        """
+        Compute the evaluation of the position after a move from the evaluation before it.
+
+        Must be called once the board is updated.
+
+        Args:
+            code (int): The move that was just made.
+            piece_moved (str): The piece that moved.
+            piece_captured (str): The piece that was captured, "--" if none.
+
+        Returns:
+            int: The new evaluation in centipawns.
+        """
+        values = Evaluation.PIECE_SQUARE_VALUES
+        start, end, flag = code & 63, code >> 6 & 63, code >> 12 & 3
+
+        # the board already holds the promoted piece, if any
+        score = self.evaluation_history[-1] - values[piece_moved][start] + \
+            values[self.board[end >> 3][end & 7]][end]
+
+        if flag == Move.EN_PASSANT:
+            score -= values[piece_captured][(start & 56) | (end & 7)]
+        elif piece_captured != "--":
+            score -= values[piece_captured][end]
+
+        if flag == Move.CASTLE:
+            rook_values = values[piece_moved[0] + "R"]
+            if end - start == 2:
+                score += rook_values[end - 1] - rook_values[end + 1]
+            else:
+                score += rook_values[end + 1] - rook_values[end - 2]
+        return score
+
+    def hash_move(self, code: int, piece_moved: str, piece_captured: str,
+                  castle_index_before: int, en_passant_before: tuple) -> int:
+        """
+        Compute the hash of the position after a move from the hash before it.
+
+        Must be called once the board, castle rights and en passant square are updated.
+
+        Args:
+            code (int): The move that was just made.
+            piece_moved (str): The piece that moved.
+            piece_captured (str): The piece that was captured, "--" if none.
+            castle_index_before (int): Zobrist.castle_rights_index before the move.
+            en_passant_before (tuple): The en passant square before the move.
+
+        Returns:
+            int: The new Zobrist hash.
+        """
+        piece_keys = Zobrist.PIECE_KEYS
+        start, end, flag = code & 63, code >> 6 & 63, code >> 12 & 3
+
+        key = self.zobrist_history[-1] ^ Zobrist.BLACK_TO_MOVE
+        key ^= piece_keys[piece_moved][start]
+        # the board already holds the promoted piece, if any
+        key ^= piece_keys[self.board[end >> 3][end & 7]][end]
+
+        if flag == Move.EN_PASSANT:
+            key ^= piece_keys[piece_captured][(start & 56) | (end & 7)]
+        elif piece_captured != "--":
+            key ^= piece_keys[piece_captured][end]
+
+        if flag == Move.CASTLE:
+            rook_keys = piece_keys[piece_moved[0] + "R"]
+            if end - start == 2:
+                key ^= rook_keys[end + 1] ^ rook_keys[end - 1]
+            else:
+                key ^= rook_keys[end - 2] ^ rook_keys[end + 1]
+
+        if en_passant_before:
+            key ^= Zobrist.EN_PASSANT_KEYS[en_passant_before[1]]
+        if self.en_passant_possible:
+            key ^= Zobrist.EN_PASSANT_KEYS[self.en_passant_possible[1]]
+
+        castle_index = Zobrist.castle_rights_index(self.current_castle_rights)
+        if castle_index != castle_index_before:
+            key ^= Zobrist.CASTLE_KEYS[castle_index_before] ^ Zobrist.CASTLE_KEYS[castle_index]
+        return key
+
     def undo_move(self):
         """
         Undoes the last move made in the game.
@@ -139,100 +401,172 @@ class GameState(ChessHelper.Helper,
         Returns:
             None
         """
-        if len(self.moves_log) == 0:
+        if len(self.move_records) == 0:
             return
 
-        moves = self.moves_log.pop()
-        self.board[moves.start_row][moves.start_col] = moves.piece_moved
-        self.board[moves.end_row][moves.end_col] = moves.piece_captured
+        code, piece_moved, piece_captured = self.move_records.pop()
+        start, end, flag = code & 63, code >> 6 & 63, code >> 12 & 3
+        start_row, start_col = start >> 3, start & 7
+        end_row, end_col = end >> 3, end & 7
+        self.board[start_row][start_col] = piece_moved
+        self.board[end_row][end_col] = piece_captured
         self.white_to_move = not self.white_to_move
 
         # update the king's position if needed
-        self.update_king_location(
-            moves.piece_moved, moves.end_row, moves.end_col)
+        self.update_king_location(piece_moved, start_row, start_col)
 
         # undo the en passant move, it is different
-        if moves.is_en_passant_move:
-            # leave landing square blank
-            self.board[moves.end_row][moves.end_col] = "--"
-            self.board[moves.start_row][moves.end_col] = moves.piece_captured
+        if flag == Move.EN_PASSANT:
+            # leave landing square blank, the captured pawn goes back beside the start square
+            self.board[start_row][end_col] = "wp" if piece_moved == "bp" else "bp"
 
         self.en_passant_possible_log.pop()
         self.en_passant_possible = self.en_passant_possible_log[-1]
+        self.zobrist_history.pop()
+        self.evaluation_history.pop()
 
-        # undo castling rights
+        # undo castling rights, copy them so the next move can't change the log entry
         self.castle_rights_log.pop()
-        self.current_castle_rights = self.castle_rights_log[-1]
+        last_rights = self.castle_rights_log[-1]
+        self.current_castle_rights = Castle.CastleRights(
+            last_rights.white_king_side,
+            last_rights.black_king_side,
+            last_rights.white_queen_side,
+            last_rights.black_queen_side,
+        )
 
         # undo castling moves
-        if moves.is_castle_move:
-            if moves.end_col - moves.start_col == 2:
-                self.board[moves.end_row][moves.end_col +
-                                          1] = self.board[moves.end_row][moves.end_col - 1]
-                self.board[moves.end_row][moves.end_col - 1] = "--"
+        if flag == Move.CASTLE:
+            if end_col - start_col == 2:
+                self.board[end_row][end_col + 1] = self.board[end_row][end_col - 1]
+                self.board[end_row][end_col - 1] = "--"
             else:
-                self.board[moves.end_row][moves.end_col -
-                                          2] = self.board[moves.end_row][moves.end_col + 1]
-                self.board[moves.end_row][moves.end_col + 1] = "--"
+                self.board[end_row][end_col - 2] = self.board[end_row][end_col + 1]
+                self.board[end_row][end_col + 1] = "--"
 
         self.check_mate = False
         self.stale_mate = False
 
-    def update_castle_rights(self, move: Move.Move) -> None:
+    def make_null_move(self) -> None:
+        """
+        Pass the turn without moving a piece, for the null move pruning of the search.
+
+        It is not a legal chess move and is not logged in move_records, take it back
+        with undo_null_move before any other move is undone.
+
+        Returns:
+            None
+        """
+        key = self.zobrist_history[-1] ^ Zobrist.BLACK_TO_MOVE
+        if self.en_passant_possible:
+            key ^= Zobrist.EN_PASSANT_KEYS[self.en_passant_possible[1]]
+
+        self.white_to_move = not self.white_to_move
+        self.en_passant_possible = ()
+        self.en_passant_possible_log.append(self.en_passant_possible)
+        self.zobrist_history.append(key)
+        self.evaluation_history.append(self.evaluation_history[-1])
+
+    def undo_null_move(self) -> None:
+        """
+        Take back a make_null_move.
+
+        Returns:
+            None
+        """
+        self.white_to_move = not self.white_to_move
+        self.en_passant_possible_log.pop()
+        self.en_passant_possible = self.en_passant_possible_log[-1]
+        self.zobrist_history.pop()
+        self.evaluation_history.pop()
+
+    def has_non_pawn_material(self) -> bool:
+        """
+        Check if the side to move has a piece other than its king and pawns.
+
+        Without one, zugzwang is common and passing the turn is no safe guess of the score.
+        """
+        ally_color = "w" if self.white_to_move else "b"
+        for row in self.board:
+            for square in row:
+                if square[0] == ally_color and square[1] not in "Kp":
+                    return True
+        return False
+
+    def update_castle_rights(self, piece_moved: str, piece_captured: str, start: int, end: int) -> None:
         """Update the castle rights given the move
 
         Args:
-            move (Move.Move): List of all moves.
+            piece_moved (str): The piece that moved.
+            piece_captured (str): The piece on the end square, "--" if none.
+            start (int): The start square, row * 8 + col.
+            end (int): The end square, row * 8 + col.
         """
-        if move.piece_captured == "wR":
-            if move.end_col == 0:  # left rook
+        # only a rook captured on its starting square takes the right away
+        if piece_captured == "wR":
+            if end == 56:  # left rook
                 self.current_castle_rights.white_queen_side = False
-            elif move.end_col == 7:  # right rook
+            elif end == 63:  # right rook
                 self.current_castle_rights.white_king_side = False
-        elif move.piece_captured == "bR":
-            if move.end_col == 0:  # left rook
+        elif piece_captured == "bR":
+            if end == 0:  # left rook
                 self.current_castle_rights.black_queen_side = False
-            elif move.end_col == 7:  # right rook
+            elif end == 7:  # right rook
                 self.current_castle_rights.black_king_side = False
 
-        if move.piece_moved == 'wK':
+        if piece_moved == 'wK':
             self.current_castle_rights.white_queen_side = False
             self.current_castle_rights.white_king_side = False
-        elif move.piece_moved == 'bK':
+        elif piece_moved == 'bK':
             self.current_castle_rights.black_queen_side = False
             self.current_castle_rights.black_king_side = False
-        elif move.piece_moved == 'wR':
-            if move.start_row == 7:
-                if move.start_col == 0:  # left rook
-                    self.current_castle_rights.white_queen_side = False
-                elif move.start_col == 7:  # right rook
-                    self.current_castle_rights.white_king_side = False
-        elif move.piece_moved == 'bR':
-            if move.start_row == 0:
-                if move.start_col == 0:  # left rook
-                    self.current_castle_rights.black_queen_side = False
-                elif move.start_col == 7:  # right rook
-                    self.current_castle_rights.black_king_side = False
+        elif piece_moved == 'wR':
+            if start == 56:  # left rook
+                self.current_castle_rights.white_queen_side = False
+            elif start == 63:  # right rook
+                self.current_castle_rights.white_king_side = False
+        elif piece_moved == 'bR':
+            if start == 0:  # left rook
+                self.current_castle_rights.black_queen_side = False
+            elif start == 7:  # right rook
+                self.current_castle_rights.black_king_side = False
 
     def get_valid_moves(self) -> list[Move.Move]:
         """
         Returns a list of all valid moves for the current state of the game.
 
-        This method calls the get_all_possible_moves method to get all possible moves and filters out the invalid moves.
+        A pawn promotion is listed once, the piece is picked with self.promotion_choice
+        when the move is made.
 
         Args:
-            None+
+            None
 
         Returns:
             list[Move]: A list of all valid moves.
         """
+        return [Move.Move.from_code(code, self.board) for code in self.get_valid_move_codes()
+                if code >> 12 & 3 != Move.PROMOTION or code >> 14 == Move.QUEEN_PROMOTION]
+
+    def get_valid_move_codes(self) -> list[int]:
+        """
+        Returns the codes of all valid moves for the current state of the game.
+
+        This method calls the get_all_possible_moves method to get all possible moves and filters out the invalid moves.
+        Every promotion piece is a move of its own.
+
+        Args:
+            None
+
+        Returns:
+            list[int]: A list of all valid move codes.
+        """
         temp_castle_rights = Castle.CastleRights(
             self.current_castle_rights.white_king_side,
             self.current_castle_rights.black_king_side,
             self.current_castle_rights.white_queen_side,
             self.current_castle_rights.black_queen_side
         )
-        moves: list[Move.Move] = []
+        moves: list[int] = []
 
         self.in_check, self.pins, self.checks = self.check_pins_and_checks()
 
@@ -244,33 +578,21 @@ class GameState(ChessHelper.Helper,
                 moves = self.get_all_possible_moves()
                 # to block check you must move a piece into one of the squares between the enemy piece and the king
                 check: tuple[int] = self.checks[0]
-                valid_squares = []
-
-                check_row: int = check[0]
-                check_col: int = check[1]
-                piece_checking: int = self.board[check_row][check_col]
-                valid_squares: list[tuple[int, int]] = []
+                king_square = king_row * 8 + king_col
+                check_square = check[0] * 8 + check[1]
 
                 # if knight, must capture the knight or move your king, other pieces can be blocked
-                if piece_checking[1] == "N":
-                    valid_squares = [(check_row, check_col)]
-                else:
-                    for i in range(1, 8):
-                        # check[2] and check[3] are the direction of the checking piece.
-                        valid_square = (
-                            king_row + check[2] * i, king_col + check[3] * i)
-                        valid_squares.append(valid_square)
-
-                        # once you get to piece and check
-                        if valid_square[0] == check_row and valid_square[1] == check_col:
-                            break
+                # (a knight shares no line with the king, so nothing is between them)
+                valid_squares = SquareTables.BETWEEN[king_square][check_square] | 1 << check_square
 
                 for i in range(len(moves)-1, -1, -1):
+                    start, end = moves[i] & 63, moves[i] >> 6 & 63
                     # move doesn't move king so it must block or capture
-                    if moves[i].piece_moved[1] != "K":
-                        # move doesn't block or capture piece
-                        if not (moves[i].end_row, moves[i].end_col) in valid_squares:
-                            moves.remove(moves[i])
+                    if start != king_square:
+                        # move doesn't block or capture piece, en passant captures the pawn beside its end square
+                        if not valid_squares >> end & 1 and not (
+                                moves[i] >> 12 & 3 == Move.EN_PASSANT and valid_squares >> ((start & 56) | (end & 7)) & 1):
+                            del moves[i]
             else:
                 # double check, king has to move
                 self.get_king_moves(king_row, king_col, moves)
@@ -306,20 +628,69 @@ class GameState(ChessHelper.Helper,
         self.current_castle_rights = temp_castle_rights
         return moves
 
+    def get_move_generation_info(self) -> list[int]:
+        """
+        Prepare the staged move generation of the search, and set self.in_check.
+
+        The 8x8 generator can't generate captures alone, so this is the full list of valid
+        moves and get_noisy_move_codes/get_quiet_move_codes only split it.
+
+        Returns:
+            list[int]: What get_noisy_move_codes and get_quiet_move_codes need.
+        """
+        return self.get_valid_move_codes()
+
+    def get_noisy_move_codes(self, info: list[int]) -> list[int]:
+        """
+        Get the valid captures, en passant captures and promotions.
+
+        Args:
+            info (list[int]): The result of get_move_generation_info for this position.
+
+        Returns:
+            list[int]: The move codes.
+        """
+        return [code for code in info if self.is_noisy_code(code)]
+
+    def get_quiet_move_codes(self, info: list[int]) -> list[int]:
+        """
+        Get the valid moves that neither capture nor promote, castling included.
+
+        Args:
+            info (list[int]): The result of get_move_generation_info for this position.
+
+        Returns:
+            list[int]: The move codes.
+        """
+        return [code for code in info if not self.is_noisy_code(code)]
+
+    def is_legal_code(self, code: int, info: list[int]) -> bool:
+        """
+        Check if a move code, e.g. a hash move, is legal in the current position without
+        generating the other moves.
+
+        Args:
+            code (int): The move code.
+            info (list[int]): The result of get_move_generation_info for this position.
+
+        Returns:
+            bool: True if the move is legal.
+        """
+        return code in info
+
+    def is_noisy_code(self, code: int) -> bool:
+        """
+        Check if a move of the current position captures or promotes.
+        """
+        end = code >> 6 & 63
+        return code >> 12 & 3 in (Move.PROMOTION, Move.EN_PASSANT) or self.board[end >> 3][end & 7] != "--"
+
     def square_under_attack(self, row, col):
         """
         Determine if enemy can attack the square row col
         """
-        # switch to opponent's point of view
-        self.white_to_move = not self.white_to_move
-        opponents_moves = self.get_all_possible_moves()
-        self.white_to_move = not self.white_to_move
-
-        for move in opponents_moves:
-            if move.end_row == row and move.end_col == col:
-                # square is under attack
-                return True
-        return False
+        enemy_color = "b" if self.white_to_move else "w"
+        return self.get_attack_map(enemy_color)[row * 8 + col] > 0
 
     def check_pins_and_checks(self):
         pins = []  # squares pinned and the direction it's pinned from
@@ -337,63 +708,54 @@ class GameState(ChessHelper.Helper,
             start_row = self.black_king_location[0]
             start_col = self.black_king_location[1]
         # check outwards from king for pins and checks, keep track of pins
-        directions = ((-1, 0), (0, -1), (1, 0), (0, 1),
-                      (-1, -1), (-1, 1), (1, -1), (1, 1))
-        for j in range(len(directions)):
-            direction = directions[j]
+        board = self.board
+        king_square = start_row * 8 + start_col
+        rays = SquareTables.RAY_TARGETS[king_square]
+        for j in range(8):
+            direction = SquareTables.DIRECTIONS[j]
             possible_pin = ()  # reset possible pins
-            for i in range(1, 8):
-                end_row = start_row + direction[0] * i
-                end_col = start_col + direction[1] * i
-                if self.is_valid_position(end_row, end_col):
-                    end_piece = self.board[end_row][end_col]
-                    if end_piece[0] == ally_color and end_piece[1] != "K":
-                        if possible_pin == ():  # first allied piece could be pinned
-                            possible_pin = (end_row, end_col,
-                                            direction[0], direction[1])
-                        else:  # 2nd allied piece - no check or pin from this direction
+            for i, (end_row, end_col, _) in enumerate(rays[j], start=1):
+                end_piece = board[end_row][end_col]
+                if end_piece[0] == ally_color and end_piece[1] != "K":
+                    if possible_pin == ():  # first allied piece could be pinned
+                        possible_pin = (end_row, end_col,
+                                        direction[0], direction[1])
+                    else:  # 2nd allied piece - no check or pin from this direction
+                        break
+                elif end_piece[0] == enemy_color:
+                    enemy_type = end_piece[1]
+                    # 5 possibilities in this complex conditional
+                    # 1.) orthogonally away from king and piece is a rook
+                    # 2.) diagonally away from king and piece is a bishop
+                    # 3.) 1 square away diagonally from king and piece is a pawn
+                    # 4.) any direction and piece is a queen
+                    # 5.) any direction 1 square away and piece is a king
+                    if (0 <= j <= 3 and enemy_type == "R") or (4 <= j <= 7 and enemy_type == "B") or (i == 1 and enemy_type == "p" and ((enemy_color == "w" and 6 <= j <= 7) or (enemy_color == "b" and 4 <= j <= 5))) or (enemy_type == "Q") or (i == 1 and enemy_type == "K"):
+                        if possible_pin == ():  # no piece blocking, so check
+                            in_check = True
+                            checks.append(
+                                (end_row, end_col, direction[0], direction[1]))
                             break
-                    elif end_piece[0] == enemy_color:
-                        enemy_type = end_piece[1]
-                        # 5 possibilities in this complex conditional
-                        # 1.) orthogonally away from king and piece is a rook
-                        # 2.) diagonally away from king and piece is a bishop
-                        # 3.) 1 square away diagonally from king and piece is a pawn
-                        # 4.) any direction and piece is a queen
-                        # 5.) any direction 1 square away and piece is a king
-                        if (0 <= j <= 3 and enemy_type == "R") or (4 <= j <= 7 and enemy_type == "B") or (i == 1 and enemy_type == "p" and ((enemy_color == "w" and 6 <= j <= 7) or (enemy_color == "b" and 4 <= j <= 5))) or (enemy_type == "Q") or (i == 1 and enemy_type == "K"):
-                            if possible_pin == ():  # no piece blocking, so check
-                                in_check = True
-                                checks.append(
-                                    (end_row, end_col, direction[0], direction[1]))
-                                break
-                            else:  # piece blocking so pin
-                                pins.append(possible_pin)
-                                break
-                        else:  # enemy piece not applying checks
+                        else:  # piece blocking so pin
+                            pins.append(possible_pin)
                             break
-                else:
-                    break  # off board
+                    else:  # enemy piece not applying checks
+                        break
         # check for knight checks
-        knight_moves = ((-2, -1), (-2, 1), (-1, 2), (1, 2),
-                        (2, -1), (2, 1), (-1, -2), (1, -2))
-        for move in knight_moves:
-            end_row = start_row + move[0]
-            end_col = start_col + move[1]
-            if self.is_valid_position(end_row, end_col):
-                end_piece = self.board[end_row][end_col]
-                # enemy knight attacking a king
-                if end_piece[0] == enemy_color and end_piece[1] == "N":
-                    in_check = True
-                    checks.append((end_row, end_col, move[0], move[1]))
+        for end_row, end_col, _ in SquareTables.KNIGHT_TARGETS[king_square]:
+            end_piece = board[end_row][end_col]
+            # enemy knight attacking a king
+            if end_piece[0] == enemy_color and end_piece[1] == "N":
+                in_check = True
+                checks.append((end_row, end_col, end_row - start_row, end_col - start_col))
         return in_check, pins, checks
 
-    def get_all_possible_moves(self) -> list[Move.Move]:
+    def get_all_possible_moves(self) -> list[int]:
         """
         Get all possible and valid moves for the current state of the game.
 
         Returns:
-            list[Move]: A list of all possible and valid moves.
+            list[int]: The codes of all possible and valid moves.
         """
         moves = []
         for row in range(len(self.board)):
@@ -405,80 +767,80 @@ class GameState(ChessHelper.Helper,
                     self.move_functions[piece](row, col, moves)
         return moves
 
-    def get_pawn_moves(self, row: int, col: int, moves: list[Move.Move]) -> None:
+    def get_pawn_moves(self, row: int, col: int, moves: list[int]) -> None:
         """
         Generate valid moves for a pawn at a given position.
 
         Args:
         - row: int, the row of the pawn
         - col: int, the column of the pawn
-        - moves: list[Move], list of valid moves
+        - moves: list[int], list of valid move codes
 
         Returns:
         - None
         """
         self.pawn_moves(row, col, moves)
 
-    def get_rook_moves(self, row: int, col: int, moves: list[Move.Move]) -> None:
+    def get_rook_moves(self, row: int, col: int, moves: list[int]) -> None:
         """
         Generates possible moves for a rook at the given row and column and adds them to the moves list.
 
         Args:
             row (int): The row of the rook.
             col (int): The column of the rook.
-            moves (list[Move.Move]): The list of possible moves to be updated.
+            moves (list[int]): The list of possible moves to be updated.
 
         Returns:
             None
         """
         self.rook_moves(row, col, moves)
 
-    def get_knight_moves(self, row: int, col: int, moves: list[Move.Move]) -> None:
+    def get_knight_moves(self, row: int, col: int, moves: list[int]) -> None:
         """
         Get the knight moves for the given row and column, and update the list of moves accordingly.
 
         Args:
             start: A tuple representing the start position of the move.
             end: A tuple representing the end position of the move.
-            moves: A list of Move objects representing possible moves.
+            moves: A list of move codes representing possible moves.
 
         Returns:
             None
         """
         self.knight_moves(row, col, moves)
 
-    def get_bishop_moves(self, row: int, col: int, moves: list[Move.Move]) -> None:
+    def get_bishop_moves(self, row: int, col: int, moves: list[int]) -> None:
         """
         Get the bishop moves for the given row and column, and update the list of moves accordingly.
 
         Args:
             start: A tuple representing the start position of the move.
             end: A tuple representing the end position of the move.
-            moves: A list of Move objects representing possible moves.
+            moves: A list of move codes representing possible moves.
 
         Returns:
             None
         """
         self.bishop_moves(row, col, moves)
 
-    def get_queen_moves(self, row: int, col: int, moves: list[Move.Move]) -> None:
+    def get_queen_moves(self, row: int, col: int, moves: list[int]) -> None:
         """
         Get the queen moves for the given row and column, and update the list of moves accordingly.
 
         Args:
             start: A tuple representing the start position of the move.
             end: A tuple representing the end position of the move.
-            moves: A list of Move objects representing possible moves.
+            moves: A list of move codes representing possible moves.
 
         Returns:
             None
         """
-        # self.bishop_moves(row, col, moves)
-        # self.rook_moves(row, col, moves)
-        self.bishop_moves(row, col, moves)
+        # rook moves first: check_rook_pin keeps a queen's pin for the bishop moves,
+        # while check_pawn_bishop_knight_pin removes it
         self.rook_moves(row, col, moves)
+        self.bishop_moves(row, col, moves)
 
-    def get_king_moves(self, row: int, col: int, moves: list[Move.Move]) -> None:
+    def get_king_moves(self, row: int, col: int, moves: list[int]) -> None:
         """
         Get all the possible moves for the king at the given position and 
         update the moves array with the valid moves. The parameters are the 
@@ -486,32 +848,18 @@ class GameState(ChessHelper.Helper,
         This function does not return anything.
         """
         ally_color: str = "w" if self.white_to_move else "b"
-        row_moves: tuple[int] = (-1, -1, -1, 0, 0, 1, 1, 1)
-        col_moves: tuple[int] = (-1, 0, 1, -1, 1, -1, 0, 1)
 
-        for i in range(8):
-            end_row = row + row_moves[i]
-            end_col = col + col_moves[i]
+        # the enemy attack map already looks through the king, so it answers every destination
+        enemy_attacks = self.get_attack_map("b" if self.white_to_move else "w")
 
-            if self.is_valid_position(end_row, end_col):
-                end_piece = self.board[end_row][end_col]
-                if end_piece[0] != ally_color:
-                    # place king on end square and check for checks
-                    self.update_king_location(
-                        f"{ally_color}K", end_row, end_col)
+        start = row * 8 + col
+        for end_row, end_col, end in SquareTables.KING_TARGETS[start]:
+            end_piece = self.board[end_row][end_col]
+            # not an ally piece - empty or enemy, and not defended
+            if end_piece[0] != ally_color and enemy_attacks[end] == 0:
+                moves.append(Move.encode(start, end))
 
-                    in_check, pins, checks = self.check_pins_and_checks()
-
-                    # not an ally piece - empty or enemy
-                    if not in_check:
-                        moves.append(
-                            Move.Move((row, col), (end_row, end_col), self.board))
-
-                    # place king back on original location
-                    self.update_king_location(
-                        f"{ally_color}K", row, col)
-
-    def get_castle_moves(self, row: int, col: int, moves: list[Move.Move]) -> None:
+    def get_castle_moves(self, row: int, col: int, moves: list[int]) -> None:
         # if king in check
         if self.square_under_attack(row, col):
             return
@@ -522,24 +870,18 @@ class GameState(ChessHelper.Helper,
         if (self.white_to_move and self.current_castle_rights.white_queen_side) or (not self.white_to_move and self.current_castle_rights.black_queen_side):
             self.get_queen_side_castle_moves(row, col, moves)
 
-    def get_king_side_castle_moves(self, row: int, col: int, moves: list[Move.Move]):
+    def get_king_side_castle_moves(self, row: int, col: int, moves: list[int]):
         if self.board[row][col + 1] == "--" and self.board[row][col + 2] == "--":
 
             if self.square_under_attack(row, col + 1) or self.square_under_attack(row, col + 2):
                 return
 
-            moves.append((
-                Move.Move((row, col), (row, col + 2),
-                          self.board, is_castle_move=True)
-            ))
+            moves.append(Move.encode(row * 8 + col, row * 8 + col + 2, Move.CASTLE))
 
-    def get_queen_side_castle_moves(self, row: int, col: int, moves: list[Move.Move]):
+    def get_queen_side_castle_moves(self, row: int, col: int, moves: list[int]):
         if self.board[row][col - 1] == "--" and self.board[row][col - 2] == "--" and self.board[row][col - 3] == "--":
 
             if self.square_under_attack(row, col - 1) or self.square_under_attack(row, col - 2):
                 return
 
-            moves.append((
-                Move.Move((row, col), (row, col - 2),
-                          self.board, is_castle_move=True)
-            ))
+            moves.append(Move.encode(row * 8 + col, row * 8 + col - 2, Move.CASTLE))
@@ -0,0 +1,190 @@
+"""
+Static evaluation: material and piece-square scores.
+
+The tables are in pawns and position points, a position point is worth a tenth of a pawn.
+GameState keeps their sum for the current position as integer centipawns (see
+GameState.evaluation), updated by every make_move/undo_move, so the search reads it in O(1).
+"""
+
+PIECE_SCORE: dict[str, int] = {
+    "K": 0,
+    "Q": 9,
+    "R": 5,
+    "B": 3,
+    "N": 3,
+    "p": 1,
+}
+
+KNIGHT_SCORES: list[list[int]] = [
+    [1, 1, 1, 1, 1, 1, 1, 1],
+    [1, 2, 2, 2, 2, 2, 2, 1],
+    [1, 2, 3, 3, 3, 3, 2, 1],
+    [1, 2, 3, 4, 4, 3, 2, 1],
+    [1, 2, 3, 4, 4, 3, 2, 1],
+    [1, 2, 3, 3, 3, 3, 2, 1],
+    [1, 2, 2, 2, 2, 2, 2, 1],
+    [1, 1, 1, 1, 1, 1, 1, 1],
+]
+
+BISHOP_SCORES: list[list[int]] = [
+    [4, 3, 2, 1, 1, 2, 3, 4],
+    [3, 4, 3, 2, 2, 3, 4, 3],
+    [2, 4, 4, 3, 3, 4, 4, 2],
+    [1, 2, 4, 4, 4, 4, 2, 1],
+    [1, 2, 3, 4, 4, 3, 2, 1],
+    [2, 3, 4, 3, 3, 3, 3, 2],
+    [3, 4, 4, 4, 4, 4, 4, 3],
+    [4, 3, 3, 4, 4, 3, 3, 4],
+]
+
+QUEEN_SCORES: list[list[int]] = [
+    [1, 1, 1, 3, 1, 1, 1, 1],
+    [1, 2, 3, 3, 3, 1, 1, 1],
+    [1, 4, 3, 3, 3, 3, 2, 1],
+    [1, 2, 3, 3, 4, 3, 2, 1],
+    [1, 2, 3, 3, 3, 3, 2, 1],
+    [1, 4, 3, 3, 3, 3, 2, 1],
+    [1, 1, 2, 3, 3, 1, 1, 1],
+    [1, 1, 1, 3, 1, 1, 1, 1],
+]
+
+ROOK_SCORES: list[list[int]] = [
+    [4, 3, 4, 4, 4, 4, 3, 4],
+    [4, 4, 4, 4, 4, 4, 4, 4],
+    [1, 1, 2, 3, 3, 2, 1, 1],
+    [1, 2, 3, 4, 4, 3, 2, 1],
+    [1, 2, 3, 4, 4, 3, 2, 1],
+    [1, 1, 2, 2, 2, 2, 1, 1],
+    [4, 4, 4, 4, 4, 4, 4, 4],
+    [4, 3, 4, 4, 4, 4, 3, 4],
+]
+
+WHITE_PAWN_SCORES: list[list[int]] = [
+    [8, 8, 8, 8, 8, 8, 8, 8],
+    [8, 8, 8, 8, 8, 8, 8, 8],
+    [5, 6, 6, 7, 7, 6, 6, 5],
+    [2, 3, 3, 5, 5, 3, 3, 2],
+    [1, 2, 3, 4, 4, 3, 2, 1],
+    [1, 1, 2, 3, 3, 2, 1, 1],
+    [1, 1, 1, 0, 0, 1, 1, 1],
+    [0, 0, 0, 0, 0, 0, 0, 0],
+]
+
+BLACK_PAWN_SCORES: list[list[int]] = [
+    [0, 0, 0, 0, 0, 0, 0, 0],
+    [1, 1, 1, 0, 0, 1, 1, 1],
+    [1, 1, 2, 3, 3, 2, 1, 1],
+    [1, 2, 3, 4, 4, 3, 2, 1],
+    [2, 3, 3, 5, 5, 3, 3, 2],
+    [5, 6, 6, 7, 7, 6, 6, 5],
+    [8, 8, 8, 8, 8, 8, 8, 8],
+    [8, 8, 8, 8, 8, 8, 8, 8],
+]
+
+# KNIGHT_SCORES: list[list[int]] = [
+#     [0.0, 0.1, 0.2, 0.2, 0.2, 0.2, 0.1, 0.0],
+#     [0.1, 0.3, 0.5, 0.5, 0.5, 0.5, 0.3, 0.1],
+#     [0.2, 0.5, 0.6, 0.65, 0.65, 0.6, 0.5, 0.2],
+#     [0.2, 0.55, 0.65, 0.7, 0.7, 0.65, 0.55, 0.2],
+#     [0.2, 0.5, 0.65, 0.7, 0.7, 0.65, 0.5, 0.2],
+#     [0.2, 0.55, 0.6, 0.65, 0.65, 0.6, 0.55, 0.2],
+#     [0.1, 0.3, 0.5, 0.55, 0.55, 0.5, 0.3, 0.1],
+#     [0.0, 0.1, 0.2, 0.2, 0.2, 0.2, 0.1, 0.0]
+# ]
+
+# BISHOP_SCORES: list[list[int]] = [
+#     [0.0, 0.2, 0.2, 0.2, 0.2, 0.2, 0.2, 0.0],
+#     [0.2, 0.4, 0.4, 0.4, 0.4, 0.4, 0.4, 0.2],
+#     [0.2, 0.4, 0.5, 0.6, 0.6, 0.5, 0.4, 0.2],
+#     [0.2, 0.5, 0.5, 0.6, 0.6, 0.5, 0.5, 0.2],
+#     [0.2, 0.4, 0.6, 0.6, 0.6, 0.6, 0.4, 0.2],
+#     [0.2, 0.6, 0.6, 0.6, 0.6, 0.6, 0.6, 0.2],
+#     [0.2, 0.5, 0.4, 0.4, 0.4, 0.4, 0.5, 0.2],
+#     [0.0, 0.2, 0.2, 0.2, 0.2, 0.2, 0.2, 0.0]
+# ]
+
+# ROOK_SCORES: list[list[int]] = [
+#     [0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25],
+#     [0.5, 0.75, 0.75, 0.75, 0.75, 0.75, 0.75, 0.5],
+#     [0.0, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.0],
+#     [0.0, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.0],
+#     [0.0, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.0],
+#     [0.0, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.0],
+#     [0.0, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.0],
+#     [0.25, 0.25, 0.25, 0.5, 0.5, 0.25, 0.25, 0.25]
+# ]
+
+# QUEEN_SCORES: list[list[int]] = [
+#     [0.0, 0.2, 0.2, 0.3, 0.3, 0.2, 0.2, 0.0],
+#     [0.2, 0.4, 0.4, 0.4, 0.4, 0.4, 0.4, 0.2],
+#     [0.2, 0.4, 0.5, 0.5, 0.5, 0.5, 0.4, 0.2],
+#     [0.3, 0.4, 0.5, 0.5, 0.5, 0.5, 0.4, 0.3],
+#     [0.4, 0.4, 0.5, 0.5, 0.5, 0.5, 0.4, 0.3],
+#     [0.2, 0.5, 0.5, 0.5, 0.5, 0.5, 0.4, 0.2],
+#     [0.2, 0.4, 0.5, 0.4, 0.4, 0.4, 0.4, 0.2],
+#     [0.0, 0.2, 0.2, 0.3, 0.3, 0.2, 0.2, 0.0]
+# ]
+
+# PAWN_SCORES: list[list[int]] = [
+#     [0.8, 0.8, 0.8, 0.8, 0.8, 0.8, 0.8, 0.8],
+#     [0.7, 0.7, 0.7, 0.7, 0.7, 0.7, 0.7, 0.7],
+#     [0.3, 0.3, 0.4, 0.5, 0.5, 0.4, 0.3, 0.3],
+#     [0.25, 0.25, 0.3, 0.45, 0.45, 0.3, 0.25, 0.25],
+#     [0.2, 0.2, 0.2, 0.4, 0.4, 0.2, 0.2, 0.2],
+#     [0.25, 0.15, 0.1, 0.2, 0.2, 0.1, 0.15, 0.25],
+#     [0.25, 0.3, 0.3, 0.0, 0.0, 0.3, 0.3, 0.25],
+#     [0.2, 0.2, 0.2, 0.2, 0.2, 0.2, 0.2, 0.2]
+# ]
+
+PIECE_POSITION_SCORES: dict[str, list[list[int]]] = {
+    "N": KNIGHT_SCORES,
+    "B": BISHOP_SCORES,
+    "R": ROOK_SCORES,
+    "Q": QUEEN_SCORES,
+    # "p": PAWN_SCORES,
+    "wp": WHITE_PAWN_SCORES,
+    "bp": BLACK_PAWN_SCORES,
+}
+
+
+def _build_piece_square_values() -> dict[str, list[int]]:
+    """
+    Merge the material and position scores into one table per piece.
+
+    Returns:
+        dict[str, list[int]]: Centipawns per square (row * 8 + col), positive for white pieces.
+    """
+    values = {}
+    for color, sign in (("w", 1), ("b", -1)):
+        for piece in "KQRBNp":
+            position_scores = PIECE_POSITION_SCORES.get(
+                color + piece, PIECE_POSITION_SCORES.get(piece))
+            values[color + piece] = [
+                sign * (PIECE_SCORE[piece] * 100 +
+                        (position_scores[square >> 3][square & 7] * 10 if position_scores else 0))
+                for square in range(64)
+            ]
+    return values
+
+
+# PIECE_SQUARE_VALUES["wN"][square] is what a white knight on the square adds to the evaluation
+PIECE_SQUARE_VALUES: dict[str, list[int]] = _build_piece_square_values()
+
+
+def evaluate_board(board: list[str]) -> int:
+    """
+    Compute the evaluation of a board from scratch.
+
+    Args:
+        board (list[str]): The game board.
+
+    Returns:
+        int: The score in centipawns, positive is good for white.
+    """
+    score = 0
+    for row in range(8):
+        for col in range(8):
+            square = board[row][col]
+            if square != "--":
+                score += PIECE_SQUARE_VALUES[square][row * 8 + col]
+    return score
@@ -1,3 +1,52 @@
+# A move is packed into a 16-bit integer, which is what the move generators and the
+# search pass around:
+#   bits 0-5   start square (row * 8 + col)
+#   bits 6-11  end square
+#   bits 12-13 flag: NORMAL, PROMOTION, EN_PASSANT or CASTLE
+#   bits 14-15 promotion piece, index into PROMOTION_PIECES
+# Move objects are only built from these codes where the UI or an API caller needs one.
+NORMAL: int = 0
+PROMOTION: int = 1
+EN_PASSANT: int = 2
+CASTLE: int = 3
+PROMOTION_PIECES: str = "NBRQ"
+QUEEN_PROMOTION: int = 3
+
+
+def encode(start: int, end: int, flag: int = NORMAL, promotion: int = 0) -> int:
+    """
+    Pack a move into an integer.
+
+    Args:
+        start (int): The start square, row * 8 + col.
+        end (int): The end square, row * 8 + col.
+        flag (int): NORMAL, PROMOTION, EN_PASSANT or CASTLE.
+        promotion (int): Index of the promotion piece in PROMOTION_PIECES, 0 unless a promotion.
+
+    Returns:
+        int: The move code.
+    """
+    return start | end << 6 | flag << 12 | promotion << 14
+
+
+def code_notation(code: int) -> str:
+    """
+    Get the coordinate notation of a move code, e.g. "e2e4" or "b7b8n" for a promotion.
+
+    Args:
+        code (int): The move code.
+
+    Returns:
+        str: The move in coordinate notation.
+    """
+    start, end = code & 63, code >> 6 & 63
+    notation = "abcdefgh"[start & 7] + str(8 - (start >> 3)) + \
+        "abcdefgh"[end & 7] + str(8 - (end >> 3))
+    if code >> 12 & 3 == PROMOTION:
+        notation += PROMOTION_PIECES[code >> 14].lower()
+    return notation
+
+
 class Move:
     """
         Initializes an instance of the class.
@@ -40,27 +89,86 @@ class Move:
         for key, value in files_to_cols.items()
     }
 
+    __slots__ = ("start_row", "start_col", "end_row", "end_col", "piece_moved", "piece_captured",
+                 "is_pawn_promotion", "is_en_passant_move", "is_castle_move", "move_id", "code")
+
     def __init__(self, start_square: tuple, end_square: tuple, board: list[str], is_en_passant_move=False, is_pawn_promotion=False, is_castle_move=False) -> None:
-        self.start_row: int = start_square[0]
-        self.start_col: int = start_square[1]
-        self.end_row: int = end_square[0]
-        self.end_col: int = end_square[1]
-        self.piece_moved: str = board[self.start_row][self.start_col]
-        self.piece_captured: str = board[self.end_row][self.end_col]
-
-        # self.is_pawn_promotion: bool = (self.piece_moved == "wp" and self.end_row == 0) or (
-        #     self.piece_moved == "bp" and self.end_row == 7)
-        self.is_pawn_promotion: bool = is_pawn_promotion
-        self.is_en_passant_move: bool = is_en_passant_move
+        start = start_square[0] * 8 + start_square[1]
+        end = end_square[0] * 8 + end_square[1]
+        promotion = 0
+        if is_pawn_promotion:
+            # the piece is chosen when the move is made, see GameState.promotion_choice
+            flag, promotion = PROMOTION, QUEEN_PROMOTION
+        elif is_en_passant_move:
+            flag = EN_PASSANT
+        elif is_castle_move:
+            flag = CASTLE
+        else:
+            flag = NORMAL
+        self.set_fields(encode(start, end, flag, promotion), board[start_square[0]][start_square[1]],
+                        board[end_square[0]][end_square[1]])
+
+    @classmethod
+    def from_code(cls, code: int, board: list[str]) -> "Move":
+        """
+        Build the Move of a move code, before the move is made on the board.
+
+        Args:
+            code (int): The move code.
+            board (list[str]): The game board.
+
+        Returns:
+            Move: The move.
+        """
+        start, end = code & 63, code >> 6 & 63
+        return cls.from_record(code, board[start >> 3][start & 7], board[end >> 3][end & 7])
+
+    @classmethod
+    def from_record(cls, code: int, piece_moved: str, piece_captured: str) -> "Move":
+        """
+        Build a Move from a move code and the pieces it moved and captured, without a board.
+
+        Args:
+            code (int): The move code.
+            piece_moved (str): The piece on the start square.
+            piece_captured (str): The piece on the end square, "--" if empty.
+
+        Returns:
+            Move: The move.
+        """
+        move = cls.__new__(cls)
+        move.set_fields(code, piece_moved, piece_captured)
+        return move
+
+    def set_fields(self, code: int, piece_moved: str, piece_captured: str) -> None:
+        """
+        Fill in every attribute from the move code and the pieces involved.
+        """
+        start, end, flag = code & 63, code >> 6 & 63, code >> 12 & 3
+        self.code: int = code
+        self.start_row: int = start >> 3
+        self.start_col: int = start & 7
+        self.end_row: int = end >> 3
+        self.end_col: int = end & 7
+        self.piece_moved: str = piece_moved
+        self.piece_captured: str = piece_captured
+
+        self.is_pawn_promotion: bool = flag == PROMOTION
+        self.is_en_passant_move: bool = flag == EN_PASSANT
         if self.is_en_passant_move:
             self.piece_captured = "wp" if self.piece_moved == "bp" else "bp"
 
         # is castle move
-        self.is_castle_move: bool = is_castle_move
-        # Id
-        # The \ is not an operation, it is allow me to write the rest of code in a new line
-        self.move_id: int = self.start_row * 1000 + self.start_col * \
-            100 + self.end_row * 10 + self.end_col
+        self.is_castle_move: bool = flag == CASTLE
+        # Id, the start and end squares of the code
+        self.move_id: int = code & 0xFFF
+
+    @property
+    def promotion_piece(self) -> str:
+        """
+        The piece letter a promotion move promotes to ("Q", "R", "B" or "N"), None otherwise.
+        """
+        return PROMOTION_PIECES[self.code >> 14] if self.is_pawn_promotion else None
 
     def get_chess_notation(self) -> str:
         """
@@ -115,5 +223,6 @@ class Move:
             "is_pawn_promotion": self.is_pawn_promotion,
             "is_en_passant_move": self.is_en_passant_move,
             "is_castle_move": self.is_castle_move,
-            "move_id": self.move_id
+            "move_id": self.move_id,
+            "code": self.code,
         }
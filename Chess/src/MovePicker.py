@@ -0,0 +1,123 @@
+"""
+Staged move generation for the search.
+
+Alpha-beta often cuts a node off after its first one or two moves, so instead of
+generating and sorting every move up front the moves are handed out in stages:
+
+    1. the hash move of the transposition table
+    2. captures and promotions, most valuable victim / least valuable attacker first
+    3. killer moves, quiet moves that caused a cutoff at the same ply
+    4. the other quiet moves, by their history score: how often they caused cutoffs anywhere
+
+The hash move is only checked for legality, captures are generated once it didn't cut the
+node off, and quiet moves once the first three stages didn't.
+"""
+import src.Move as Move
+
+# order of the pieces for MVV-LVA, only the rank matters
+ORDER_VALUES: dict[str, int] = {"p": 1, "N": 2, "B": 3, "R": 4, "Q": 5, "K": 6}
+
+
+def capture_order(board: list[str], code: int) -> int:
+    """
+    Get the MVV-LVA sort key of a capture or promotion, higher is searched first.
+
+    Args:
+        board (list[str]): The game board, before the move is made.
+        code (int): The move code.
+
+    Returns:
+        int: The sort key.
+    """
+    start, end, flag = code & 63, code >> 6 & 63, code >> 12 & 3
+    attacker = board[start >> 3][start & 7][1]
+    # an en passant capture lands on an empty square, a quiet promotion captures nothing
+    victim = "p" if flag == Move.EN_PASSANT else board[end >> 3][end & 7][1]
+    score = ORDER_VALUES.get(victim, 0) * 8
+    if flag == Move.PROMOTION:
+        score += ORDER_VALUES[Move.PROMOTION_PIECES[code >> 14]] * 8
+    return score - ORDER_VALUES[attacker]
+
+
+def order_quiet_moves(quiet: list[int], killers: tuple[int], history: list[int]) -> list[int]:
+    """
+    Sort quiet moves: the killer moves first, then by history score.
+
+    Args:
+        quiet (list[int]): The quiet move codes, sorted in place.
+        killers (tuple[int]): Quiet moves that caused a cutoff at the same ply.
+        history (list[int]): Cutoff score per start/end pair (code & 0xFFF), or None.
+
+    Returns:
+        list[int]: The killer moves found in quiet, they are removed from it.
+    """
+    found = []
+    for killer in killers:
+        if killer in quiet:
+            quiet.remove(killer)
+            found.append(killer)
+    if history is not None:
+        quiet.sort(key=lambda code: history[code & 0xFFF], reverse=True)
+    return found
+
+
+def order_moves(game_state, moves: list[int], hash_move: int = None, killers: tuple[int] = (), history: list[int] = None) -> list[int]:
+    """
+    Sort a complete move list in the order staged_moves would yield it.
+
+    Args:
+        game_state (ChessEngine.GameState): The position of the moves.
+        moves (list[int]): Legal move codes of the position.
+        hash_move (int): The best move of a previous search of the position, or None.
+        killers (tuple[int]): Quiet moves that caused a cutoff at the same ply.
+        history (list[int]): Cutoff score per start/end pair (code & 0xFFF), or None.
+
+    Returns:
+        list[int]: The same moves, best candidates first.
+    """
+    board = game_state.board
+    noisy = [code for code in moves if code != hash_move and game_state.is_noisy_code(code)]
+    quiet = [code for code in moves if code != hash_move and not game_state.is_noisy_code(code)]
+    noisy.sort(key=lambda code: capture_order(board, code), reverse=True)
+    killer_moves = order_quiet_moves(quiet, killers, history)
+    return ([hash_move] if hash_move in moves else []) + noisy + killer_moves + quiet
+
+
+def staged_moves(game_state, hash_move: int = None, killers: tuple[int] = (), history: list[int] = None):
+    """
+    Yield the legal moves of the position, best candidates first.
+
+    The game state may be changed between two moves, as long as it is back in the
+    same position when the next move is asked for (make_move_code/undo_move).
+    self.in_check is set before the first move is yielded.
+
+    Args:
+        game_state (ChessEngine.GameState): The position to generate the moves of.
+        hash_move (int): The best move of a previous search of the position, or None.
+        killers (tuple[int]): Quiet moves that caused a cutoff at the same ply.
+        history (list[int]): Cutoff score per start/end pair (code & 0xFFF), or None.
+
+    Yields:
+        int: Legal move codes, each one once.
+    """
+    info = game_state.get_move_generation_info()
+
+    # the hash move often cuts the node off, before any other move is generated
+    if hash_move is not None:
+        if game_state.is_legal_code(hash_move, info):
+            yield hash_move
+        else:
+            hash_move = None
+
+    board = game_state.board
+    noisy = game_state.get_noisy_move_codes(info)
+    if hash_move in noisy:
+        noisy.remove(hash_move)
+    noisy.sort(key=lambda code: capture_order(board, code), reverse=True)
+    yield from noisy
+
+    quiet = game_state.get_quiet_move_codes(info)
+    if hash_move in quiet:
+        quiet.remove(hash_move)
+    yield from order_quiet_moves(quiet, killers, history)
+    yield from quiet
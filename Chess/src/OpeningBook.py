@@ -0,0 +1,318 @@
+"""
+An opening book in the style of Polyglot, and the builder that makes one.
+
+The book is a binary file of 16-byte entries, sorted by position:
+
+    key     8 bytes   Zobrist key of the position, see Zobrist.hash_position
+    move    2 bytes   move code, see Move.encode
+    weight  2 bytes   how often the move is played, relative to the other moves of the position
+    learn   4 bytes   unused, always 0
+
+all big-endian as in Polyglot. The keys and move codes are this engine's, so the book
+isn't compatible with Polyglot books. The file is memory-mapped and a position is found
+by binary search, it isn't read into memory. Build a book from the Chess folder:
+
+    python -m src.OpeningBook book.bin --db ../chess.db
+    python -m src.OpeningBook book.bin --pgn games.pgn --max-ply 16
+"""
+import argparse
+import json
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+import src.ChessEngine as ChessEngine
+import src.Move as Move
+import src.db as db
+
+ENTRY: struct.Struct = struct.Struct(">QHHI")
+
+# points of a game for the side that played a move, a move that only lost is left out
+RESULT_POINTS: dict[str, tuple[int, int]] = {
+    "1-0": (2, 0),
+    "0-1": (0, 2),
+    "1/2-1/2": (1, 1),
+}
+# an unknown or unfinished game counts for both sides
+UNKNOWN_RESULT_POINTS: tuple[int, int] = (1, 1)
+# the winner column of the games table, in PGN results
+DATABASE_RESULTS: dict[str, str] = {
+    "White": "1-0",
+    "Black": "0-1",
+    "Stalemate": "1/2-1/2",
+}
+
+SAN_PATTERN = re.compile(r"^([KQRBN])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([QRBN]))?$")
+
+
+class OpeningBook:
+    """
+    A book file, memory-mapped for reading.
+
+    Args:
+        path (str): The book file, as write_book made it.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        with open(path, "rb") as file:
+            self.entries: int = os.fstat(file.fileno()).st_size // ENTRY.size
+            # an empty file can't be mapped, it has no moves anyway
+            self.map: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if self.entries else None
+
+    def probe(self, key: int) -> list[tuple[int, int]]:
+        """
+        Find the moves of a position.
+
+        Args:
+            key (int): The Zobrist key of the position.
+
+        Returns:
+            list[tuple[int, int]]: The move codes and their weights, the highest weight first.
+        """
+        # the first entry with the key or a greater one
+        low, high = 0, self.entries
+        while low < high:
+            middle = (low + high) // 2
+            if struct.unpack_from(">Q", self.map, middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        moves = []
+        for index in range(low, self.entries):
+            entry_key, move, weight, _ = ENTRY.unpack_from(self.map, index * ENTRY.size)
+            if entry_key != key:
+                break
+            moves.append((move, weight))
+        return moves
+
+    def choose_move(self, game_state: ChessEngine.GameState, rng: random.Random = None) -> int:
+        """
+        Pick a book move of the position, at random in proportion to the weights.
+
+        Args:
+            game_state (ChessEngine.GameState): The position.
+            rng (random.Random): The random generator, None for the random module.
+
+        Returns:
+            int: The move code, None if the book has no legal move for the position.
+        """
+        moves = self.probe(game_state.zobrist_key)
+        if not moves:
+            return None
+        # another position can have the same key, only its legal moves are played
+        legal_moves = game_state.get_valid_move_codes()
+        moves = [(move, weight) for move, weight in moves if weight > 0 and move in legal_moves]
+        if not moves:
+            return None
+        return (rng or random).choices([move for move, _ in moves], [weight for _, weight in moves])[0]
+
+    def close(self) -> None:
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.entries = 0
+
+
+def write_book(path: str, weights: dict[tuple[int, int], int]) -> int:
+    """
+    Write a book file.
+
+    Args:
+        path (str): The file to write.
+        weights (dict[tuple[int, int], int]): The weight of every (key, move code) pair. They are
+            scaled down to fit in 16 bits if needed, pairs of weight 0 are left out.
+
+    Returns:
+        int: The number of entries written.
+    """
+    highest = max(weights.values(), default=0)
+    scale = 0xFFFF / highest if highest > 0xFFFF else 1
+    entries = sorted(
+        ((key, move, max(int(weight * scale), 1)) for (key, move), weight in weights.items() if weight > 0),
+        key=lambda entry: (entry[0], -entry[2], entry[1]))
+    with open(path, "wb") as file:
+        for key, move, weight in entries:
+            file.write(ENTRY.pack(key, move, weight, 0))
+    return len(entries)
+
+
+def add_game(weights: dict[tuple[int, int], int], moves: list, result: str, max_ply: int,
+             read_move, backend: str = "bitboard") -> None:
+    """
+    Add the first moves of a game to the weights of a book.
+
+    Args:
+        weights (dict[tuple[int, int], int]): The weights of write_book, updated.
+        moves (list): The moves of the game, in any form read_move understands.
+        result (str): "1-0", "0-1", "1/2-1/2", or anything else for an unknown result.
+        max_ply (int): Most moves of the game to add.
+        read_move: Turns a move of the game into a move code in the current position, None if it can't.
+        backend (str): The GameState backend the game is played on, "mailbox" or "bitboard".
+    """
+    game_state = ChessEngine.GameState(backend)
+    white_points, black_points = RESULT_POINTS.get(result, UNKNOWN_RESULT_POINTS)
+    for move in moves[:max_ply]:
+        code = read_move(game_state, move)
+        if code is None:
+            # the rest of the game can't be followed
+            break
+        pair = (game_state.zobrist_key, code)
+        weights[pair] = weights.get(pair, 0) + (white_points if game_state.white_to_move else black_points)
+        game_state.make_move_code(code)
+
+
+def read_logged_move(game_state: ChessEngine.GameState, logged_move: dict) -> int:
+    """
+    Find the move code of a move of the logs table, Move.__json__ made it.
+
+    Older logs have no code and no promotion piece, their promotions are taken as queen promotions.
+
+    Args:
+        game_state (ChessEngine.GameState): The position the move is played in.
+        logged_move (dict): The logged move.
+
+    Returns:
+        int: The move code, None if it isn't legal.
+    """
+    legal_moves = game_state.get_valid_move_codes()
+    if logged_move.get("code") in legal_moves:
+        return logged_move["code"]
+
+    start = logged_move["start_row"] * 8 + logged_move["start_col"]
+    end = logged_move["end_row"] * 8 + logged_move["end_col"]
+    matches = [code for code in legal_moves if code & 63 == start and code >> 6 & 63 == end]
+    if not matches:
+        return None
+    return max(matches, key=lambda code: code >> 12 & 3 == Move.PROMOTION and code >> 14 == Move.QUEEN_PROMOTION)
+
+
+def read_san_move(game_state: ChessEngine.GameState, san: str) -> int:
+    """
+    Find the move code of a move in standard algebraic notation, e.g. "Nbd7", "exd5", "e8=Q+" or "O-O".
+
+    Args:
+        game_state (ChessEngine.GameState): The position the move is played in.
+        san (str): The move.
+
+    Returns:
+        int: The move code, None if the move isn't legal or can't be read.
+    """
+    san = san.rstrip("+#!?")
+    legal_moves = game_state.get_valid_move_codes()
+    board = game_state.board
+    if san in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        king_side = len(san) == 3
+        for code in legal_moves:
+            if code >> 12 & 3 == Move.CASTLE and ((code >> 6 & 7) > (code & 7)) == king_side:
+                return code
+        return None
+
+    match = SAN_PATTERN.match(san)
+    if match is None:
+        return None
+    piece, start_file, start_rank, end_square, promotion = match.groups()
+    piece = piece or "p"
+    end = Move.Move.ranks_to_rows[end_square[1]] * 8 + Move.Move.files_to_cols[end_square[0]]
+    matches = []
+    for code in legal_moves:
+        start = code & 63
+        if code >> 6 & 63 != end or board[start >> 3][start & 7][1] != piece:
+            continue
+        if start_file is not None and start & 7 != Move.Move.files_to_cols[start_file]:
+            continue
+        if start_rank is not None and start >> 3 != Move.Move.ranks_to_rows[start_rank]:
+            continue
+        if code >> 12 & 3 == Move.PROMOTION and Move.PROMOTION_PIECES[code >> 14] != (promotion or "Q"):
+            continue
+        matches.append(code)
+    return matches[0] if len(matches) == 1 else None
+
+
+def read_database_games(db_location: str = None) -> list[tuple[list[dict], str]]:
+    """
+    Read the games stored by the game.
+
+    Args:
+        db_location (str): The database file, None for chess.db in the working directory.
+
+    Returns:
+        list[tuple[list[dict], str]]: The logged moves and the PGN result of every game.
+    """
+    database = db.Database(db_location)
+    with database:
+        rows = database.get_games_moves()
+    return [(json.loads(moves), DATABASE_RESULTS.get(winner, "*")) for moves, winner in rows]
+
+
+def read_pgn_games(path: str) -> list[tuple[list[str], str]]:
+    """
+    Read the games of a PGN file, from the start position only.
+
+    Comments, variations and annotation glyphs are skipped, games set up from a FEN are left out.
+
+    Args:
+        path (str): The PGN file.
+
+    Returns:
+        list[tuple[list[str], str]]: The moves in standard algebraic notation and the result of every game.
+    """
+    with open(path, encoding="utf-8", errors="replace") as file:
+        text = file.read()
+
+    games = []
+    # a game is its tag pairs followed by its movetext
+    for chunk in re.split(r"\n\s*\n(?=\[)", text):
+        tags = dict(re.findall(r'^\[(\w+)\s+"(.*)"\]\s*$', chunk, re.MULTILINE))
+        if "FEN" in tags:
+            continue
+        movetext = re.sub(r"^\[.*\]\s*$", "", chunk, flags=re.MULTILINE)
+        movetext = re.sub(r"\{[^}]*\}|;[^\n]*", " ", movetext)
+        while "(" in movetext:
+            movetext, count = re.subn(r"\([^()]*\)", " ", movetext)
+            if count == 0:
+                break
+        moves = [token for token in re.sub(r"\$\d+|\d+\.(\.\.)?", " ", movetext).split()
+                 if token not in ("1-0", "0-1", "1/2-1/2", "*")]
+        if moves:
+            games.append((moves, tags.get("Result", "*")))
+    return games
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.OpeningBook", description="Build an opening book from played games.")
+    parser.add_argument("book", help="book file to write")
+    parser.add_argument("--db", nargs="?", const="", metavar="DATABASE",
+                        help="add the games of the game's database, chess.db in the working directory by default")
+    parser.add_argument("--pgn", action="append", default=[], metavar="FILE",
+                        help="add the games of a PGN file, may be given more than once")
+    parser.add_argument("--max-ply", type=int, default=20,
+                        help="most moves of a game to add (default 20)")
+    parser.add_argument("--backend", choices=ChessEngine.GameState.BACKENDS,
+                        default="bitboard")
+    args = parser.parse_args(argv)
+    if args.db is None and not args.pgn:
+        parser.error("no games, give --db or --pgn")
+
+    weights = {}
+    games = 0
+    if args.db is not None:
+        for moves, result in read_database_games(args.db or None):
+            add_game(weights, moves, result, args.max_ply, read_logged_move, args.backend)
+            games += 1
+    for path in args.pgn:
+        for moves, result in read_pgn_games(path):
+            add_game(weights, moves, result, args.max_ply, read_san_move, args.backend)
+            games += 1
+
+    entries = write_book(args.book, weights)
+    print(f"{games} games, {entries} entries written to {args.book}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,7 +10,7 @@ class Pawn():
             pins (list): List of pinned pieces on the board.
             row (int): The row on the chessboard where the pawn is located.
             col (int): The column on the chessboard where the pawn is located.
-            moves (list): List to store the valid moves for the pawn.
+            moves (list): List to store the valid move codes for the pawn.
 
         Returns:
             None
@@ -37,24 +37,25 @@ class Pawn():
 
         pawn_promotion = False
         if self.board[row + move_amount][col] == "--":  # 1 square pawn advance
-            if not piece_pinned or pin_direction == (move_amount, 0):
+            # a pawn pinned along its file can still move along it
+            if not piece_pinned or pin_direction in ((move_amount, 0), (-move_amount, 0)):
                 if row + move_amount == back_row:
                     pawn_promotion = True
-                moves.append(
-                    Move.Move((row, col), (row + move_amount, col), self.board, is_pawn_promotion=pawn_promotion))
+                self.add_pawn_move(row * 8 + col, (row + move_amount) * 8 + col,
+                                   pawn_promotion, moves)
 
                 # 2 square pawn advance
                 if row == start_row and self.board[row + 2 * move_amount][col] == "--":
                     moves.append(
-                        Move.Move((row, col), (row + 2 * move_amount, col), self.board))
+                        Move.encode(row * 8 + col, (row + 2 * move_amount) * 8 + col))
         if col - 1 >= 0:  # capture to the left
             if not piece_pinned or pin_direction == (move_amount, -1):
                 if row + move_amount == back_row:
                     pawn_promotion = True
 
                 if self.board[row + move_amount][col - 1][0] == enemy_color:
-                    moves.append(
-                        Move.Move((row, col), (row + move_amount, col - 1), self.board, is_pawn_promotion=pawn_promotion))
+                    self.add_pawn_move(row * 8 + col, (row + move_amount) * 8 + col - 1,
+                                       pawn_promotion, moves)
 
                 if (row + move_amount, col - 1) == self.en_passant_possible:
                     attacking_piece = blocking_piece = False
@@ -69,16 +70,19 @@ class Pawn():
                         for c in inside_range:
                             if self.board[row][c] != "--":
                                 blocking_piece = True
+                        # only the first piece behind the pawns matters
                         for c in outer_range:
                             square = self.board[row][c]
                             if square[0] == enemy_color and (square[1] in ["R", "Q"]):
                                 attacking_piece = True
+                                break
                             elif square != "--":
                                 blocking_piece = True
+                                break
 
                     if not attacking_piece or blocking_piece:
-                        moves.append(
-                            Move.Move((row, col), (row + move_amount, col - 1), self.board, is_en_passant_move=True))
+                        moves.append(Move.encode(
+                            row * 8 + col, (row + move_amount) * 8 + col - 1, Move.EN_PASSANT))
 
         if col + 1 <= 7:  # capture to the right
             if not piece_pinned or pin_direction == (move_amount, +1):
@@ -86,8 +90,8 @@ class Pawn():
                     pawn_promotion = True
 
                 if self.board[row + move_amount][col + 1][0] == enemy_color:
-                    moves.append(
-                        Move.Move((row, col), (row + move_amount, col + 1), self.board, is_pawn_promotion=pawn_promotion))
+                    self.add_pawn_move(row * 8 + col, (row + move_amount) * 8 + col + 1,
+                                       pawn_promotion, moves)
 
                 if (row + move_amount, col + 1) == self.en_passant_possible:
                     attacking_piece = blocking_piece = False
@@ -102,13 +106,33 @@ class Pawn():
                         for c in inside_range:
                             if self.board[row][c] != "--":
                                 blocking_piece = True
+                        # only the first piece behind the pawns matters
                         for c in outer_range:
                             square = self.board[row][c]
                             if square[0] == enemy_color and (square[1] in ["R", "Q"]):
                                 attacking_piece = True
+                                break
                             elif square != "--":
                                 blocking_piece = True
+                                break
 
                     if not attacking_piece or blocking_piece:
-                        moves.append(
-                            Move.Move((row, col), (row + move_amount,  col + 1), self.board, is_en_passant_move=True))
+                        moves.append(Move.encode(
+                            row * 8 + col, (row + move_amount) * 8 + col + 1, Move.EN_PASSANT))
+
+    @staticmethod
+    def add_pawn_move(start: int, end: int, is_promotion: bool, moves: list[int]) -> None:
+        """
+        Add a pawn move, a promotion is added once for every piece the pawn can become.
+
+        Args:
+            start (int): The start square, row * 8 + col.
+            end (int): The end square, row * 8 + col.
+            is_promotion (bool): Whether the pawn reaches the last row.
+            moves (list[int]): The list of move codes to be updated.
+        """
+        if is_promotion:
+            for piece in range(len(Move.PROMOTION_PIECES)):
+                moves.append(Move.encode(start, end, Move.PROMOTION, piece))
+        else:
+            moves.append(Move.encode(start, end))
@@ -1,37 +1,35 @@
 import src.Move as Move
+import src.SquareTables as SquareTables
 
 
 class Rook():
     def rook_moves(self, row, col, moves):
         piece_pinned, pin_direction = self.check_rook_pin(self.pins, row, col)
 
-        # Define directions for possible rook moves
-        directions = ((-1, 0), (0, -1), (1, 0), (0, 1))
         enemy_color = "b" if self.white_to_move else "w"
-
-        for direction in directions:
-            for i in range(1, 8):
-                end_row = row + direction[0] * i
-                end_col = col + direction[1] * i
-
-                if not self.is_valid_position(end_row, end_col):
+        board = self.board
+        start = row * 8 + col
+        rays = SquareTables.RAY_TARGETS[start]
+
+        # up, left, down, right
+        for direction in SquareTables.ORTHOGONAL:
+            row_step, col_step = SquareTables.DIRECTIONS[direction]
+            # Check if the rook is not pinned, or if the move is in the direction of the pin, or if the move is in the opposite direction of the pin
+            if piece_pinned and pin_direction != (row_step, col_step) and pin_direction != (-row_step, -col_step):
+                continue
+
+            for end_row, end_col, end in rays[direction]:
+                end_piece = board[end_row][end_col]
+
+                # empty space is valid
+                if end_piece == "--":
+                    moves.append(Move.encode(start, end))
+
+                elif end_piece[0] == enemy_color:  # capture enemy piece
+                    moves.append(Move.encode(start, end))
+                    break
+                else:  # friendly piece
                     break
-
-                # Check if the rook is not pinned, or if the move is in the direction of the pin, or if the move is in the opposite direction of the pin
-                if not piece_pinned or pin_direction == direction or pin_direction == (-direction[0], -direction[1]):
-                    end_piece = self.board[end_row][end_col]
-
-                    # empty space is valid
-                    if end_piece == "--":
-                        moves.append(
-                            Move.Move((row, col), (end_row, end_col), self.board))
-
-                    elif end_piece[0] == enemy_color:  # capture enemy piece
-                        moves.append(
-                            Move.Move((row, col), (end_row, end_col), self.board))
-                        break
-                    else:  # friendly piece
-                        break
 
     def check_rook_pin(self, pins, row, col):
         piece_pinned = False
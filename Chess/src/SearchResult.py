@@ -0,0 +1,49 @@
+import src.Move as Move
+
+
+class SearchResult:
+    """
+    The outcome of one ChessAI search.
+
+    Args:
+        best_move (int): The code of the move to play, None if there is no legal move.
+        score (int): Its score in centipawns, from the side to move's point of view.
+        depth (int): The depth of the last completed iteration.
+        principal_variation (list[int]): The move codes of the expected line of play, best move first.
+        nodes (int): Nodes searched, quiescence nodes included.
+        elapsed (float): Seconds the search took.
+        statistics (dict): What the search did, see ChessAI.get_statistics.
+    """
+
+    def __init__(self, best_move: int = None, score: int = 0, depth: int = 0,
+                 principal_variation: list[int] = None, nodes: int = 0, elapsed: float = 0.0,
+                 statistics: dict = None) -> None:
+        self.best_move: int = best_move
+        self.score: int = score
+        self.depth: int = depth
+        self.principal_variation: list[int] = principal_variation or []
+        self.nodes: int = nodes
+        self.elapsed: float = elapsed
+        self.statistics: dict = statistics or {}
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def get_move(self, board: list[list[str]]) -> Move.Move:
+        """
+        Build the Move of best_move on the board of the searched position, None if there is none.
+        """
+        return None if self.best_move is None else Move.Move.from_code(self.best_move, board)
+
+    def __json__(self) -> dict:
+        return {
+            "best_move": None if self.best_move is None else Move.code_notation(self.best_move),
+            "score": self.score,
+            "depth": self.depth,
+            "principal_variation": [Move.code_notation(code) for code in self.principal_variation],
+            "nodes": self.nodes,
+            "elapsed": self.elapsed,
+            "nodes_per_second": self.nodes_per_second,
+            "statistics": self.statistics,
+        }
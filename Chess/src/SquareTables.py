@@ -0,0 +1,118 @@
+# Lookup tables computed once at import, so the move generators never step off the
+# board or check bounds in their loops.
+#
+# A square is indexed as row * 8 + col, so bit 0 is a8 and bit 63 is h1.
+# This keeps the bitboards in the same orientation as GameState.board.
+# The *_TARGETS tables list (end_row, end_col, end_square) for the 8x8 generators,
+# the bitboard tables hold the same squares as one integer mask.
+
+# Same order as GameState.check_pins_and_checks: 0-3 orthogonal, 4-7 diagonal
+DIRECTIONS: tuple[tuple[int, int]] = ((-1, 0), (0, -1), (1, 0), (0, 1),
+                                      (-1, -1), (-1, 1), (1, -1), (1, 1))
+ORTHOGONAL: tuple[int] = (0, 1, 2, 3)
+DIAGONAL: tuple[int] = (4, 5, 6, 7)
+
+# True when stepping in this direction increases the square index
+POSITIVE: tuple[bool] = tuple(dr * 8 + dc > 0 for dr, dc in DIRECTIONS)
+
+KNIGHT_OFFSETS: tuple[tuple[int, int]] = ((-2, -1), (-2, 1), (-1, 2), (1, 2),
+                                          (2, -1), (2, 1), (-1, -2), (1, -2))
+
+
+def _build_leaper_targets(offsets: tuple[tuple[int, int]]) -> list[tuple[tuple[int, int, int]]]:
+    """
+    Build the squares a piece that jumps by fixed offsets (knight, king, pawn) reaches.
+
+    Args:
+        offsets (tuple[tuple[int, int]]): The (row, col) offsets the piece can jump to.
+
+    Returns:
+        list[tuple[tuple[int, int, int]]]: The (end_row, end_col, end_square) targets of every square.
+    """
+    targets = []
+    for square in range(64):
+        row, col = divmod(square, 8)
+        square_targets = []
+        for row_offset, col_offset in offsets:
+            end_row, end_col = row + row_offset, col + col_offset
+            if 0 <= end_row < 8 and 0 <= end_col < 8:
+                square_targets.append((end_row, end_col, end_row * 8 + end_col))
+        targets.append(tuple(square_targets))
+    return targets
+
+
+def _build_ray_targets() -> list[tuple[tuple[tuple[int, int, int]]]]:
+    """
+    Build the squares along every direction of every square, nearest first.
+
+    Returns:
+        list: ray_targets[square][direction] is a tuple of (end_row, end_col, end_square).
+    """
+    ray_targets = []
+    for square in range(64):
+        row, col = divmod(square, 8)
+        square_rays = []
+        for row_step, col_step in DIRECTIONS:
+            ray = []
+            end_row, end_col = row + row_step, col + col_step
+            while 0 <= end_row < 8 and 0 <= end_col < 8:
+                ray.append((end_row, end_col, end_row * 8 + end_col))
+                end_row += row_step
+                end_col += col_step
+            square_rays.append(tuple(ray))
+        ray_targets.append(tuple(square_rays))
+    return ray_targets
+
+
+def _to_mask(targets: tuple[tuple[int, int, int]]) -> int:
+    """
+    Turn a tuple of (end_row, end_col, end_square) into a bitboard.
+    """
+    mask = 0
+    for _, _, square in targets:
+        mask |= 1 << square
+    return mask
+
+
+def _build_between_and_line() -> tuple[list[list[int]], list[list[int]]]:
+    """
+    Build the masks of the squares between two squares, and of the line through them.
+
+    Both are 0 when the squares don't share a row, column or diagonal.
+
+    Returns:
+        tuple: between[a][b] excludes a and b, line[a][b] runs from edge to edge.
+    """
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    for square in range(64):
+        for direction in range(8):
+            ray = RAY_TARGETS[square][direction]
+            opposite = DIRECTIONS.index(
+                (-DIRECTIONS[direction][0], -DIRECTIONS[direction][1]))
+            full_line = RAYS[direction][square] | RAYS[opposite][square] | 1 << square
+            mask = 0
+            for _, _, end in ray:
+                between[square][end] = mask
+                line[square][end] = full_line
+                mask |= 1 << end
+    return between, line
+
+
+RAY_TARGETS: list[tuple[tuple[tuple[int, int, int]]]] = _build_ray_targets()
+KNIGHT_TARGETS: list[tuple[tuple[int, int, int]]] = _build_leaper_targets(KNIGHT_OFFSETS)
+KING_TARGETS: list[tuple[tuple[int, int, int]]] = _build_leaper_targets(DIRECTIONS)
+
+# RAYS[direction][square] is the bitboard of the ray, excluding the square itself
+RAYS: list[list[int]] = [
+    [_to_mask(RAY_TARGETS[square][direction]) for square in range(64)]
+    for direction in range(8)
+]
+KNIGHT_ATTACKS: list[int] = [_to_mask(targets) for targets in KNIGHT_TARGETS]
+KING_ATTACKS: list[int] = [_to_mask(targets) for targets in KING_TARGETS]
+PAWN_ATTACKS: dict[str, list[int]] = {
+    "w": [_to_mask(targets) for targets in _build_leaper_targets(((-1, -1), (-1, 1)))],
+    "b": [_to_mask(targets) for targets in _build_leaper_targets(((1, -1), (1, 1)))],
+}
+
+BETWEEN, LINE = _build_between_and_line()
@@ -0,0 +1,593 @@
+"""
+Endgame tablebases: the exact result of every position with few pieces, and its distance to mate.
+
+The tables are built here by retrograde analysis: the checkmates are found first,
+then every position that mates in one ply, every position that can't avoid them,
+and so on backwards until nothing changes; what is left is a draw. Captures lead
+to the tables with one piece less, which are built first. Only endings without
+pawns are built, so the board has 8 symmetries: the white king is always moved
+into the triangle a8-d8-d5 and a table has 2 * 10 * 64^(pieces - 1) positions.
+
+A table is a file of one byte per position, "KQvKR.dtm" for king and queen
+against king and rook, white to move first. A byte is the result for the side to
+move: 0 a draw (or not a position), 1 to 127 a mate in that many plies, and
+128 + n being mated in n plies. The files are memory-mapped to probe them. Build
+them offline from the Chess folder, every 4-piece table takes a few minutes:
+
+    python -m src.Tablebase ../tablebases            # every 3 and 4-piece table
+    python -m src.Tablebase ../tablebases KQvK KRvK
+"""
+import argparse
+import mmap
+import os
+import sys
+import time
+import src.ChessEngine as ChessEngine
+import src.Zobrist as Zobrist
+
+# the pieces of a table other than the kings, strongest first
+PIECE_ORDER: str = "QRBN"
+MAX_PIECES: int = 4
+LOSS: int = 128
+DRAW: tuple[int, int] = (0, 0)
+
+# squares of the white king, (row, col) with col <= row <= 3
+TRIANGLE: list[int] = [row * 8 + col for row in range(4) for col in range(row + 1)]
+TRIANGLE_INDEX: dict[int, int] = {square: index for index, square in enumerate(TRIANGLE)}
+
+
+def _build_transforms() -> list[list[int]]:
+    """
+    Build the 8 symmetries of a board without pawns: mirrors of the rows, the columns and the diagonal.
+
+    Returns:
+        list[list[int]]: For every symmetry, the square every square goes to.
+    """
+    transforms = []
+    for flip_rows in (False, True):
+        for flip_cols in (False, True):
+            for transpose in (False, True):
+                transform = []
+                for square in range(64):
+                    row, col = square >> 3, square & 7
+                    row = 7 - row if flip_rows else row
+                    col = 7 - col if flip_cols else col
+                    if transpose:
+                        row, col = col, row
+                    transform.append(row * 8 + col)
+                transforms.append(transform)
+    return transforms
+
+
+TRANSFORMS: list[list[int]] = _build_transforms()
+# the symmetries that move a white king square into the triangle, two on the diagonal
+CANONICAL_TRANSFORMS: list[list[list[int]]] = [
+    [transform for transform in TRANSFORMS if transform[square] in TRIANGLE_INDEX]
+    for square in range(64)
+]
+
+
+def _build_rays() -> dict[str, list[list[list[int]]]]:
+    """
+    Build the squares every piece moves along from every square, a ray ends at the first piece on it.
+
+    Returns:
+        dict[str, list[list[list[int]]]]: For every piece letter and square, the list of rays.
+            A king or a knight has one ray of one square per step.
+    """
+    orthogonal = ((-1, 0), (1, 0), (0, -1), (0, 1))
+    diagonal = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+    knight = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+    directions = {"R": orthogonal, "B": diagonal, "Q": orthogonal + diagonal,
+                  "K": orthogonal + diagonal, "N": knight}
+    rays = {}
+    for piece, steps in directions.items():
+        rays[piece] = []
+        for square in range(64):
+            square_rays = []
+            for row_step, col_step in steps:
+                ray = []
+                row, col = (square >> 3) + row_step, (square & 7) + col_step
+                while 0 <= row < 8 and 0 <= col < 8:
+                    ray.append(row * 8 + col)
+                    if piece in "KN":
+                        break
+                    row, col = row + row_step, col + col_step
+                if ray:
+                    square_rays.append(ray)
+            rays[piece].append(square_rays)
+    return rays
+
+
+RAYS: dict[str, list[list[list[int]]]] = _build_rays()
+# the squares a king or a knight attacks
+STEP_TARGETS: dict[str, list[set[int]]] = {
+    piece: [{ray[0] for ray in RAYS[piece][square]} for square in range(64)] for piece in "KN"
+}
+
+
+def _build_lines() -> tuple[list[int], list[int]]:
+    """
+    Build the line between every two squares, for the attacks of the sliding pieces.
+
+    Returns:
+        tuple[list[int], list[int]]: Indexed by from * 64 + to: 1 if the squares are on a rank or
+            a file, 2 on a diagonal, 0 otherwise, and the bitboard of the squares in between.
+    """
+    lines = [0] * 4096
+    between = [0] * 4096
+    for piece, line in (("R", 1), ("B", 2)):
+        for square in range(64):
+            for ray in RAYS[piece][square]:
+                squares_between = 0
+                for target in ray:
+                    lines[square * 64 + target] = line
+                    between[square * 64 + target] = squares_between
+                    squares_between |= 1 << target
+    return lines, between
+
+
+LINES, BETWEEN = _build_lines()
+
+
+def get_layout(name: str) -> list[str]:
+    """
+    Get the pieces of a table in the order of its index: the white king, the black king,
+    the other white pieces and the other black pieces, strongest first.
+
+    Args:
+        name (str): The table, e.g. "KQvKR".
+
+    Returns:
+        list[str]: The pieces, e.g. ["wK", "bK", "wQ", "bR"].
+    """
+    white, black = name.split("v")
+    return ["wK", "bK"] + ["w" + piece for piece in white[1:]] + ["b" + piece for piece in black[1:]]
+
+
+def piece_sort_key(piece: str) -> tuple[int, int, int]:
+    """
+    Sort the pieces of a position in the order of get_layout.
+    """
+    return (piece[1] != "K", piece[0] == "b", PIECE_ORDER.find(piece[1]))
+
+
+class Table:
+    """
+    One table, its bytes and how to find a position in them.
+
+    Args:
+        name (str): The table, e.g. "KQvKR".
+        data: One byte per position, a bytearray or a memory map of the file.
+    """
+
+    def __init__(self, name: str, data) -> None:
+        self.name: str = name
+        self.data = data
+        self.layout: list[str] = get_layout(name)
+        # two pieces of the same kind can swap squares, the lower square goes first
+        self.duplicates: list[int] = [
+            index for index in range(2, len(self.layout) - 1) if self.layout[index] == self.layout[index + 1]]
+        self.stride: int = len(TRIANGLE) * 64 ** (len(self.layout) - 1)
+        self.size: int = 2 * self.stride
+
+    def get_index(self, squares: list[int], white_to_move: bool) -> int:
+        """
+        Find the index of a position, after the symmetry that moves the white king into the triangle.
+
+        On the diagonal of the triangle two symmetries do, the lower index is the position's.
+
+        Args:
+            squares (list[int]): The squares of the pieces, in the order of the layout.
+            white_to_move (bool): The side to move.
+
+        Returns:
+            int: The index of the position.
+        """
+        best_index = None
+        for transform in CANONICAL_TRANSFORMS[squares[0]]:
+            mapped = [transform[square] for square in squares]
+            for duplicate in self.duplicates:
+                if mapped[duplicate] > mapped[duplicate + 1]:
+                    mapped[duplicate], mapped[duplicate + 1] = mapped[duplicate + 1], mapped[duplicate]
+            index = TRIANGLE_INDEX[mapped[0]]
+            for square in mapped[1:]:
+                index = index * 64 + square
+            if best_index is None or index < best_index:
+                best_index = index
+        return best_index if white_to_move else self.stride + best_index
+
+    def get_position(self, index: int) -> tuple[list[int], bool]:
+        """
+        Find the position of an index, the inverse of get_index for the positions it returns.
+
+        Returns:
+            tuple[list[int], bool]: The squares of the pieces and the side to move.
+        """
+        black_to_move, index = divmod(index, self.stride)
+        squares = []
+        for _ in range(len(self.layout) - 1):
+            index, square = divmod(index, 64)
+            squares.append(square)
+        squares.append(TRIANGLE[index])
+        squares.reverse()
+        return squares, not black_to_move
+
+    def probe(self, squares: list[int], white_to_move: bool) -> tuple[int, int]:
+        """
+        Look a position up.
+
+        Args:
+            squares (list[int]): The squares of the pieces, in the order of the layout.
+            white_to_move (bool): The side to move.
+
+        Returns:
+            tuple[int, int]: 1 if the side to move wins, -1 if it loses, 0 for a draw,
+                and the plies to mate.
+        """
+        value = self.data[self.get_index(squares, white_to_move)]
+        if value >= LOSS:
+            return -1, value - LOSS
+        return (1, value) if value else DRAW
+
+
+class Tablebase:
+    """
+    The tables of a folder, memory-mapped.
+
+    Args:
+        directory (str): The folder the tables were built in, None for no tables yet.
+    """
+
+    def __init__(self, directory: str = None) -> None:
+        self.tables: dict[str, Table] = {}
+        # most pieces of a table
+        self.max_pieces: int = 0
+        if directory is not None and os.path.isdir(directory):
+            for file_name in sorted(os.listdir(directory)):
+                name, extension = os.path.splitext(file_name)
+                if extension == ".dtm":
+                    with open(os.path.join(directory, file_name), "rb") as file:
+                        table = Table(name, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+                    if len(table.data) == table.size:
+                        self.add(table)
+
+    def add(self, table: Table) -> None:
+        self.tables[table.name] = table
+        self.max_pieces = max(self.max_pieces, len(table.layout))
+
+    def probe_pieces(self, pieces: list[tuple[str, int]], white_to_move: bool) -> tuple[int, int]:
+        """
+        Look a position without pawns up.
+
+        Args:
+            pieces (list[tuple[str, int]]): Every piece of the position and its square, e.g. ("wQ", 3).
+            white_to_move (bool): The side to move.
+
+        Returns:
+            tuple[int, int]: See Table.probe, None if there is no table for the pieces.
+        """
+        white = "".join(sorted((piece[1] for piece, _ in pieces if piece[0] == "w" and piece[1] != "K"),
+                               key=PIECE_ORDER.index))
+        black = "".join(sorted((piece[1] for piece, _ in pieces if piece[0] == "b" and piece[1] != "K"),
+                               key=PIECE_ORDER.index))
+        if not white and not black:
+            # two kings
+            return DRAW
+        table = self.tables.get(f"K{white}vK{black}")
+        if table is None:
+            # the table of the colors swapped, the same position for the other side
+            table = self.tables.get(f"K{black}vK{white}")
+            if table is None:
+                return None
+            pieces = [(("b" if piece[0] == "w" else "w") + piece[1], square) for piece, square in pieces]
+            white_to_move = not white_to_move
+        pieces = sorted(pieces, key=lambda piece: piece_sort_key(piece[0]))
+        return table.probe([square for _, square in pieces], white_to_move)
+
+    def probe(self, game_state: ChessEngine.GameState) -> tuple[int, int]:
+        """
+        Look the position of a game up.
+
+        Args:
+            game_state (ChessEngine.GameState): The position.
+
+        Returns:
+            tuple[int, int]: 1 if the side to move wins, -1 if it loses, 0 for a draw, and the
+                plies to mate. None if the position has pawns, castle rights or too many pieces.
+        """
+        pieces = []
+        for row in range(8):
+            for col in range(8):
+                piece = game_state.board[row][col]
+                if piece != "--":
+                    if piece[1] == "p" or len(pieces) == self.max_pieces:
+                        return None
+                    pieces.append((piece, row * 8 + col))
+        if Zobrist.castle_rights_index(game_state.current_castle_rights):
+            return None
+        return self.probe_pieces(pieces, game_state.white_to_move)
+
+
+def is_attacked(target: int, attackers: list[tuple[str, int]], occupied: int) -> bool:
+    """
+    Check if a square is attacked by one of the pieces.
+
+    Args:
+        target (int): The square.
+        attackers (list[tuple[str, int]]): The piece letter and square of every attacker.
+        occupied (int): The bitboard of every piece on the board.
+
+    Returns:
+        bool: True if one of them attacks the square.
+    """
+    for piece, square in attackers:
+        if piece in "KN":
+            if target in STEP_TARGETS[piece][square]:
+                return True
+        else:
+            line = LINES[square * 64 + target]
+            if line and (piece == "Q" or (line == 1) == (piece == "R")) \
+                    and not BETWEEN[square * 64 + target] & occupied:
+                return True
+    return False
+
+
+def is_king_attacked(layout: list[str], squares: list[int], color: str) -> bool:
+    """
+    Check if the king of a color is attacked, by the other king too.
+    """
+    if squares[1] in STEP_TARGETS["K"][squares[0]]:
+        return True
+    occupied = 0
+    for square in squares:
+        occupied |= 1 << square
+    attackers = [(piece[1], square) for piece, square in zip(layout, squares) if piece[0] != color and piece[1] != "K"]
+    return is_attacked(squares[0] if color == "w" else squares[1], attackers, occupied)
+
+
+def is_legal(layout: list[str], squares: list[int], white_to_move: bool) -> bool:
+    """
+    Check if the pieces are on different squares and the side not to move isn't in check.
+    """
+    return len(set(squares)) == len(squares) and not is_king_attacked(layout, squares, "b" if white_to_move else "w")
+
+
+def get_moves(layout: list[str], squares: list[int], white_to_move: bool):
+    """
+    Generate the legal moves of the side to move.
+
+    Yields:
+        tuple[list[int], int]: The squares after the move, and the index in the layout of the
+            captured piece, None if it isn't a capture. The captured piece's square is left as it was.
+    """
+    color = "w" if white_to_move else "b"
+    occupants = {square: index for index, square in enumerate(squares)}
+    for index, piece in enumerate(layout):
+        if piece[0] != color:
+            continue
+        for ray in RAYS[piece[1]][squares[index]]:
+            for target in ray:
+                captured = occupants.get(target)
+                if captured is not None and (layout[captured][0] == color or layout[captured][1] == "K"):
+                    break
+                moved = squares[:]
+                moved[index] = target
+                if captured is None:
+                    if not is_king_attacked(layout, moved, color):
+                        yield moved, None
+                    continue
+                remaining_layout = layout[:captured] + layout[captured + 1:]
+                remaining = moved[:captured] + moved[captured + 1:]
+                if not is_king_attacked(remaining_layout, remaining, color):
+                    yield moved, captured
+                break
+
+
+def get_unmoves(layout: list[str], squares: list[int], white_to_move: bool):
+    """
+    Generate the positions the last move, of the side not to move, may have come from.
+
+    Captures are not taken back: they came from a table with one piece more.
+
+    Yields:
+        list[int]: The squares before the move, the other side was to move.
+    """
+    color = "b" if white_to_move else "w"
+    occupied = set(squares)
+    for index, piece in enumerate(layout):
+        if piece[0] != color:
+            continue
+        for ray in RAYS[piece[1]][squares[index]]:
+            for origin in ray:
+                if origin in occupied:
+                    break
+                moved = squares[:]
+                moved[index] = origin
+                if is_legal(layout, moved, not white_to_move):
+                    yield moved
+
+
+def generate_table(name: str, tablebase: Tablebase) -> Table:
+    """
+    Build a table by retrograde analysis.
+
+    The positions are resolved one distance at a time. A position mated at a distance makes
+    every position that can move into it a win one ply further; a position won at a distance
+    counts down the moves left to every position that can move into it, and the last one
+    makes that position a loss one ply further than its longest defense. Captures are
+    looked up in the smaller tables of tablebase when the moves are first counted.
+
+    Args:
+        name (str): The table, e.g. "KQvKR".
+        tablebase (Tablebase): The tables of the positions after a capture.
+
+    Returns:
+        Table: The table, its data in memory.
+    """
+    table = Table(name, bytearray())
+    layout = table.layout
+    values = bytearray(table.size)
+    # per position: 1 once its value is known, the moves into the same table whose value isn't known,
+    # and the longest distance of those that are, all wins for the opponent
+    resolved = bytearray(table.size)
+    remaining = bytearray(table.size)
+    longest_defense = bytearray(table.size)
+    # (index << 1 | 1 if a win) of the positions whose value becomes known at each distance
+    distances: list[list[int]] = [[] for _ in range(LOSS)]
+    cannot_lose = 255
+
+    for index in range(table.size):
+        squares, white_to_move = table.get_position(index)
+        if table.get_index(squares, white_to_move) != index or not is_legal(layout, squares, white_to_move):
+            resolved[index] = 1
+            continue
+
+        successors = set()
+        can_lose = True
+        capture_defense = 0
+        moves = 0
+        for moved, captured in get_moves(layout, squares, white_to_move):
+            moves += 1
+            if captured is None:
+                successors.add(table.get_index(moved, not white_to_move))
+                continue
+            result, plies = tablebase.probe_pieces(
+                [(piece, square) for position, (piece, square) in enumerate(zip(layout, moved)) if position != captured],
+                not white_to_move)
+            if result < 0:
+                # the capture mates or wins the rest
+                distances[plies + 1].append(index << 1 | 1)
+                can_lose = False
+            elif result == 0:
+                can_lose = False
+            else:
+                capture_defense = max(capture_defense, plies + 1)
+
+        if moves == 0:
+            if is_king_attacked(layout, squares, "w" if white_to_move else "b"):
+                distances[0].append(index << 1)
+            else:
+                resolved[index] = 1
+        elif not can_lose:
+            remaining[index] = cannot_lose
+        else:
+            remaining[index] = len(successors)
+            longest_defense[index] = capture_defense
+            if not successors:
+                distances[capture_defense].append(index << 1)
+
+    for distance in range(LOSS):
+        for entry in distances[distance]:
+            index, is_win = entry >> 1, entry & 1
+            if resolved[index]:
+                continue
+            resolved[index] = 1
+            values[index] = distance if is_win else LOSS + distance
+
+            squares, white_to_move = table.get_position(index)
+            predecessors = {table.get_index(moved, not white_to_move)
+                            for moved in get_unmoves(layout, squares, white_to_move)}
+            for predecessor in predecessors:
+                if resolved[predecessor]:
+                    continue
+                if not is_win:
+                    distances[distance + 1].append(predecessor << 1 | 1)
+                elif remaining[predecessor] != cannot_lose:
+                    remaining[predecessor] -= 1
+                    longest_defense[predecessor] = max(longest_defense[predecessor], distance + 1)
+                    if remaining[predecessor] == 0:
+                        distances[longest_defense[predecessor]].append(predecessor << 1)
+
+    table.data = values
+    return table
+
+
+def get_table_name(white: str, black: str) -> str:
+    """
+    Name the table of a material, the side with more or stronger pieces is white.
+
+    Args:
+        white (str): The pieces of one side other than the king, strongest first, e.g. "Q".
+        black (str): The pieces of the other side.
+
+    Returns:
+        str: The table, e.g. "KQvKR" for "R" and "Q".
+    """
+    def strength(pieces: str) -> tuple:
+        return -len(pieces), [PIECE_ORDER.index(piece) for piece in pieces]
+
+    if strength(black) < strength(white):
+        white, black = black, white
+    return f"K{white}vK{black}"
+
+
+def get_required_tables(name: str) -> list[str]:
+    """
+    Get the tables a capture in a table leads to, the ones with one piece less.
+
+    Args:
+        name (str): The table, e.g. "KQvKR".
+
+    Returns:
+        list[str]: The names of the smaller tables, without "KvK" which is a draw.
+    """
+    white, black = name[1:].split("vK")
+    required = []
+    for index in range(len(white)):
+        required.append(get_table_name(white[:index] + white[index + 1:], black))
+    for index in range(len(black)):
+        required.append(get_table_name(white, black[:index] + black[index + 1:]))
+    return [table_name for position, table_name in enumerate(required)
+            if table_name != "KvK" and table_name not in required[:position]]
+
+
+def get_all_tables() -> list[str]:
+    """
+    Get the name of every table without pawns of up to MAX_PIECES pieces, smaller ones first.
+    """
+    names = []
+    for first in PIECE_ORDER:
+        names.append(f"K{first}vK")
+    for first_index, first in enumerate(PIECE_ORDER):
+        for second in PIECE_ORDER[first_index:]:
+            names.append(f"K{first}{second}vK")
+            names.append(f"K{first}vK{second}")
+    return names
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.Tablebase", description="Build endgame tablebases without pawns.")
+    parser.add_argument("directory", help="folder to write the tables to")
+    parser.add_argument("tables", nargs="*",
+                        help="tables to build, e.g. KQvK KQvKR, defaults to every 3 and 4-piece table")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.directory, exist_ok=True)
+    tablebase = Tablebase(args.directory)
+    pending = args.tables or get_all_tables()
+    built = set()
+
+    def build(name: str) -> None:
+        if name in tablebase.tables or name in built:
+            return
+        for required in get_required_tables(name):
+            build(required)
+        start_time = time.perf_counter()
+        table = generate_table(name, tablebase)
+        with open(os.path.join(args.directory, name + ".dtm"), "wb") as file:
+            file.write(table.data)
+        tablebase.add(table)
+        built.add(name)
+        longest = max((value for value in table.data if value < LOSS), default=0)
+        print(f"{name}: {table.size} positions, longest mate {longest} plies, "
+              f"{time.perf_counter() - start_time:.1f} s")
+
+    for name in pending:
+        build(name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import ctypes
+import multiprocessing
+
+EXACT: int = 0
+LOWER_BOUND: int = 1  # the search failed high, the score is at least this
+UPPER_BOUND: int = 2  # the search failed low, the score is at most this
+# added to scores stored in SharedTranspositionTable, so they pack as unsigned bits
+SCORE_OFFSET: int = 1 << 31
+
+
+class TranspositionTable:
+    """
+    Fixed-size table of search results keyed by the Zobrist hash of the position.
+
+    Every bucket has two slots: the first keeps the deepest result seen for the bucket,
+    the second is always replaced by the newest result that did not make it into the first.
+    An entry is a tuple `(key, depth, score, flag, best_move)`.
+
+    Args:
+        buckets (int): Number of buckets, the table holds twice as many entries.
+    """
+
+    def __init__(self, buckets: int = 1 << 16) -> None:
+        self.buckets: int = buckets
+        self.table: list[tuple] = [None] * (buckets * 2)
+        self.hits: int = 0
+        self.misses: int = 0
+        self.collisions: int = 0
+
+    def probe(self, key: int) -> tuple:
+        """
+        Look up a position.
+
+        Args:
+            key (int): The Zobrist hash of the position.
+
+        Returns:
+            tuple: The stored `(key, depth, score, flag, best_move)`, or None.
+        """
+        index = (key % self.buckets) * 2
+        depth_preferred = self.table[index]
+        always_replace = self.table[index + 1]
+
+        if depth_preferred is not None and depth_preferred[0] == key:
+            self.hits += 1
+            return depth_preferred
+        if always_replace is not None and always_replace[0] == key:
+            self.hits += 1
+            return always_replace
+
+        self.misses += 1
+        # the bucket is used by other positions that share the same index
+        if depth_preferred is not None or always_replace is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key: int, depth: int, score: float, flag: int, best_move: int) -> None:
+        """
+        Save a search result.
+
+        Args:
+            key (int): The Zobrist hash of the position.
+            depth (int): The remaining depth the position was searched to.
+            score (float): The score from the side to move's point of view.
+            flag (int): EXACT, LOWER_BOUND or UPPER_BOUND.
+            best_move (int): The code of the best move found, or None.
+        """
+        index = (key % self.buckets) * 2
+        entry = (key, depth, score, flag, best_move)
+        depth_preferred = self.table[index]
+
+        if depth_preferred is None or depth_preferred[0] == key or depth >= depth_preferred[1]:
+            self.table[index] = entry
+        else:
+            self.table[index + 1] = entry
+
+    def clear(self) -> None:
+        """
+        Remove every entry and reset the counters.
+        """
+        self.table = [None] * (self.buckets * 2)
+        self.hits = self.misses = self.collisions = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns:
+            dict[str, int]: The hit, miss and collision counters.
+        """
+        return {"hits": self.hits, "misses": self.misses, "collisions": self.collisions}
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """
+    Transposition table in shared memory, for the processes of a parallel search.
+
+    Every process that gets the table (as an argument of multiprocessing.Process) reads and
+    writes the same entries. There is no lock: an entry is stored as the two 64-bit words
+    `key ^ data, data`, so an entry half written by another process doesn't match its key
+    and is treated as a miss. The hit, miss and collision counters are per process.
+
+    Args:
+        buckets (int): Number of buckets, the table holds twice as many entries.
+    """
+
+    def __init__(self, buckets: int = 1 << 16) -> None:
+        self.buckets: int = buckets
+        self.shared = multiprocessing.RawArray(ctypes.c_uint64, buckets * 4)
+        self.table: memoryview = memoryview(self.shared).cast("B").cast("Q")
+        self.hits: int = 0
+        self.misses: int = 0
+        self.collisions: int = 0
+
+    def __getstate__(self) -> dict:
+        # a memoryview can't be pickled, it is rebuilt on the shared array in the new process
+        state = self.__dict__.copy()
+        del state["table"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.table = memoryview(self.shared).cast("B").cast("Q")
+
+    @staticmethod
+    def pack(depth: int, score: int, flag: int, best_move: int) -> int:
+        """
+        Pack an entry into one 64-bit word.
+
+        Bits 0-15 hold the move code + 1 (0 for no move), 16-17 the flag, 18-25 the depth
+        and 26-57 the score, offset to be positive.
+        """
+        move_bits = 0 if best_move is None else best_move + 1
+        return move_bits | flag << 16 | depth << 18 | (score + SCORE_OFFSET) << 26
+
+    @staticmethod
+    def unpack(key: int, data: int) -> tuple:
+        """
+        Unpack a word made by pack into `(key, depth, score, flag, best_move)`.
+        """
+        move_bits = data & 0xFFFF
+        return (key, data >> 18 & 0xFF, (data >> 26) - SCORE_OFFSET, data >> 16 & 3,
+                move_bits - 1 if move_bits else None)
+
+    def probe(self, key: int) -> tuple:
+        """
+        Look up a position.
+
+        Args:
+            key (int): The Zobrist hash of the position.
+
+        Returns:
+            tuple: The stored `(key, depth, score, flag, best_move)`, or None.
+        """
+        table = self.table
+        index = (key % self.buckets) * 4
+        for slot in (index, index + 2):
+            data = table[slot + 1]
+            if data and table[slot] ^ data == key:
+                self.hits += 1
+                return self.unpack(key, data)
+
+        self.misses += 1
+        if table[index + 1] or table[index + 3]:
+            self.collisions += 1
+        return None
+
+    def store(self, key: int, depth: int, score: float, flag: int, best_move: int) -> None:
+        """
+        Save a search result.
+
+        Args:
+            key (int): The Zobrist hash of the position.
+            depth (int): The remaining depth the position was searched to.
+            score (float): The score from the side to move's point of view.
+            flag (int): EXACT, LOWER_BOUND or UPPER_BOUND.
+            best_move (int): The code of the best move found, or None.
+        """
+        table = self.table
+        index = (key % self.buckets) * 4
+        data = self.pack(depth, int(score), flag, best_move)
+        depth_preferred = table[index + 1]
+
+        if (depth_preferred == 0 or table[index] ^ depth_preferred == key
+                or depth >= depth_preferred >> 18 & 0xFF):
+            slot = index
+        else:
+            slot = index + 2
+        table[slot] = key ^ data
+        table[slot + 1] = data
+
+    def clear(self) -> None:
+        """
+        Remove every entry, for all processes, and reset the counters.
+        """
+        ctypes.memset(self.shared, 0, ctypes.sizeof(self.shared))
+        self.hits = self.misses = self.collisions = 0
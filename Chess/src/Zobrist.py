@@ -0,0 +1,95 @@
+import hashlib
+import src.Castle as Castle
+
+
+def _random_key(name: str) -> int:
+    """
+    Derive a fixed 64-bit random key from a name.
+
+    The keys come from a hash instead of the random module, so every process and every
+    run agree on them and hashes can be shared between processes or saved to disk.
+
+    Args:
+        name (str): A unique name for the key.
+
+    Returns:
+        int: A 64-bit key.
+    """
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "little")
+
+
+PIECES: tuple[str] = ("wp", "wN", "wB", "wR", "wQ", "wK",
+                      "bp", "bN", "bB", "bR", "bQ", "bK")
+
+# one key per piece per square, indexed by row * 8 + col
+PIECE_KEYS: dict[str, list[int]] = {
+    piece: [_random_key(f"{piece}{square}") for square in range(64)]
+    for piece in PIECES
+}
+BLACK_TO_MOVE: int = _random_key("black_to_move")
+EN_PASSANT_KEYS: list[int] = [_random_key(f"en_passant{col}") for col in range(8)]
+
+
+def _build_castle_keys() -> list[int]:
+    """
+    Build one key for every combination of the four castle rights.
+
+    Returns:
+        list[int]: 16 keys, the key at an index is the xor of the keys of its set bits.
+    """
+    right_keys = [_random_key(f"castle{i}") for i in range(4)]
+    keys = []
+    for index in range(16):
+        key = 0
+        for bit in range(4):
+            if index & (1 << bit):
+                key ^= right_keys[bit]
+        keys.append(key)
+    return keys
+
+
+CASTLE_KEYS: list[int] = _build_castle_keys()
+
+
+def castle_rights_index(castle_rights: Castle.CastleRights) -> int:
+    """
+    Pack the castle rights into a 4-bit index for CASTLE_KEYS.
+
+    Args:
+        castle_rights (Castle.CastleRights): The castle rights.
+
+    Returns:
+        int: The index, one bit per right.
+    """
+    return (castle_rights.white_king_side
+            | castle_rights.white_queen_side << 1
+            | castle_rights.black_king_side << 2
+            | castle_rights.black_queen_side << 3)
+
+
+def hash_position(game_state) -> int:
+    """
+    Compute the hash of a position from scratch.
+
+    GameState keeps its hash up to date move by move, this is used to set the first one
+    and whenever a position is loaded from somewhere else.
+
+    Args:
+        game_state (ChessEngine.GameState): The position to hash.
+
+    Returns:
+        int: The 64-bit Zobrist hash.
+    """
+    key = 0
+    for row in range(8):
+        for col in range(8):
+            piece = game_state.board[row][col]
+            if piece != "--":
+                key ^= PIECE_KEYS[piece][row * 8 + col]
+
+    if not game_state.white_to_move:
+        key ^= BLACK_TO_MOVE
+    if game_state.en_passant_possible:
+        key ^= EN_PASSANT_KEYS[game_state.en_passant_possible[1]]
+    key ^= CASTLE_KEYS[castle_rights_index(game_state.current_castle_rights)]
+    return key
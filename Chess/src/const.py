@@ -20,6 +20,14 @@ HEIGHT = WIDTH = int(height * 0.75) - int(height * 0.75) % 100
 ROWS = COLS = 8  # dimension is 8*8
 SQ_SIZE = ceil(HEIGHT / COLS)
 MAX_FPS = 15  # for animation
+BACKEND = "bitboard"  # GameState board representation: "mailbox" or "bitboard"
+AI_TIME_LIMIT = 2.0  # seconds the AI may think about a move
+AI_WORKERS = None  # processes the AI searches with, None for one per CPU core
+AI_PARALLEL_SEARCH = "lazy_smp"  # how the processes share the search: "lazy_smp" or "root_split"
+AI_PONDER = True  # the AI keeps searching while the player thinks
+AI_STATS_LOG = None  # file a JSON line of statistics is appended to after every AI search, e.g. "search_stats.jsonl"
+AI_OPENING_BOOK = "book.bin"  # opening book built with python -m src.OpeningBook, played if the file exists
+AI_TABLEBASES = "tablebases"  # endgame tables built with python -m src.Tablebase, used if the folder exists
 IMAGES = {}
 
 config = Config()
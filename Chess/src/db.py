@@ -50,6 +50,11 @@ class Database:
             INSERT INTO logs(game_id, moves) VALUES (?, ?)
         """, (game_id, moves))
 
+    def get_games_moves(self):
+        return self.cursor.execute("""
+            SELECT logs.moves, games.winner FROM logs JOIN games ON games.id = logs.game_id
+        """).fetchall()
+
     def get_game_id(self):
         return self.cursor.execute("""
             SELECT MAX(id) FROM games
@@ -0,0 +1,203 @@
+"""
+Perft: count the leaf nodes of the move tree to a fixed depth.
+
+It is the benchmark for move generation speed and the check for its correctness,
+the counts of the suite below are the published ones. Run it from the Chess folder:
+
+    python -m src.perft "<fen>" <depth> [--divide] [--backend bitboard]
+    python -m src.perft --suite [--max-depth 3] [--backend mailbox]
+"""
+import argparse
+import sys
+import time
+import src.ChessEngine as ChessEngine
+import src.Move as Move
+
+START_FEN: str = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# (name, fen, leaf counts from depth 1 upwards)
+PERFT_SUITE: list[tuple[str, str, list[int]]] = [
+    ("start position", START_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("rook endgame, en passant pins", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("promotions and castling", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("promotions and castling, mirrored", "r2q1rk1/pP1p2pp/Q4n2/bbp1p3/Np6/1B3NBn/pPPP1PPP/R3K2R b KQ - 0 1",
+     [6, 264, 9467, 422333]),
+    ("discovered checks", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+    ("illegal en passant, horizontal pin", "3k4/3p4/8/K1P4r/8/8/8/8 b - - 0 1",
+     [18, 92, 1670, 10138]),
+    ("illegal en passant, diagonal pin", "8/8/4k3/8/2p5/8/B2P2K1/8 w - - 0 1",
+     [13, 102, 1266, 10276]),
+    ("en passant gives check", "8/8/1k6/2b5/2pP4/8/5K2/8 b - d3 0 1",
+     [15, 126, 1928, 13931]),
+    ("short castle gives check", "5k2/8/8/8/8/8/8/4K2R w K - 0 1",
+     [15, 66, 1198, 6399]),
+    ("long castle gives check", "3k4/8/8/8/8/8/8/R3K3 w Q - 0 1",
+     [16, 71, 1286, 7418]),
+    ("castle rights", "r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1",
+     [26, 1141, 27826]),
+    ("castle prevented", "r3k2r/8/3Q4/8/8/5q2/8/R3K2R b KQkq - 0 1",
+     [44, 1494, 50509]),
+    ("promote out of check", "2K2r2/4P3/8/8/8/8/8/3k4 w - - 0 1",
+     [11, 133, 1442, 19174]),
+    ("discovered check", "8/8/1P2K3/8/2n5/1q6/8/5k2 b - - 0 1",
+     [29, 165, 5160, 31961]),
+    ("promote to give check", "4k3/1P6/8/8/8/8/K7/8 w - - 0 1",
+     [9, 40, 472, 2661]),
+    ("underpromote to give check", "8/P1k5/K7/8/8/8/8/8 w - - 0 1",
+     [6, 27, 273, 1329, 18135]),
+    ("self stalemate", "K1k5/8/P7/8/8/8/8/8 w - - 0 1",
+     [2, 6, 13, 63, 382]),
+    ("stalemate and checkmate", "8/k1P5/8/1K6/8/8/8/8 w - - 0 1",
+     [10, 25, 268, 926, 10857]),
+    ("stalemate and checkmate 2", "8/8/2k5/5q2/5n2/8/5K2/8 b - - 0 1",
+     [37, 183, 6559, 23527]),
+    # positions that caught bugs in this engine, counts from a reference move generator
+    ("castle through pawn attacks", "r3k2r/p1ppPpb1/b5pB/2qNN3/2n1P3/1p5Q/PPP1BPPn/2R1K2R b kq - 0 8",
+     [44, 2252, 95076]),
+    ("pawn pinned along its file", "8/1K6/2ppP3/1P4P1/1rq5/8/6k1/8 w - - 0 15",
+     [10, 333, 2757]),
+    ("en passant exposes the king", "8/1P6/8/K1pP1rk1/6P1/8/1R6/8 w - - 0 16",
+     [22, 333, 7257]),
+    ("en passant captures the checker", "1r1r4/pqp5/1n6/1kp1ppb1/Pp4P1/1P5p/4KB1P/R5R1 b - a3 0 38",
+     [5, 126, 5487]),
+]
+
+
+def perft(game_state: ChessEngine.GameState, depth: int) -> int:
+    """
+    Count the leaf nodes of the legal move tree.
+
+    Args:
+        game_state (ChessEngine.GameState): The position to count from, it is left unchanged.
+        depth (int): Number of plies to play.
+
+    Returns:
+        int: The number of leaf nodes.
+    """
+    if depth == 0:
+        return 1
+
+    # every promotion piece is a move code of its own
+    moves = game_state.get_valid_move_codes()
+    if depth == 1:
+        # no need to play the last ply
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        game_state.make_move_code(move)
+        nodes += perft(game_state, depth - 1)
+        game_state.undo_move()
+    return nodes
+
+
+def divide(game_state: ChessEngine.GameState, depth: int) -> dict[str, int]:
+    """
+    Count the leaf nodes under every legal move of the position.
+
+    Comparing the counts with another engine points to the move that is generated wrong.
+
+    Args:
+        game_state (ChessEngine.GameState): The position to count from.
+        depth (int): Number of plies to play, the root move included.
+
+    Returns:
+        dict[str, int]: Leaf count per move in coordinate notation, e.g. "e2e4" or "b7b8q".
+    """
+    counts = {}
+    for move in game_state.get_valid_move_codes():
+        game_state.make_move_code(move)
+        counts[Move.code_notation(move)] = perft(game_state, depth - 1)
+        game_state.undo_move()
+    return counts
+
+
+def run_position(fen: str, depth: int, backend: str, show_divide: bool) -> int:
+    """
+    Print the perft count, time and speed of a single position.
+
+    Returns:
+        int: The number of leaf nodes.
+    """
+    game_state = ChessEngine.GameState(backend)
+    game_state.load_fen(fen)
+
+    start = time.perf_counter()
+    if show_divide:
+        counts = divide(game_state, depth)
+        for name in sorted(counts):
+            print(f"{name}: {counts[name]}")
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(game_state, depth)
+    elapsed = time.perf_counter() - start
+
+    print(f"depth {depth}: {nodes} nodes in {elapsed:.2f}s "
+          f"({nodes / max(elapsed, 1e-9):,.0f} nodes/s)")
+    return nodes
+
+
+def run_suite(max_depth: int, backend: str) -> bool:
+    """
+    Run every suite position up to max_depth and compare with the known counts.
+
+    Returns:
+        bool: True if every count matched.
+    """
+    all_passed = True
+    total_nodes = 0
+    start = time.perf_counter()
+    game_state = ChessEngine.GameState(backend)
+
+    for name, fen, counts in PERFT_SUITE:
+        passed = True
+        for depth, expected in enumerate(counts[:max_depth], start=1):
+            game_state.load_fen(fen)
+            nodes = perft(game_state, depth)
+            total_nodes += nodes
+            if nodes != expected:
+                passed = False
+                print(f"FAIL {name} depth {depth}: {nodes}, expected {expected}\n     {fen}")
+        if passed:
+            print(f"ok   {name}")
+        all_passed = all_passed and passed
+
+    elapsed = time.perf_counter() - start
+    print(f"{backend}: {total_nodes} nodes in {elapsed:.2f}s "
+          f"({total_nodes / max(elapsed, 1e-9):,.0f} nodes/s)")
+    return all_passed
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.perft", description="Count move generation leaf nodes.")
+    parser.add_argument("fen", nargs="?", default=START_FEN,
+                        help="position to count, defaults to the start position")
+    parser.add_argument("depth", nargs="?", type=int, default=3)
+    parser.add_argument("--divide", action="store_true",
+                        help="print the count under every root move")
+    parser.add_argument("--suite", action="store_true",
+                        help="check the built-in positions against their known counts")
+    parser.add_argument("--max-depth", type=int, default=3,
+                        help="deepest depth the suite checks (default 3)")
+    parser.add_argument("--backend", choices=ChessEngine.GameState.BACKENDS,
+                        default="bitboard")
+    args = parser.parse_args(argv)
+
+    if args.suite:
+        return 0 if run_suite(args.max_depth, args.backend) else 1
+
+    run_position(args.fen, args.depth, args.backend, args.divide)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,9 @@
-import multiprocessing
 import src.Sounds as Sounds
 from src.Theme import Theme
 from src.const import *
 import src.ChessEngine as ChessEngine
 import src.ChessAI as ChessAI
+import src.AIWorker as AIWorker
 import src.Move as Move
 import sys
 import os
@@ -268,7 +268,7 @@ class Board():
         screen = p.display.set_mode((WIDTH, HEIGHT))
         clock = p.time.Clock()
         screen.fill(p.Color("white"))
-        game_state = ChessEngine.GameState()
+        game_state = ChessEngine.GameState(BACKEND)
         valid_moves = game_state.get_valid_moves()
 
         # keep track of last click
@@ -277,14 +277,15 @@ class Board():
         # keep track of player clicks (two tuples: [(6, 4), (4, 4)])
         player_clicks = []
 
-        ai = ChessAI.ChessAI()
+        ai = ChessAI.ChessAI(AI_TIME_LIMIT, workers=AI_WORKERS)
         sound_manager = Sounds.SoundManager()
 
         return flags, screen, clock, game_state, valid_moves, square_selected, player_clicks, ai, sound_manager
 
-    def handle_key_events(self, event: p.event.Event, game_state: ChessEngine.GameState, flags: dict[str, bool], square_selected: tuple[int], player_clicks: list[tuple[int]], valid_moves: list[Move.Move], thread_process: multiprocessing.Process) -> None:
+    def handle_key_events(self, event: p.event.Event, game_state: ChessEngine.GameState, flags: dict[str, bool], square_selected: tuple[int], player_clicks: list[tuple[int]], valid_moves: list[Move.Move], ai_worker: AIWorker.AIWorker) -> None:
         """
-        Handle key events in the game, where q or escape is quit, z is undo, and k is change theme.
+        Handle key events in the game, where q or escape is quit, z is undo, k is change theme,
+        and m makes the AI play the best move it found so far.
         """
         if event.type == p.KEYDOWN:
             if event.key == p.K_k:
@@ -305,9 +306,13 @@ class Board():
                 flags["move_undo"] = True
 
                 if flags["ai_thinking"]:
-                    thread_process.terminate()
+                    ai_worker.cancel()
                     flags["ai_thinking"] = False
 
+            elif event.key == p.K_m:
+                if flags["ai_thinking"]:
+                    ai_worker.move_now()
+
             elif event.key == p.K_r:
                 game_state, valid_moves, square_selected, player_clicks, flags = self.reload_game(
                     flags)
@@ -319,7 +324,7 @@ class Board():
                 flags["move_undo"] = True
 
                 if flags["ai_thinking"]:
-                    thread_process.terminate()
+                    ai_worker.cancel()
                     flags["ai_thinking"] = False
 
         return game_state, valid_moves, square_selected, player_clicks, flags
@@ -391,7 +396,7 @@ class Board():
         p.quit()
 
     def reload_game(self, flags):
-        game_state = ChessEngine.GameState()
+        game_state = ChessEngine.GameState(BACKEND)
         valid_moves = game_state.get_valid_moves()
         square_selected = ()
         player_clicks = []